@@ -8,12 +8,14 @@ For more details, run the above command with -h or --help argument.
 
 @author Raymond Harry Rudy rudyhar@jp.ibm.com
 """
+import os
 import sys
-import numpy as np
 import argparse
 import random
-from qiskit import QuantumProgram
-from qiskit.tools.visualization import latex_drawer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from openqasm.generators import (  # pylint: disable=wrong-import-position
+    bernstein_vazirani, bernstein_vazirani_outcomes, outcomes_comment)
 
 if sys.version_info < (3, 5):
     raise Exception("Please use Python 3.5 or later")
@@ -38,11 +40,16 @@ def print_qasm(aCircuit, comments=[], outname=None):
         outfile.close()
 
 
-def draw_circuit(aCircuit, outfilename="bv.tex"):
+def draw_circuit(qasm, outfilename="bv.tex"):
     """
         draw the circuit
     """
-    latex_drawer(aCircuit, outfilename, basis="h,x,cx")
+    # QISKit is only needed for drawing, and takes seconds to import.
+    from qiskit import QuantumProgram
+    from qiskit.tools.visualization import latex_drawer
+    qp = QuantumProgram()
+    name = qp.load_qasm_text(qasm)
+    latex_drawer(qp.get_circuit(name), outfilename, basis="h,x,cx")
 
 
 def generate_astring(nqubits, prob=1.0):
@@ -90,47 +97,8 @@ def gen_bv_main(nQubits, hiddenString):
     """
         generate a circuit of the Bernstein-Vazirani algorithm
     """
-    Q_program = QuantumProgram()
-    # Creating registers
-    # qubits for querying the oracle and finding the hidden integer
-    qr = Q_program.create_quantum_register("qr", nQubits)
-    # for recording the measurement on qr
-    cr = Q_program.create_classical_register("cr", nQubits-1)
-
-    circuitName = "BernsteinVazirani"
-    bvCircuit = Q_program.create_circuit(circuitName, [qr], [cr])
-
-    # Apply Hadamard gates to the first
-    # (nQubits - 1) before querying the oracle
-    for i in range(nQubits-1):
-        bvCircuit.h(qr[i])
-
-    # Apply 1 and Hadamard gate to the last qubit
-    # for storing the oracle's answer
-    bvCircuit.x(qr[nQubits-1])
-    bvCircuit.h(qr[nQubits-1])
-
-    # Apply barrier so that it is not optimized by the compiler
-    bvCircuit.barrier()
-
-    # Apply the inner-product oracle
-    hiddenString = hiddenString[::-1]
-    for i in range(len(hiddenString)):
-        if hiddenString[i] == "1":
-            bvCircuit.cx(qr[i], qr[nQubits-1])
-    hiddenString = hiddenString[::-1]
-    # Apply barrier
-    bvCircuit.barrier()
-
-    # Apply Hadamard gates after querying the oracle
-    for i in range(nQubits-1):
-        bvCircuit.h(qr[i])
-
-    # Measurement
-    for i in range(nQubits-1):
-        bvCircuit.measure(qr[i], cr[i])
-
-    return Q_program, [circuitName, ]
+    # qr[nQubits-1] stores the oracle's answer, cr records the other qubits
+    return bernstein_vazirani(nQubits, hiddenString).qasm()
 
 
 def main(nQubits, hiddenString, prob, draw, outname):
@@ -139,21 +107,16 @@ def main(nQubits, hiddenString, prob, draw, outname):
     assert check_astring(hiddenString, nQubits-1) is True, "Invalid hidden str"
 
     comments = ["Bernstein-Vazirani with " + str(nQubits) + " qubits.",
-                "Hidden string is " + hiddenString]
-    qp, names = gen_bv_main(nQubits, hiddenString)
+                "Hidden string is " + hiddenString,
+                outcomes_comment(bernstein_vazirani_outcomes(nQubits, hiddenString))]
+    qasm = gen_bv_main(nQubits, hiddenString)
 
     if outname is None:
         outname = "bv_n" + str(nQubits)
 
-    for each in names:
-        print_qasm(qp.get_qasm(each), comments, outname)
-        if draw:
-            if outname is None:
-                midfix = "_"+str(nQubits)+"_"+hiddenString
-                draw_circuit(qp.get_circuit(each),
-                             outfilename=each+midfix+".tex")
-            else:
-                draw_circuit(qp.get_circuit(each), outfilename=outname+".tex")
+    print_qasm(qasm, comments, outname)
+    if draw:
+        draw_circuit(qasm, outfilename=outname+".tex")
 
 
 if __name__ == "__main__":
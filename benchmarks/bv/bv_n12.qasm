@@ -1,6 +1,7 @@
 //@author Raymond Harry Rudy rudyhar@jp.ibm.com
 //Bernstein-Vazirani with 12 qubits.
 //Hidden string is 11111111111
+//@outcomes 11111111111
 OPENQASM 2.0;
 include "qelib1.inc";
 qreg qr[12];
@@ -1,6 +1,7 @@
 //@author Raymond Harry Rudy rudyhar@jp.ibm.com
 //Bernstein-Vazirani with 14 qubits.
 //Hidden string is 1111111111111
+//@outcomes 1111111111111
 OPENQASM 2.0;
 include "qelib1.inc";
 qreg qr[14];
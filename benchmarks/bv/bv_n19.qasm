@@ -1,6 +1,7 @@
 //@author Raymond Harry Rudy rudyhar@jp.ibm.com
 //Bernstein-Vazirani with 19 qubits.
 //Hidden string is 111111111111111111
+//@outcomes 111111111111111111
 OPENQASM 2.0;
 include "qelib1.inc";
 qreg qr[19];
@@ -7,12 +7,14 @@ python cc_gen.py -c 15 -f 3
 
 @author Raymond Harry Rudy rudyhar@jp.ibm.com
 """
+import os
 import sys
-import numpy as np
 import argparse
 import random
-from qiskit import QuantumProgram
-from qiskit.tools.visualization import latex_drawer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from openqasm.generators import (  # pylint: disable=wrong-import-position
+    counterfeit_coin, counterfeit_coin_outcomes, outcomes_comment)
 
 if sys.version_info < (3, 5):
     raise Exception("Please use Python 3.5 or later")
@@ -37,11 +39,16 @@ def print_qasm(aCircuit, comments=[], outname=None):
         outfile.close()
 
 
-def draw_circuit(aCircuit, outfilename="bv.tex"):
+def draw_circuit(qasm, outfilename="bv.tex"):
     """
         draw the circuit
     """
-    latex_drawer(aCircuit, outfilename, basis="h,x,cx")
+    # QISKit is only needed for drawing, and takes seconds to import.
+    from qiskit import QuantumProgram
+    from qiskit.tools.visualization import latex_drawer
+    qp = QuantumProgram()
+    name = qp.load_qasm_text(qasm)
+    latex_drawer(qp.get_circuit(name), outfilename, basis="h,x,cx")
 
 
 def generate_false(nCoins):
@@ -55,73 +62,20 @@ def gen_cc_main(nCoins, indexOfFalseCoin):
     """
         generate a circuit of the counterfeit coin problem
     """
-    Q_program = QuantumProgram()
-    # using the last qubit for storing the oracle's answer
-    nQubits = nCoins + 1
-    # Creating registers
-    # qubits for querying coins and storing the balance result
-    qr = Q_program.create_quantum_register("qr", nQubits)
-    # for recording the measurement on qr
-    cr = Q_program.create_classical_register("cr", nQubits)
-
-    circuitName = "CounterfeitCoinProblem"
-    ccCircuit = Q_program.create_circuit(circuitName, [qr], [cr])
-
-    # Apply Hadamard gates to the first nCoins quantum register
-    # create uniform superposition
-    for i in range(nCoins):
-        ccCircuit.h(qr[i])
-
-    # check if there are even number of coins placed on the pan
-    for i in range(nCoins):
-        ccCircuit.cx(qr[i], qr[nCoins])
-
-    # perform intermediate measurement to check if the last qubit is zero
-    ccCircuit.measure(qr[nCoins], cr[nCoins])
-
-    # proceed to query the quantum beam balance if cr is zero
-    ccCircuit.x(qr[nCoins]).c_if(cr, 0)
-    ccCircuit.h(qr[nCoins]).c_if(cr, 0)
-
-    # we rewind the computation when cr[N] is not zero
-    for i in range(nCoins):
-        ccCircuit.h(qr[i]).c_if(cr, 2**nCoins)
-
-    # apply barrier for marking the beginning of the oracle
-    ccCircuit.barrier()
-
-    ccCircuit.cx(qr[indexOfFalseCoin], qr[nCoins]).c_if(cr, 0)
-
-    # apply barrier for marking the end of the oracle
-    ccCircuit.barrier()
-
-    # apply Hadamard gates to the first nCoins qubits
-    for i in range(nCoins):
-        ccCircuit.h(qr[i]).c_if(cr, 0)
-
-    # measure qr and store the result to cr
-    for i in range(nCoins):
-        ccCircuit.measure(qr[i], cr[i])
-
-    return Q_program, [circuitName, ]
+    # qr[nCoins] stores the balance result, measured mid-circuit into cr
+    return counterfeit_coin(nCoins, indexOfFalseCoin).qasm()
 
 
 def main(nCoins, falseIndex, draw, outname):
     comments = ["Counterfeit coin finding with " + str(nCoins) + " coins.",
-                "The false coin is " + str(falseIndex)]
+                "The false coin is " + str(falseIndex),
+                outcomes_comment(counterfeit_coin_outcomes(nCoins, falseIndex))]
     if outname is None:
         outname = "cc_n" + str(nCoins + 1)
-    qp, names = gen_cc_main(nCoins, falseIndex)
-    for each in names:
-        print_qasm(qp.get_qasm(each), comments, outname)
-        if draw:
-            if outname is None:
-                midfix = "_"+str(nCoins)+"_"+str(falseIndex)
-                draw_circuit(qp.get_circuit(each),
-                             outfilename=each+midfix+".tex")
-            else:
-                draw_circuit(qp.get_circuit(each),
-                             outfilename=outname+".tex")
+    qasm = gen_cc_main(nCoins, falseIndex)
+    print_qasm(qasm, comments, outname)
+    if draw:
+        draw_circuit(qasm, outfilename=outname+".tex")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 //@author Raymond Harry Rudy rudyhar@jp.ibm.com
 //Counterfeit coin finding with 9 coins.
 //The false coin is 6
+//@outcomes 0001000000 0110111111 1000000000 1111111111
 OPENQASM 2.0;
 include "qelib1.inc";
 qreg qr[10];
@@ -1,6 +1,7 @@
 //@author Raymond Harry Rudy rudyhar@jp.ibm.com
 //Counterfeit coin finding with 10 coins.
 //The false coin is 6
+//@outcomes 00001000000 01110111111 10000000000 11111111111
 OPENQASM 2.0;
 include "qelib1.inc";
 qreg qr[11];
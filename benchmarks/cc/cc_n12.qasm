@@ -1,6 +1,7 @@
 //@author Raymond Harry Rudy rudyhar@jp.ibm.com
 //Counterfeit coin finding with 11 coins.
 //The false coin is 6
+//@outcomes 000001000000 011110111111 100000000000 111111111111
 OPENQASM 2.0;
 include "qelib1.inc";
 qreg qr[12];
@@ -1,6 +1,7 @@
 //@author Raymond Harry Rudy rudyhar@jp.ibm.com
 //Counterfeit coin finding with 13 coins.
 //The false coin is 6
+//@outcomes 00000001000000 01111110111111 10000000000000 11111111111111
 OPENQASM 2.0;
 include "qelib1.inc";
 qreg qr[14];
@@ -1,6 +1,7 @@
 //@author Raymond Harry Rudy rudyhar@jp.ibm.com
 //Counterfeit coin finding with 14 coins.
 //The false coin is 13
+//@outcomes 001111111111111 010000000000000 100000000000000 111111111111111
 OPENQASM 2.0;
 include "qelib1.inc";
 qreg qr[15];
@@ -1,6 +1,7 @@
 //@author Raymond Harry Rudy rudyhar@jp.ibm.com
 //Counterfeit coin finding with 15 coins.
 //The false coin is 13
+//@outcomes 0010000000000000 0101111111111111 1000000000000000 1111111111111111
 OPENQASM 2.0;
 include "qelib1.inc";
 qreg qr[16];
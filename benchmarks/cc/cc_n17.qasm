@@ -1,6 +1,7 @@
 //@author Raymond Harry Rudy rudyhar@jp.ibm.com
 //Counterfeit coin finding with 16 coins.
 //The false coin is 12
+//@outcomes 00001000000000000 01110111111111111 10000000000000000 11111111111111111
 OPENQASM 2.0;
 include "qelib1.inc";
 qreg qr[17];
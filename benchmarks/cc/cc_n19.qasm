@@ -1,6 +1,7 @@
 //@author Raymond Harry Rudy rudyhar@jp.ibm.com
 //Counterfeit coin finding with 18 coins.
 //The false coin is 12
+//@outcomes 0000001000000000000 0111110111111111111 1000000000000000000 1111111111111111111
 OPENQASM 2.0;
 include "qelib1.inc";
 qreg qr[19];
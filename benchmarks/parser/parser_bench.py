@@ -0,0 +1,247 @@
+"""
+Measure the throughput of the OpenQASM parsers on synthetic stress inputs.
+
+Each corpus is generated at several sizes so that super-linear behavior
+shows up as a falling rate. For every parser available (the lexer and the
+parser of the openqasm package, and QISKit's parser when it is installed)
+the suite prints one CSV line per corpus and size:
+
+corpus,parser,size,tokens,statements,seconds,tokens/s,statements/s,peak_mb
+
+Times are the best of several runs; the peak memory is the largest Python
+allocation seen by tracemalloc during a separate run. The parsers run with
+the default recursion limit, as users get them. Every corpus is valid: a
+parser rejecting one prints a "failed" line, and the suite then exits with
+status 1.
+
+Example run:
+  python parser_bench.py -c gates -s 10000 100000 1000000
+"""
+
+import argparse
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from openqasm import QasmError  # pylint: disable=wrong-import-position
+from openqasm.parser import (  # pylint: disable=wrong-import-position
+    clear_include_cache, parse, tokenize)
+
+if sys.version_info < (3, 0):
+    raise Exception("Please use Python version 3 or greater.")
+
+HEADER = 'OPENQASM 2.0;\ninclude "qelib1.inc";\n'
+
+
+def gates_corpus(size):
+    """``size`` gate statements on 32 qubits."""
+    lines = [HEADER, "qreg q[16];\nqreg r[16];\ncreg c[16];\n"]
+    for index in range(size):
+        first, second = index % 16, (index * 7 + 3) % 16
+        kind = index % 4
+        if kind == 0:
+            lines.append("cx q[%d],r[%d];\n" % (first, second))
+        elif kind == 1:
+            lines.append("u3(0.1,%d.5,-pi/4) q[%d];\n" % (index % 10, first))
+        elif kind == 2:
+            lines.append("h r[%d];\n" % second)
+        else:
+            lines.append("cu1(pi/%d) q[%d],q[%d];\n" % (index % 7 + 1, first, (first + 1) % 16))
+    return "".join(lines), {}
+
+
+def registers_corpus(size):
+    """``size`` pairs of quantum and classical registers, each measured."""
+    lines = [HEADER]
+    for index in range(size):
+        lines.append("qreg q%d[2];\ncreg c%d[2];\n" % (index, index))
+    for index in range(size):
+        lines.append("h q%d[0];\nmeasure q%d -> c%d;\n" % (index, index, index))
+    return "".join(lines), {}
+
+
+def nested_corpus(size):
+    """A chain of ``size`` gate definitions, each calling the previous one."""
+    lines = [HEADER, "gate g0(t) a,b { cx a,b; rz(t) b; cx a,b; }\n"]
+    for index in range(1, size):
+        lines.append("gate g%d(t) a,b { g%d(t/2) a,b; g%d(t*2) b,a; }\n"
+                     % (index, index - 1, index - 1))
+    lines.append("qreg q[2];\n")
+    for index in range(0, size, max(1, size // 100)):
+        lines.append("g%d(0.5) q[0],q[1];\n" % index)
+    return "".join(lines), {}
+
+
+def expressions_corpus(size):
+    """Gates whose parameters are expressions of ``size`` terms."""
+    lines = [HEADER, "qreg q[4];\n"]
+    terms = ["sin(pi/%d)*%d.25" % (index % 5 + 2, index % 9) if index % 3 == 0 else
+             "(%d-cos(0.%d))^2" % (index % 4, index % 10) if index % 3 == 1 else
+             "-exp(ln(%d))/sqrt(%d)" % (index % 6 + 1, index % 8 + 1)
+             for index in range(size)]
+    expression = "+".join(terms)
+    for index in range(10):
+        lines.append("u1(%s) q[%d];\n" % (expression, index % 4))
+    return "".join(lines), {}
+
+
+def includes_corpus(size):
+    """A chain of ``size`` include files, each defining a gate."""
+    files = {}
+    for index in range(size):
+        text = "gate inc%d a { U(0,0,%d.5) a; }\n" % (index, index % 10)
+        if index + 1 < size:
+            text = 'include "chain%d.inc";\n' % (index + 1) + text
+        files["chain%d.inc" % index] = text
+    source = HEADER + 'include "chain0.inc";\nqreg q[1];\n'
+    source += "".join("inc%d q[0];\n" % index for index in range(size))
+    return source, files
+
+
+CORPORA = {
+    "gates": (gates_corpus, [10000, 100000, 1000000]),
+    "registers": (registers_corpus, [1000, 5000, 20000]),
+    "nested": (nested_corpus, [100, 1000, 5000]),
+    "expressions": (expressions_corpus, [100, 1000, 10000]),
+    "includes": (includes_corpus, [10, 100, 500, 2000]),
+}
+
+
+def _qiskit_parser():
+    """Return a QISKit parsing function, or None if QISKit is missing."""
+    try:
+        from qiskit import qasm2
+    except ImportError:
+        try:
+            from qiskit.qasm import Qasm
+        except ImportError:
+            return None
+        return lambda source, path, files: Qasm(filename=path).parse()
+    return lambda source, path, files: qasm2.load(
+        path, include_path=qasm2.LEGACY_INCLUDE_PATH + (os.path.dirname(path),))
+
+
+def available_parsers():
+    """Return the parsers that can run here, as ``(name, function)``.
+
+    Each function takes the text and the path of the main file, and the
+    texts of the files it includes, which only the lexer reads itself.
+    """
+    parsers = [
+        ("openqasm-lexer", lambda source, path, files:
+         [tokenize(text) for text in [source] + list(files.values())]),
+        ("openqasm", lambda source, path, files: parse(source, path)),
+    ]
+    qiskit_parse = _qiskit_parser()
+    if qiskit_parse is not None:
+        parsers.append(("qiskit", qiskit_parse))
+    return parsers
+
+
+def measure(function, source, path, files, repeat):
+    """Return the best time of ``repeat`` runs and the peak memory in MB."""
+    best = None
+    for _ in range(repeat):
+        clear_include_cache()
+        gc.collect()
+        start = time.perf_counter()
+        function(source, path, files)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    clear_include_cache()
+    gc.collect()
+    tracemalloc.start()
+    function(source, path, files)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / 1e6
+
+
+def run_corpus(name, size, parsers, repeat, workdir):
+    """Generate one corpus and print a CSV line per parser.
+
+    Returns:
+        int: number of parsers that failed on the corpus.
+    """
+    source, files = CORPORA[name][0](size)
+    for file_name, text in files.items():
+        with open(os.path.join(workdir, file_name), "w") as out:
+            out.write(text)
+    path = os.path.join(workdir, "%s_%d.qasm" % (name, size))
+    with open(path, "w") as out:
+        out.write(source)
+
+    tokens = len(tokenize(source)) + sum(len(tokenize(text)) for text in files.values())
+    try:
+        statements = len(parse(source, path).statements)
+    except QasmError:
+        # The openqasm parser reports the error on its own line.
+        statements = 0
+    failures = 0
+    for parser_name, function in parsers:
+        try:
+            elapsed, peak = measure(function, source, path, files, repeat)
+        except Exception as err:  # pylint: disable=broad-except
+            print("%s,%s,%d,failed: %s" % (name, parser_name, size,
+                                          str(err).splitlines()[0] if str(err) else
+                                          type(err).__name__), flush=True)
+            failures += 1
+            continue
+        print("%s,%s,%d,%d,%d,%.4f,%.0f,%.0f,%.1f"
+              % (name, parser_name, size, tokens, statements, elapsed,
+                 tokens / elapsed, statements / elapsed, peak), flush=True)
+    return failures
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Measure parser throughput on synthetic OpenQASM corpora.")
+    parser.add_argument("-c", "--corpus", nargs="*", default=sorted(CORPORA),
+                        choices=sorted(CORPORA), help="corpora to run")
+    parser.add_argument("-s", "--sizes", nargs="*", type=int, default=None,
+                        help="sizes to generate (default: per corpus)")
+    parser.add_argument("-p", "--parser", nargs="*", default=None,
+                        help="parsers to run (default: all available)")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="number of timed runs")
+    parser.add_argument("-l", "--list", action="store_true",
+                        help="list the available parsers")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    parsers = available_parsers()
+    if args.list:
+        for name, _ in parsers:
+            print(name)
+        return
+    if args.parser:
+        parsers = [parser for parser in parsers if parser[0] in args.parser]
+
+    workdir = tempfile.mkdtemp(prefix="parser_bench_")
+    failures = 0
+    try:
+        print("corpus,parser,size,tokens,statements,seconds,tokens/s,"
+              "statements/s,peak_mb", flush=True)
+        for name in args.corpus:
+            for size in args.sizes or CORPORA[name][1]:
+                failures += run_corpus(name, size, parsers, args.repeat, workdir)
+    finally:
+        shutil.rmtree(workdir)
+    if failures:
+        print("%d parser runs failed on valid corpora" % failures, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("Benchmark suite interrupted: exit!")
+        sys.exit(1)
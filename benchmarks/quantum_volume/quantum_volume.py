@@ -7,11 +7,7 @@ Example run:
 
 import math
 import argparse
-from numpy import random
-from scipy import linalg
-from qiskit import QuantumRegister, ClassicalRegister, QuantumCircuit
-from qiskit.mapper import two_qubit_kak
-from qiskit.wrapper import register, execute, get_backend, compile
+from numpy import linalg, random
 
 
 def random_SU(n):
@@ -38,6 +34,11 @@ def build_model_circuits(n, depth, num_circ=1):
     Returns:
         list(QuantumCircuit): list of quantum volume circuits
     """
+    # QISKit decomposes the SU(4) blocks; it takes seconds to import, so
+    # only load it when circuits are built.
+    from qiskit import QuantumRegister, ClassicalRegister, QuantumCircuit
+    from qiskit.mapper import two_qubit_kak
+
     # Create quantum/classical registers of size n
     q = QuantumRegister(n)
     c = ClassicalRegister(n)
@@ -101,6 +102,7 @@ def main():
 
     # Run the circuits
     if args.run:
+        from qiskit.wrapper import register, execute
         backend_name = args.backend
         if backend_name.startswith("ibmq"):
             import Qconfig
@@ -110,8 +112,9 @@ def main():
         return
 
     # Save QASM representation of circuits
-    for i in range(num_circ):
-        f = open('quantum_volume_n%d_d%d_i.qasm' % (n, depth, i), 'w')
+    for i in range(args.num_circ):
+        suffix = '_%d' % i if args.num_circ > 1 else ''
+        f = open('%s_n%d_d%d%s.qasm' % (args.name, args.qubits, args.depth, suffix), 'w')
         f.write(circuits[i].qasm())
         f.close()
 
@@ -4,19 +4,27 @@ import os.path
 import sys
 import re
 import time
-import json
 import glob
 import operator
 
-import qiskit
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from openqasm.canonical import file_hash, structural_hash  # pylint: disable=wrong-import-position
+from openqasm.circuit import NON_GATES  # pylint: disable=wrong-import-position
+from openqasm.engines import ENGINES, get_engine  # pylint: disable=wrong-import-position
+from openqasm.parser import parse_file  # pylint: disable=wrong-import-position
+from openqasm.telemetry import (  # pylint: disable=wrong-import-position
+    OTLP_ENDPOINT, OTLPExporter, PrometheusTextfile, Telemetry)
 
 if sys.version_info < (3, 0):
     raise Exception("Please use Python version 3 or greater.")
 
 
-def run_benchmark(args, qubit):
+def run_benchmark(args, qubit, telemetry, seen=None):
     """
     Run simulation by each qasm files
+
+    ``seen`` maps the structural hash of the circuits already run to their
+    file, to skip duplicates.
     """
     name = args.name
     backend = args.backend
@@ -49,6 +57,20 @@ def run_benchmark(args, qubit):
                 (re.search(pattern2, os.path.basename(qasm)))):
             continue
 
+        if backend in ENGINES:
+            ret = run_engine(args, qasm, qubit, depth, telemetry, seen)
+            continue
+
+        labels = {"suite": name, "backend": backend, "n": qubit, "depth": depth}
+        digest = None
+        if seen is not None or args.verify or args.save_ref:
+            digest = file_hash(qasm)
+        if is_duplicate(digest, seen, qasm, labels, telemetry):
+            ret = True
+            continue
+
+        # QISKit takes seconds to import: only load it to run a circuit.
+        import qiskit
         q_prog = qiskit.QuantumProgram()
 
         if backend.startswith("ibmqx"):
@@ -57,16 +79,25 @@ def run_benchmark(args, qubit):
         elif not backend.startswith("local"):
             raise Exception('only ibmqx or local simulators are supported')
 
-        q_prog.load_qasm_file(qasm, name=name)
+        with telemetry.phase("load", **labels):
+            q_prog.load_qasm_file(qasm, name=name)
 
         start = time.time()
-        ret = q_prog.execute([name], backend=backend, shots=1,
-                             max_credits=5, hpc=None,
-                             timeout=60*60*24, seed=seed)
+        with telemetry.phase("simulate", **labels):
+            ret = q_prog.execute([name], backend=backend, shots=1,
+                                 max_credits=5, hpc=None,
+                                 timeout=60*60*24, seed=seed)
         elapsed = time.time() - start
 
         if not ret.get_circuit_status(0) == "DONE":
+            telemetry.inc("runs_total", help_text="Benchmark runs by status.",
+                          status="failed", **labels)
+            telemetry.flush()
             return False
+        telemetry.inc("runs_total", help_text="Benchmark runs by status.",
+                      status="done", **labels)
+        telemetry.set("qubits", qubit, "Width of the last circuit run.", **labels)
+        telemetry.flush()
 
         if backend.startswith("ibmqx"):
             elapsed = ret.get_data(name)["time"]
@@ -75,7 +106,10 @@ def run_benchmark(args, qubit):
               "," + str(depth) + "," + str(elapsed), flush=True)
 
         if args.verify:
-            verify_result(ret, name, qasm)
+            with telemetry.phase("verify", **labels):
+                verify_result(ret.get_counts(name), name, qasm, digest)
+        if args.save_ref:
+            save_result(ret.get_counts(name), name, digest)
 
     if not ret:
         raise Exception("No qasm file")
@@ -83,35 +117,155 @@ def run_benchmark(args, qubit):
     return True
 
 
-def verify_result(ret, name, qasm):
+def is_duplicate(digest, seen, qasm, labels, telemetry):
+    """
+    Check the structural hash of a circuit against the circuits already run
+    and record it
     """
-    Check simulation results
+    if seen is None:
+        return False
+    telemetry.inc("cache_requests_total", help_text="Cache lookups by cache and result.",
+                  cache="circuits", result="hit" if digest in seen else "miss", **labels)
+    if digest in seen:
+        print(labels["suite"] + "," + labels["backend"] + "," + str(labels["n"]) + "," +
+              str(labels["depth"]) + ",duplicate of " + seen[digest], flush=True)
+        telemetry.flush()
+        return True
+    seen[digest] = os.path.basename(qasm)
+    return False
+
+
+def run_engine(args, qasm, qubit, depth, telemetry, seen=None):
     """
+    Run simulation of a qasm file with an engine of the openqasm package
+    """
+    # The columnar module loads NumPy: only import it to run a circuit.
+    from openqasm.columnar import DEFAULT_BASIS
+    from openqasm.unroller import Unroller
+
+    labels = {"suite": args.name, "backend": args.backend, "n": qubit, "depth": depth}
+    options = {"seed": int(args.seed) if args.seed else None}
+    if args.max_bond:
+        options["max_bond"] = int(args.max_bond)
+    if args.processes:
+        options["processes"] = int(args.processes)
+    engine = get_engine(args.backend, **options)
+    with telemetry.phase("parse", **labels):
+        program = parse_file(qasm)
+    with telemetry.phase("unroll", **labels):
+        unroller = Unroller(program.gates, DEFAULT_BASIS)
+        circuit = unroller.unroll(program)
+    record_circuit(telemetry, labels, circuit, unroller)
+    digest = None
+    if seen is not None or args.verify or args.save_ref:
+        # The structural hash unrolls to DEFAULT_BASIS as well.
+        digest = structural_hash(circuit)
+    if is_duplicate(digest, seen, qasm, labels, telemetry):
+        return True
+
+    start = time.time()
+    with telemetry.phase("simulate", **labels):
+        ret = engine.run(circuit, shots=1)
+    elapsed = time.time() - start
+    telemetry.inc("runs_total", help_text="Benchmark runs by status.", status="done", **labels)
+    telemetry.flush()
+
+    line = args.name + "," + args.backend + "," + str(qubit) + \
+        "," + str(depth) + "," + str(elapsed)
+    for key in sorted(ret.metadata):
+        line += "," + key + "=" + str(ret.metadata[key])
+    if args.layout is not None:
+        line += run_layout(args, engine, circuit, elapsed, telemetry, labels)
+    print(line, flush=True)
+
+    if args.verify:
+        with telemetry.phase("verify", **labels):
+            verify_result(ret.get_counts(), args.name, qasm, digest)
+    if args.save_ref:
+        save_result(ret.get_counts(), args.name, digest)
+
+    return ret
+
+
+def run_layout(args, engine, circuit, elapsed, telemetry, labels):
+    """
+    Run the circuit again on the positions of openqasm.layout and return the
+    CSV fields comparing both runs
+    """
+    from openqasm.layout import CHUNK_BITS, relayout, remote_cost
 
-    if not os.path.exists(name + "/ref"):
-        raise Exception("Verification not support for " + name)
+    with telemetry.phase("layout", **labels):
+        moved = relayout(circuit, args.layout or None)[0]
+    start = time.time()
+    with telemetry.phase("simulate_layout", **labels):
+        engine.run(moved, shots=1)
+    layout_elapsed = time.time() - start
 
-    ref_file_name = name + "/ref/" + os.path.basename(qasm)+".ref"
-    if not os.path.exists(ref_file_name):
-        raise Exception("Reference file not exist: " + ref_file_name)
+    positions = range(circuit.num_qubits)
+    before = remote_cost(circuit.instructions, positions, circuit.num_qubits, CHUNK_BITS)
+    after = remote_cost(moved.instructions, positions, circuit.num_qubits, CHUNK_BITS)
+    return ",layout_seconds=%s,layout_speedup=%.3f,remote_weight=%d->%d" % (
+        layout_elapsed, elapsed / layout_elapsed if layout_elapsed else 0.0, before, after)
 
-    ref_file = open(ref_file_name)
-    ref_data = ref_file.read()
-    ref_file.close()
-    ref_data = json.loads(ref_data)
-    sim_result = ret.get_counts(name)
 
-    sim_result_keys = sim_result.keys()
+def record_circuit(telemetry, labels, circuit, unroller):
+    """
+    Record the size of an unrolled circuit and the unroller cache use
+    """
+    gates = sum(1 for instruction in circuit.instructions
+                if instruction.name not in NON_GATES)
+    telemetry.inc("gates_total", gates, "Gates processed.", **labels)
+    telemetry.set("qubits", circuit.num_qubits, "Width of the last circuit run.", **labels)
+    requests = unroller.hits + unroller.misses
+    telemetry.inc("cache_requests_total", unroller.hits, "Cache lookups by cache and result.",
+                  cache="templates", result="hit", **labels)
+    telemetry.inc("cache_requests_total", unroller.misses, "Cache lookups by cache and result.",
+                  cache="templates", result="miss", **labels)
+    if requests:
+        telemetry.set("cache_hit_ratio", unroller.hits / float(requests),
+                      "Hit ratio of the last lookups.", cache="templates", **labels)
+
+
+def verify_result(sim_result, name, qasm, digest):
+    """
+    Check simulation results against the outcomes in the qasm header or a
+    reference run
+    """
+    # The outcomes module loads NumPy: only import it to check results.
+    from openqasm.outcomes import load_reference, read_outcomes, verify_counts
+
+    outcomes = read_outcomes(qasm)
+    reference = None
+    if outcomes is None:
+        ref_file_name = reference_path(name, digest)
+        if not os.path.exists(ref_file_name):
+            raise Exception("Verification not support for " + qasm +
+                            ": no outcomes in the header and no " + ref_file_name)
+        reference = load_reference(ref_file_name)
+
+    problem = verify_counts(sim_result, outcomes, reference)
+    if problem:
+        raise Exception(os.path.basename(qasm) + ": " + problem)
 
-    for key in sim_result_keys:
-        if key not in ref_data:
-            raise Exception(key + " not exist in " + ref_file_name)
-        ref_count = ref_data[key]
-        count = sim_result[key]
 
-        if ref_count != count:
-            raise Exception(" Count is differ: " + str(count) +
-                            " and " + str(ref_count))
+def reference_path(name, digest):
+    """
+    Path of the packed reference counts of a circuit, named after its
+    structural hash so that duplicate circuits share their reference
+    """
+    return os.path.join(name, "ref", digest + ".ref.npz")
+
+
+def save_result(sim_result, name, digest):
+    """
+    Save simulation results as the reference of a circuit
+    """
+    from openqasm.outcomes import save_reference
+
+    path = reference_path(name, digest)
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    save_reference(path, sim_result)
 
 
 def print_qasm_sum(dir_name):
@@ -189,8 +343,24 @@ def parse_args():
                         help='the initial seed (int)')
     parser.add_argument('-v', '--verify', action='store_true',
                         help='verify simulation results')
+    parser.add_argument('--save-ref', action='store_true',
+                        help='save the results as references for -v')
+    parser.add_argument('--skip-duplicates', action='store_true',
+                        help='run only the first of the files with the same circuit')
+    parser.add_argument('--layout', nargs='?', default=None, const=0, type=int,
+                        help='also time the circuit on the qubit positions of '
+                        'openqasm.layout, re-planned every LAYOUT layers if given')
     parser.add_argument('-l', '--list', action='store_true',
                         help='show qasm file')
+    parser.add_argument('-mb', '--max-bond', default=None,
+                        help='maximum bond dimension of local_mps_simulator')
+    parser.add_argument('-np', '--processes', default=None,
+                        help='worker processes of local_sharedmem_simulator')
+    parser.add_argument('--prom-file', default=None,
+                        help='write metrics to this Prometheus textfile')
+    parser.add_argument('--otlp', nargs='?', default=None, const=OTLP_ENDPOINT,
+                        help='post metrics as OTLP/HTTP JSON (default endpoint: ' +
+                        OTLP_ENDPOINT + ')')
 
     return parser.parse_args()
 
@@ -208,8 +378,16 @@ def _main():
     if not end_qubit:
         end_qubit = start_qubit
 
+    exporters = []
+    if args.prom_file:
+        exporters.append(PrometheusTextfile(args.prom_file))
+    if args.otlp:
+        exporters.append(OTLPExporter(args.otlp))
+    telemetry = Telemetry(exporters)
+
+    seen = {} if args.skip_duplicates else None
     for qubit in range(int(args.start), end_qubit + 1):
-        if not run_benchmark(args, qubit):
+        if not run_benchmark(args, qubit, telemetry, seen):
             break
 
 
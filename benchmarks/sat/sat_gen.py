@@ -0,0 +1,328 @@
+"""
+Generate Grover's search circuits for SAT problems in DIMACS CNF format.
+
+Convert CNF files:
+  python sat_gen.py problem1.cnf problem2.cnf -o outdir
+
+Generate 1000 random 3-SAT instances with 6 variables and 8 clauses on 8
+processes, keeping their CNF files:
+  python sat_gen.py -v 6 -c 8 -l 3 -b 1000 -j 8 --cnf
+
+Each circuit is written to
+sat_n<qubits>_vars=<V>_clauses=<C>_clauselen=<L>_<md5 of the CNF>.qasm,
+where <qubits> counts every qubit but the oracle qubit, as in the files
+shipped with the suite.
+
+Register layout: v[0] is the oracle qubit and v[1..V] hold the variables,
+c holds one qubit per distinct clause and a holds the ancillas shared by
+every multi-controlled Toffoli; the variables are measured into m.
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import random
+import sys
+from multiprocessing import Pool
+
+if sys.version_info < (3, 5):
+    raise Exception("Please use Python 3.5 or later")
+
+
+def read_dimacs(stream):
+    """Read a DIMACS CNF file line by line.
+
+    Args:
+        stream (file): CNF text.
+
+    Returns:
+        tuple(int, list(tuple(int))): number of variables and clauses, each
+        clause a tuple of non-zero literals (negative for negated variables).
+    """
+    num_vars = None
+    clauses = []
+    clause = []
+    for line in stream:
+        line = line.strip()
+        if not line or line[0] == "c":
+            continue
+        if line[0] == "%":
+            break
+        if line[0] == "p":
+            fields = line.split()
+            if len(fields) != 4 or fields[1] != "cnf":
+                raise ValueError("bad problem line: " + line)
+            num_vars = int(fields[2])
+            continue
+        for field in line.split():
+            literal = int(field)
+            if literal:
+                clause.append(literal)
+            else:
+                clauses.append(tuple(clause))
+                clause = []
+    if clause:
+        clauses.append(tuple(clause))
+    if num_vars is None:
+        num_vars = max([abs(literal) for each in clauses for literal in each] or [0])
+    return num_vars, clauses
+
+
+def dimacs_text(num_vars, clauses):
+    """Return the DIMACS text of a CNF."""
+    lines = ["p cnf %d %d" % (num_vars, len(clauses))]
+    for clause in clauses:
+        lines.append(" ".join(str(literal) for literal in clause) + " 0")
+    return "\n".join(lines) + "\n"
+
+
+def random_cnf(num_vars, num_clauses, clause_len, rng):
+    """Return ``num_clauses`` random clauses of ``clause_len`` literals.
+
+    The variables of a clause are distinct, and each is negated with
+    probability 1/2. There is no guarantee that the CNF is satisfiable.
+    """
+    clauses = []
+    for _ in range(num_clauses):
+        variables = rng.sample(range(1, num_vars + 1), clause_len)
+        clauses.append(tuple(var if rng.random() < 0.5 else -var for var in variables))
+    return clauses
+
+
+def normalize(clauses):
+    """Return the distinct, non-trivial clauses of a CNF.
+
+    Repeated literals are merged and clauses containing a variable and its
+    negation are dropped since they always hold. Clauses with the same
+    literals share one clause qubit.
+    """
+    distinct = []
+    seen = set()
+    for clause in clauses:
+        literals = tuple(sorted(set(clause), key=abs))
+        variables = set(abs(literal) for literal in literals)
+        if len(variables) < len(literals) or literals in seen:
+            continue
+        if not literals:
+            raise ValueError("empty clause: the CNF is unsatisfiable")
+        seen.add(literals)
+        distinct.append(literals)
+    return distinct
+
+
+class GroverWriter(object):
+    """Write a Grover's search circuit for a CNF, statement by statement.
+
+    Args:
+        out (file): where the OpenQASM text goes.
+        num_vars (int): number of variables.
+        clauses (list(tuple(int))): clauses as returned by ``normalize``.
+    """
+
+    def __init__(self, out, num_vars, clauses):
+        self.out = out
+        self.num_vars = num_vars
+        self.clauses = clauses
+        self.flipped = set()
+        widest = max([len(clause) for clause in clauses] + [len(clauses), num_vars - 1])
+        self.num_ancillas = max(0, widest - 2)
+
+    @property
+    def num_qubits(self):
+        """Total number of qubits."""
+        return self.num_vars + 1 + len(self.clauses) + self.num_ancillas
+
+    def line(self, text):
+        """Write one line."""
+        self.out.write(text + "\n")
+
+    def mcx(self, controls, target):
+        """Write a multi-controlled X as a ladder of Toffolis over the ancillas."""
+        if not controls:
+            self.line("x %s;" % target)
+        elif len(controls) == 1:
+            self.line("cx %s, %s;" % (controls[0], target))
+        elif len(controls) == 2:
+            self.line("ccx %s, %s, %s;" % (controls[0], controls[1], target))
+        else:
+            ladder = ["ccx %s, %s, a[0];" % (controls[0], controls[1])]
+            for index, control in enumerate(controls[2:-1]):
+                ladder.append("ccx %s, a[%d], a[%d];" % (control, index, index + 1))
+            for text in ladder:
+                self.line(text)
+            self.line("ccx %s, a[%d], %s;" % (controls[-1], len(controls) - 3, target))
+            for text in reversed(ladder):
+                self.line(text)
+
+    def flip(self, variables):
+        """Leave exactly ``variables`` negated, toggling only the difference."""
+        for var in sorted(self.flipped.symmetric_difference(variables)):
+            self.line("x v[%d];" % var)
+        self.flipped = set(variables)
+
+    def clause(self, index):
+        """Toggle ``c[index]`` when every literal of the clause is false."""
+        clause = self.clauses[index]
+        self.flip([literal for literal in clause if literal > 0])
+        self.mcx(["v[%d]" % abs(literal) for literal in clause], "c[%d]" % index)
+
+    def oracle(self):
+        """Flip the phase of the assignments satisfying every clause."""
+        for index in range(len(self.clauses)):
+            self.clause(index)
+        if self.clauses:
+            self.mcx(["c[%d]" % index for index in range(len(self.clauses))], "v[0]")
+        for index in reversed(range(len(self.clauses))):
+            self.clause(index)
+        self.flip([])
+
+    def diffusion(self):
+        """Reflect the variables about their uniform superposition."""
+        variables = ["v[%d]" % var for var in range(1, self.num_vars + 1)]
+        for gate in ("h", "x"):
+            for var in variables:
+                self.line("%s %s;" % (gate, var))
+        if len(variables) == 1:
+            self.line("z %s;" % variables[0])
+        else:
+            self.line("h %s;" % variables[-1])
+            self.mcx(variables[:-1], variables[-1])
+            self.line("h %s;" % variables[-1])
+        for gate in ("x", "h"):
+            for var in variables:
+                self.line("%s %s;" % (gate, var))
+
+    def write(self, iterations=1, comments=()):
+        """Write the whole circuit with ``iterations`` Grover iterations."""
+        self.line("// Quantum code for the specified SAT problem.")
+        for text in comments:
+            self.line("// " + text)
+        self.line("")
+        self.line('include "qelib1.inc";')
+        self.line("")
+        self.line("// Declare all needed (qu)bits")
+        self.line("qreg v[%d];" % (self.num_vars + 1))
+        if self.clauses:
+            self.line("qreg c[%d];" % len(self.clauses))
+        if self.num_ancillas:
+            self.line("qreg a[%d];" % self.num_ancillas)
+        self.line("creg m[%d];" % self.num_vars)
+        self.line("")
+        self.line("// Prepare uniform superposition")
+        self.line("x v[0];")
+        self.line("h v[0];")
+        for var in range(1, self.num_vars + 1):
+            self.line("h v[%d];" % var)
+        if self.clauses:
+            self.line("")
+            self.line("// Clause qubits start true")
+            for index in range(len(self.clauses)):
+                self.line("x c[%d];" % index)
+        for _ in range(iterations):
+            self.line("")
+            self.line("// Marking with oracle evaluation")
+            self.oracle()
+            self.line("")
+            self.line("// Amplitude amplification")
+            self.diffusion()
+        self.line("")
+        self.line("// Measurements")
+        for var in range(1, self.num_vars + 1):
+            self.line("measure v[%d] -> m[%d];" % (var, var - 1))
+
+
+def default_iterations(num_vars):
+    """Return the Grover iterations for one solution among 2**num_vars."""
+    return max(1, int(math.floor(math.pi / 4 * math.sqrt(2 ** num_vars))))
+
+
+def write_instance(num_vars, clauses, outdir=".", iterations=1, save_cnf=False):
+    """Write the circuit (and optionally the CNF) of an instance.
+
+    Returns:
+        str: path of the QASM file.
+    """
+    text = dimacs_text(num_vars, clauses)
+    digest = hashlib.md5(text.encode()).hexdigest()
+    distinct = normalize(clauses)
+    clause_len = max([len(clause) for clause in clauses] or [0])
+    writer_probe = GroverWriter(None, num_vars, distinct)
+    stem = "sat_n%d_vars=%d_clauses=%d_clauselen=%d_%s" % (
+        writer_probe.num_qubits - 1, num_vars, len(clauses), clause_len, digest)
+    path = os.path.join(outdir, stem + ".qasm")
+    with open(path, "w") as out:
+        comments = ["CNF with %d variables and %d clauses, md5 %s."
+                    % (num_vars, len(clauses), digest)]
+        GroverWriter(out, num_vars, distinct).write(iterations, comments)
+    if save_cnf:
+        with open(os.path.join(outdir, stem + ".cnf"), "w") as out:
+            out.write(text)
+    return path
+
+
+def convert(job):
+    """Worker: convert one CNF file."""
+    cnf_path, outdir, iterations = job
+    with open(cnf_path) as stream:
+        num_vars, clauses = read_dimacs(stream)
+    if iterations == 0:
+        iterations = default_iterations(num_vars)
+    return write_instance(num_vars, clauses, outdir, iterations)
+
+
+def generate(job):
+    """Worker: generate one random instance from its own seed."""
+    seed, num_vars, num_clauses, clause_len, outdir, iterations, save_cnf = job
+    rng = random.Random(seed)
+    clauses = random_cnf(num_vars, num_clauses, clause_len, rng)
+    if iterations == 0:
+        iterations = default_iterations(num_vars)
+    return write_instance(num_vars, clauses, outdir, iterations, save_cnf)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate qasm of Grover's search for SAT problems.")
+    parser.add_argument("cnf", nargs="*", help="DIMACS CNF files to convert")
+    parser.add_argument("-v", "--vars", type=int, default=3,
+                        help="number of variables of random instances")
+    parser.add_argument("-c", "--clauses", type=int, default=3,
+                        help="number of clauses of random instances")
+    parser.add_argument("-l", "--clauselen", type=int, default=3,
+                        help="number of literals per clause of random instances")
+    parser.add_argument("-b", "--batch", type=int, default=1,
+                        help="number of random instances")
+    parser.add_argument("-i", "--iterations", type=int, default=1,
+                        help="Grover iterations (0: optimal for one solution)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of processes")
+    parser.add_argument("-s", "--seed", type=int, default=0,
+                        help="seed of the first random instance")
+    parser.add_argument("-o", "--outdir", default=".", help="output directory")
+    parser.add_argument("--cnf", dest="save_cnf", action="store_true",
+                        help="also write the CNF of random instances")
+    args = parser.parse_args()
+
+    if args.clauselen > args.vars:
+        parser.error("clause length is larger than the number of variables")
+    if args.cnf:
+        jobs = [(path, args.outdir, args.iterations) for path in args.cnf]
+        worker = convert
+    else:
+        jobs = [(args.seed + index, args.vars, args.clauses, args.clauselen,
+                 args.outdir, args.iterations, args.save_cnf)
+                for index in range(args.batch)]
+        worker = generate
+
+    if args.jobs > 1:
+        with Pool(args.jobs) as pool:
+            for path in pool.imap_unordered(worker, jobs, chunksize=16):
+                print(path)
+    else:
+        for job in jobs:
+            print(worker(job))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""OpenQASM 2.0 tools: parser, flat circuits and circuit passes.
+
+The passes live in their own modules (``openqasm.unroller`` and so on), each
+of which can also be run as a script with ``python -m``.
+"""
+
+from .exceptions import QasmError
+from .parser import Program, parse, parse_file
+from .circuit import Circuit, Instruction
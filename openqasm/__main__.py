@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Command line entry point: ``python -m openqasm <command>``.
+
+Commands:
+
+* ``list [folder ...]``: count the benchmark files by qubits and depth.
+* ``validate path ...``: parse files (or folders) and report the errors.
+* ``stats file ...``: width, depth and gate counts of unrolled circuits.
+* ``generate bv|cc|qft -n QUBITS``: write a benchmark circuit.
+
+None of them loads NumPy or a simulator, so each starts in tens of
+milliseconds.
+"""
+
+import argparse
+import os
+import random
+import sys
+
+from .corpus import benchmark_summary, find_files, statistics
+from .exceptions import QasmError
+from .parser import parse_file
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks")
+
+
+def list_command(args):
+    """Print the benchmark files by qubits and depth."""
+    folders = args.folders
+    if not folders:
+        folders = sorted(os.path.join(BENCHMARKS, name) for name in os.listdir(BENCHMARKS)
+                         if os.path.isdir(os.path.join(BENCHMARKS, name)))
+    for folder in folders:
+        summary = benchmark_summary(folder)
+        if not summary:
+            continue
+        print("Application : " + os.path.basename(os.path.normpath(folder)))
+        for qubits, depth, count in summary:
+            line = "qubit : %d" % qubits
+            if depth is not None:
+                line += " \t  depth : %d" % depth
+            print(line + " \t  file : %d" % count)
+    return 0
+
+
+def validate_command(args):
+    """Parse every file and print the errors."""
+    files = find_files(args.paths, (".qasm", ".inc"))
+    errors = 0
+    for path in files:
+        try:
+            parse_file(path, args.include_path)
+        except (QasmError, OSError) as err:
+            errors += 1
+            print("Error: " + str(err))
+        else:
+            if args.verbose:
+                print("ok " + path)
+    print("%d files, %d errors" % (len(files), errors))
+    return 1 if errors else 0
+
+
+def stats_command(args):
+    """Print figures of unrolled circuits."""
+    # The unroller compiles gate parameters; only load it when needed.
+    from .unroller import unroll
+
+    status = 0
+    for path in args.files:
+        try:
+            program = parse_file(path)
+        except QasmError as err:
+            print("Error: " + str(err))
+            status = 1
+            continue
+        figures = statistics(unroll(program, list(program.gates)))
+        counts = figures.pop("counts")
+        print(path)
+        for key in ("qubits", "clbits", "instructions", "gates", "two_qubit_gates", "depth"):
+            print("  %s: %d" % (key, figures[key]))
+        print("  counts: " + ", ".join("%s=%d" % item for item in sorted(counts.items())))
+    return status
+
+
+def generate_command(args):
+    """Write a generated benchmark circuit."""
+    from . import generators
+
+    rng = random.Random(args.seed)
+    qubits = args.qubits
+    if args.circuit == "bv":
+        hidden = args.hidden or "".join(rng.choice("01") for _ in range(qubits - 1))
+        comments = ["Bernstein-Vazirani with %d qubits." % qubits,
+                    "Hidden string is " + hidden,
+                    generators.outcomes_comment(
+                        generators.bernstein_vazirani_outcomes(qubits, hidden))]
+        circuit = generators.bernstein_vazirani(qubits, hidden)
+    elif args.circuit == "cc":
+        false_index = args.false if args.false is not None else rng.randint(0, qubits - 2)
+        comments = ["Counterfeit coin finding with %d coins." % (qubits - 1),
+                    "The false coin is %d" % false_index,
+                    generators.outcomes_comment(
+                        generators.counterfeit_coin_outcomes(qubits - 1, false_index))]
+        circuit = generators.counterfeit_coin(qubits - 1, false_index)
+    else:
+        comments = []
+        circuit = generators.qft(qubits)
+    text = "".join("//" + comment + "\n" for comment in comments) + circuit.qasm()
+    if args.output is None:
+        sys.stdout.write(text)
+    else:
+        with open(args.output, "w") as output:
+            output.write(text)
+    return 0
+
+
+def main(argv=None):
+    """Run one command of the openqasm tools."""
+    parser = argparse.ArgumentParser(
+        prog="python -m openqasm", description="Lightweight OpenQASM tools.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    command = commands.add_parser("list", help="count the benchmark files")
+    command.add_argument("folders", nargs="*", help="benchmark folders (default: all)")
+    command.set_defaults(function=list_command)
+
+    command = commands.add_parser("validate", help="check OpenQASM files")
+    command.add_argument("paths", nargs="+", help="files or folders")
+    command.add_argument("-I", "--include-path", action="append", default=[],
+                         help="extra directory searched for include files")
+    command.add_argument("-v", "--verbose", action="store_true", help="list valid files too")
+    command.set_defaults(function=validate_command)
+
+    command = commands.add_parser("stats", help="print circuit figures")
+    command.add_argument("files", nargs="+", help="OpenQASM files")
+    command.set_defaults(function=stats_command)
+
+    command = commands.add_parser("generate", help="write a benchmark circuit")
+    command.add_argument("circuit", choices=["bv", "cc", "qft"], help="benchmark")
+    command.add_argument("-n", "--qubits", type=int, required=True, help="number of qubits")
+    command.add_argument("-s", "--seed", type=int, default=0, help="random seed")
+    command.add_argument("--hidden", default=None, help="hidden string of bv")
+    command.add_argument("--false", type=int, default=None, help="false coin of cc")
+    command.add_argument("-o", "--output", default=None, help="output file")
+    command.set_defaults(function=generate_command)
+
+    args = parser.parse_args(argv)
+    return args.function(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Canonical form and structural hash of circuits.
+
+Two files get the same structural hash when they describe the same circuit
+up to
+
+* formatting, comments and the spelling of gates (files are unrolled to
+  ``u1``, ``u2``, ``u3`` and ``cx`` first, so ``cz`` and its expansion match,
+  and ``U`` and ``CX`` count as ``u3`` and ``cx``);
+* register names (registers are kept in order, by size only);
+* float spelling (parameters are rounded to ``DIGITS`` decimals, so ``pi/2``
+  and ``1.570796326794897`` match);
+* the order of instructions on disjoint bits.
+
+The last point comes from hashing the ASAP layers of the circuit as
+multisets: swapping two adjacent instructions that share no qubit or
+classical bit changes no layer, and the order within a layer is forgotten by
+summing the hashes of its instructions. ``StructuralHasher`` takes the
+instructions one at a time and keeps one sum per layer, so the hash is
+computed in a single streaming pass with memory proportional to the depth.
+
+``canonical_circuit`` writes the corresponding canonical form: registers
+renamed ``q0``, ``q1``... and ``c0``, ``c1``..., instructions sorted by layer
+and then by their text. Equal hashes mean equal canonical forms up to hash
+collisions.
+
+Example run:
+  python -m openqasm.canonical benchmarks
+  python -m openqasm.canonical benchmarks/quantum_volume --collapse
+"""
+
+import argparse
+import hashlib
+import os
+import struct
+import sys
+
+from .circuit import DEFAULT_BASIS, Circuit
+from .corpus import LevelTracker, find_files
+from .exceptions import QasmError
+from .unroller import unroll_file
+
+# Basis the files are unrolled to before hashing: the default one, so that
+# circuits unrolled to run can be hashed as they are.
+CANONICAL_BASIS = DEFAULT_BASIS
+# Decimals kept of the parameters.
+DIGITS = 10
+# The primitives kept by the unroller and their qelib1.inc names.
+ALIASES = {"U": "u3", "CX": "cx"}
+
+_MASK = (1 << 64) - 1
+
+
+def _number(value):
+    """Return the canonical text of a parameter."""
+    value = round(float(value), DIGITS) + 0.0
+    return repr(value)
+
+
+def instruction_text(instruction, creg_index):
+    """Return the canonical text of an instruction.
+
+    Args:
+        instruction (Instruction): the instruction.
+        creg_index (dict): position of each classical register.
+    """
+    text = ALIASES.get(instruction.name, instruction.name)
+    if instruction.params:
+        text += "(" + ",".join(_number(value) for value in instruction.params) + ")"
+    text += " " + ",".join(str(qubit) for qubit in instruction.qubits)
+    if instruction.clbits:
+        text += " -> " + ",".join(str(clbit) for clbit in instruction.clbits)
+    if instruction.condition is not None:
+        text += " if %d==%d" % (creg_index[instruction.condition[0]],
+                                instruction.condition[1])
+    return text
+
+
+def _digest(text):
+    return struct.unpack("<Q", hashlib.blake2b(text.encode(), digest_size=8).digest())[0]
+
+
+class StructuralHasher(object):
+    """Structural hash of a circuit fed one instruction at a time.
+
+    Args:
+        qregs (list): ``(name, size)`` of the quantum registers.
+        cregs (list): ``(name, size)`` of the classical registers.
+    """
+
+    def __init__(self, qregs, cregs):
+        qregs, cregs = list(qregs), list(cregs)
+        self.qregs = [size for _, size in qregs]
+        self.cregs = [size for _, size in cregs]
+        self.creg_index = dict((name, index) for index, (name, _) in enumerate(cregs))
+        self.levels = LevelTracker(qregs, cregs)
+        # Sum of the instruction hashes of each slot: slot 2*k holds layer k
+        # and slot 2*k+1 the barriers right after it.
+        self.slots = []
+
+    def slot(self, instruction):
+        """Return the slot of an instruction, updating the bit levels."""
+        level = self.levels.level(instruction)
+        return 2 * level + 1 if instruction.name == "barrier" else 2 * (level - 1)
+
+    def update(self, instruction):
+        """Add one instruction."""
+        slot = self.slot(instruction)
+        if slot >= len(self.slots):
+            self.slots.extend([0] * (slot + 1 - len(self.slots)))
+        self.slots[slot] = (self.slots[slot] +
+                            _digest(instruction_text(instruction, self.creg_index))) & _MASK
+
+    def hexdigest(self):
+        """Return the hash of the instructions added so far."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(("qregs %s cregs %s\n" % (self.qregs, self.cregs)).encode())
+        for total in self.slots:
+            digest.update(struct.pack("<Q", total))
+        return digest.hexdigest()
+
+
+def structural_hash(circuit):
+    """Return the structural hash of a flat circuit."""
+    hasher = StructuralHasher(circuit.qregs.items(), circuit.cregs.items())
+    for instruction in circuit.instructions:
+        hasher.update(instruction)
+    return hasher.hexdigest()
+
+
+def file_hash(path):
+    """Return the structural hash of an OpenQASM file."""
+    return structural_hash(unroll_file(path, CANONICAL_BASIS))
+
+
+def canonical_circuit(circuit):
+    """Return the canonical form of a flat circuit."""
+    qregs = [("q%d" % index, size) for index, size in enumerate(circuit.qregs.values())]
+    cregs = [("c%d" % index, size) for index, size in enumerate(circuit.cregs.values())]
+    hasher = StructuralHasher(circuit.qregs.items(), circuit.cregs.items())
+    keyed = []
+    for instruction in circuit.instructions:
+        condition = instruction.condition
+        if condition is not None:
+            condition = ("c%d" % hasher.creg_index[condition[0]], condition[1])
+        params = tuple(round(float(value), DIGITS) + 0.0 for value in instruction.params)
+        keyed.append((hasher.slot(instruction), instruction_text(instruction,
+                                                                 hasher.creg_index),
+                      instruction._replace(name=ALIASES.get(instruction.name, instruction.name),
+                                           params=params, condition=condition)))
+    keyed.sort(key=lambda item: item[:2])
+    return Circuit(qregs, cregs, [item[2] for item in keyed])
+
+
+def find_duplicates(paths):
+    """Group files by structural hash.
+
+    Returns:
+        tuple(list, dict): ``(hash, files)`` of the groups of two files or
+        more, each sorted, and the error message of each file that could not
+        be read.
+    """
+    groups = {}
+    errors = {}
+    for path in find_files(paths):
+        try:
+            groups.setdefault(file_hash(path), []).append(path)
+        except QasmError as err:
+            errors[path] = str(err)
+    duplicates = sorted((sorted(group), digest) for digest, group in groups.items()
+                        if len(group) > 1)
+    return [(digest, group) for group, digest in duplicates], errors
+
+
+def main(argv=None):
+    """Report (and optionally remove) the duplicate circuits of a corpus."""
+    parser = argparse.ArgumentParser(
+        description="Find OpenQASM files describing the same circuit.")
+    parser.add_argument("paths", nargs="*", default=["benchmarks"],
+                        help="files or directories (default: benchmarks)")
+    parser.add_argument("--hash", action="store_true",
+                        help="print the structural hash of every file")
+    parser.add_argument("--canonical", action="store_true",
+                        help="print the canonical form of the given file")
+    parser.add_argument("--collapse", action="store_true",
+                        help="delete every duplicate but the first of its group")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.canonical:
+            for path in args.paths:
+                sys.stdout.write(canonical_circuit(unroll_file(path, CANONICAL_BASIS)).qasm())
+            return 0
+        if args.hash:
+            for path in find_files(args.paths):
+                print("%s  %s" % (file_hash(path), path))
+            return 0
+    except QasmError as err:
+        print("Error: " + str(err), file=sys.stderr)
+        return 1
+
+    duplicates, errors = find_duplicates(args.paths)
+    for path in sorted(errors):
+        print("Error: " + errors[path], file=sys.stderr)
+    for digest, group in duplicates:
+        print("%s  %s" % (digest, group[0]))
+        for path in group[1:]:
+            print("  duplicate %s" % path)
+            if args.collapse:
+                os.remove(path)
+    removed = sum(len(group) - 1 for _, group in duplicates)
+    print("%d duplicate files in %d groups%s" % (
+        removed, len(duplicates), ", removed" if args.collapse and removed else ""))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Flat circuits: a register layout and a list of instructions.
+
+Unlike a ``Program``, a ``Circuit`` has no gate definitions to look through
+and no register broadcasting: every instruction names the global indices of
+the bits it acts on. Qubits are numbered register after register in
+declaration order, and the same goes for classical bits.
+"""
+
+from collections import Counter, OrderedDict, namedtuple
+
+from .nodes import format_real
+
+# Operations with a meaning of their own in OpenQASM; all the others are gates.
+NON_GATES = frozenset(["measure", "reset", "barrier"])
+# Gates that do not need any include file.
+BUILTIN_GATES = frozenset(["U", "CX"])
+# Gates declared in qelib1.inc.
+QELIB_GATES = frozenset(["u3", "u2", "u1", "cx", "id", "x", "y", "z", "h", "s", "sdg",
+                         "t", "tdg", "rx", "ry", "rz", "cz", "cy", "ch", "ccx", "crz",
+                         "cu1", "cu3"])
+# The basis of the IBM Q devices, used by default.
+DEFAULT_BASIS = ("u1", "u2", "u3", "cx", "id")
+
+
+class Instruction(namedtuple("Instruction", ["name", "params", "qubits", "clbits",
+                                             "condition"])):
+    """One operation of a ``Circuit``.
+
+    Attributes:
+        name (str): gate name, or ``measure``, ``reset`` or ``barrier``.
+        params (tuple(float)): gate parameters.
+        qubits (tuple(int)): global qubit indices.
+        clbits (tuple(int)): global classical bit indices (``measure`` only).
+        condition (tuple): ``(creg, value)`` of an ``if``, or None.
+    """
+    __slots__ = ()
+
+
+class Circuit(object):
+    """A register layout plus a flat list of ``Instruction``.
+
+    Args:
+        qregs (list): ``(name, size)`` pairs of the quantum registers.
+        cregs (list): ``(name, size)`` pairs of the classical registers.
+        instructions (list(Instruction)): the operations, in program order.
+        gates (dict): ``GateDeclaration`` of the user gates the instructions
+            may use, in declaration order. Gates in ``qelib1.inc`` need not be
+            given.
+    """
+
+    def __init__(self, qregs=(), cregs=(), instructions=(), gates=None):
+        self.qregs = OrderedDict(qregs)
+        self.cregs = OrderedDict(cregs)
+        self.instructions = list(instructions)
+        self.gates = dict(gates or {})
+        self._qubit_labels = None
+        self._clbit_labels = None
+
+    @property
+    def num_qubits(self):
+        """Total number of qubits."""
+        return sum(self.qregs.values())
+
+    @property
+    def num_clbits(self):
+        """Total number of classical bits."""
+        return sum(self.cregs.values())
+
+    def __len__(self):
+        return len(self.instructions)
+
+    def __iter__(self):
+        return iter(self.instructions)
+
+    @staticmethod
+    def _offsets(registers):
+        offsets = OrderedDict()
+        total = 0
+        for name, size in registers.items():
+            offsets[name] = total
+            total += size
+        return offsets
+
+    def qubit_offsets(self):
+        """Return the global index of the first qubit of each register."""
+        return self._offsets(self.qregs)
+
+    def clbit_offsets(self):
+        """Return the global index of the first bit of each classical register."""
+        return self._offsets(self.cregs)
+
+    @staticmethod
+    def _labels(registers):
+        return ["%s[%d]" % (name, index)
+                for name, size in registers.items() for index in range(size)]
+
+    def qubit_label(self, qubit):
+        """Return the ``reg[index]`` text of a global qubit index."""
+        if self._qubit_labels is None:
+            self._qubit_labels = self._labels(self.qregs)
+        return self._qubit_labels[qubit]
+
+    def clbit_label(self, clbit):
+        """Return the ``reg[index]`` text of a global classical bit index."""
+        if self._clbit_labels is None:
+            self._clbit_labels = self._labels(self.cregs)
+        return self._clbit_labels[clbit]
+
+    def append(self, name, qubits, params=(), clbits=(), condition=None):
+        """Append an instruction and return it."""
+        instruction = Instruction(name, tuple(params), tuple(qubits), tuple(clbits),
+                                  condition)
+        self.instructions.append(instruction)
+        return instruction
+
+    def copy(self, instructions=None):
+        """Return a circuit with the same layout and, optionally, other instructions."""
+        if instructions is None:
+            instructions = self.instructions
+        return Circuit(self.qregs.items(), self.cregs.items(), instructions, self.gates)
+
+    def count_ops(self):
+        """Return a ``Counter`` of the instruction names."""
+        return Counter(instruction.name for instruction in self.instructions)
+
+    def instruction_qasm(self, instruction, prec=15):
+        """Return the OpenQASM statement of one instruction."""
+        name = instruction.name
+        if name == "measure":
+            text = "measure %s -> %s;" % (self.qubit_label(instruction.qubits[0]),
+                                          self.clbit_label(instruction.clbits[0]))
+        else:
+            text = name
+            if instruction.params:
+                text += "(" + ",".join(format_real(param, prec)
+                                       for param in instruction.params) + ")"
+            text += " " + ",".join(self.qubit_label(qubit)
+                                   for qubit in instruction.qubits) + ";"
+        if instruction.condition is not None:
+            text = "if(%s==%d) " % instruction.condition + text
+        return text
+
+    def _used_gates(self):
+        """Return the gates used by the instructions and by their definitions."""
+        pending = set(instruction.name for instruction in self.instructions)
+        pending -= NON_GATES | BUILTIN_GATES
+        used = set()
+        while pending:
+            name = pending.pop()
+            used.add(name)
+            gate = self.gates.get(name)
+            if name not in QELIB_GATES and gate is not None and not gate.opaque:
+                pending.update(statement.name for statement in gate.body
+                               if statement.name not in used)
+            pending -= NON_GATES | BUILTIN_GATES
+        return used
+
+    def qasm(self, prec=15):
+        """Return the circuit as an OpenQASM 2.0 program.
+
+        ``qelib1.inc`` is included when an instruction needs it, and the
+        declarations of the remaining user gates are written out.
+        """
+        lines = ["OPENQASM 2.0;"]
+        used = self._used_gates()
+        if used & QELIB_GATES:
+            lines.append('include "qelib1.inc";')
+        for name, gate in self.gates.items():
+            if name in used and name not in QELIB_GATES:
+                lines.append(gate.qasm(prec))
+        for name, size in self.qregs.items():
+            lines.append("qreg %s[%d];" % (name, size))
+        for name, size in self.cregs.items():
+            lines.append("creg %s[%d];" % (name, size))
+        lines.extend(self.instruction_qasm(instruction, prec)
+                     for instruction in self.instructions)
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Columnar circuits: one NumPy array per instruction field.
+
+A ``ColumnarCircuit`` keeps the instructions of a flat circuit as parallel
+arrays (opcode, qubits, classical bit, condition and a float64 parameter
+matrix) instead of one Python object per gate, so that engines and analysis
+passes can work on whole circuits with array operations.
+
+``load`` builds the arrays straight from an OpenQASM file: every gate call is
+unrolled through the templates of ``openqasm.unroller``, and all the calls of
+one gate are bound and scattered into the arrays at once.
+
+Example run:
+  python -m openqasm.columnar benchmarks/quantum_volume/quantum_volume_n40_d40.qasm
+"""
+
+import argparse
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .circuit import DEFAULT_BASIS, Circuit, Instruction
+from .exceptions import QasmError
+from .nodes import Barrier, GateDeclaration, Measure, Operation, Register, Reset
+from .parser import parse_file
+from .unroller import Unroller, argument_bits, broadcast
+
+# Opcodes shared by every columnar circuit. Other gate names get the next
+# free opcodes, in order of appearance.
+STANDARD_NAMES = ("U", "CX", "measure", "reset", "barrier",
+                  "u1", "u2", "u3", "cx", "id")
+U, CX, MEASURE, RESET, BARRIER, U1, U2, U3, CNOT, ID = range(len(STANDARD_NAMES))
+
+NO_BIT = -1
+
+
+class ColumnarCircuit(object):
+    """A flat circuit stored as parallel arrays.
+
+    Row ``i`` of every array describes instruction ``i``.
+
+    Attributes:
+        qregs (OrderedDict): quantum register sizes by name.
+        cregs (OrderedDict): classical register sizes by name.
+        names (list(str)): instruction name of each opcode.
+        widths (list(int)): number of parameters of each opcode.
+        opcode (numpy.ndarray): int16 index into ``names``.
+        qubit0 (numpy.ndarray): int32 first qubit, -1 for barriers.
+        qubit1 (numpy.ndarray): int32 second qubit, -1 if there is none.
+        clbit (numpy.ndarray): int32 classical bit of measurements, else -1.
+        cond_reg (numpy.ndarray): int16 index into ``cregs`` of the ``if``
+            condition, -1 for unconditioned instructions.
+        cond_val (numpy.ndarray): int64 value compared in the condition.
+        params (numpy.ndarray): float64 matrix, one row per instruction;
+            unused columns are zero.
+        barriers (dict): global qubits (int32 array) of each barrier row.
+    """
+
+    def __init__(self, qregs, cregs, names, widths, opcode, qubit0, qubit1, clbit,
+                 cond_reg, cond_val, params, barriers=None):
+        self.qregs = OrderedDict(qregs)
+        self.cregs = OrderedDict(cregs)
+        self.names = list(names)
+        self.widths = list(widths)
+        self.opcode = np.asarray(opcode, dtype=np.int16)
+        self.qubit0 = np.asarray(qubit0, dtype=np.int32)
+        self.qubit1 = np.asarray(qubit1, dtype=np.int32)
+        self.clbit = np.asarray(clbit, dtype=np.int32)
+        self.cond_reg = np.asarray(cond_reg, dtype=np.int16)
+        self.cond_val = np.asarray(cond_val, dtype=np.int64)
+        self.params = np.asarray(params, dtype=np.float64).reshape(len(self.opcode), -1)
+        self.barriers = dict(barriers or {})
+
+    def __len__(self):
+        return len(self.opcode)
+
+    @property
+    def num_qubits(self):
+        """Total number of qubits."""
+        return sum(self.qregs.values())
+
+    @property
+    def num_clbits(self):
+        """Total number of classical bits."""
+        return sum(self.cregs.values())
+
+    def code(self, name):
+        """Return the opcode of an instruction name, or -1 if it is not used."""
+        try:
+            return self.names.index(name)
+        except ValueError:
+            return -1
+
+    def gate_counts(self):
+        """Return the number of instructions of each name that occurs."""
+        counts = np.bincount(self.opcode, minlength=len(self.names))
+        return OrderedDict((self.names[code], int(count))
+                           for code, count in enumerate(counts) if count)
+
+    def is_two_qubit(self):
+        """Return the mask of the rows acting on two qubits."""
+        return self.qubit1 >= 0
+
+    def is_gate(self):
+        """Return the mask of the rows which are unitary gates."""
+        return ~np.isin(self.opcode, (MEASURE, RESET, BARRIER))
+
+    def qubit_counts(self):
+        """Return the number of instructions acting on each qubit.
+
+        Barriers are not counted.
+        """
+        return np.bincount(np.concatenate((self.qubit0[self.qubit0 >= 0],
+                                           self.qubit1[self.qubit1 >= 0])),
+                           minlength=self.num_qubits)
+
+    def filter(self, rows):
+        """Return a circuit with only the given rows.
+
+        Args:
+            rows (numpy.ndarray): boolean mask or row indices, in the order
+                the instructions are to be kept.
+        """
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        barriers = {}
+        if self.barriers:
+            for new_row in np.flatnonzero(self.opcode[rows] == BARRIER):
+                barriers[int(new_row)] = self.barriers[int(rows[new_row])]
+        return ColumnarCircuit(self.qregs, self.cregs, self.names, self.widths,
+                               self.opcode[rows],
+                               self.qubit0[rows], self.qubit1[rows], self.clbit[rows],
+                               self.cond_reg[rows], self.cond_val[rows], self.params[rows],
+                               barriers)
+
+    def select(self, names):
+        """Return a circuit with only the instructions called one of ``names``."""
+        codes = [self.code(name) for name in names]
+        return self.filter(np.isin(self.opcode, codes))
+
+    def on_qubit(self, qubit):
+        """Return a circuit with the instructions touching ``qubit``."""
+        mask = (self.qubit0 == qubit) | (self.qubit1 == qubit)
+        for row, qubits in self.barriers.items():
+            mask[row] = qubit in qubits
+        return self.filter(mask)
+
+    def to_circuit(self):
+        """Return the equivalent ``Circuit``."""
+        creg_names = list(self.cregs)
+        widths = self.widths
+        instructions = []
+        append = instructions.append
+        rows = zip(self.opcode.tolist(), self.qubit0.tolist(), self.qubit1.tolist(),
+                   self.clbit.tolist(), self.cond_reg.tolist(), self.cond_val.tolist(),
+                   self.params.tolist())
+        for row, (code, qubit0, qubit1, clbit, cond_reg, cond_val, params) in enumerate(rows):
+            if code == BARRIER:
+                qubits = tuple(self.barriers[row].tolist())
+            elif qubit1 >= 0:
+                qubits = (qubit0, qubit1)
+            else:
+                qubits = (qubit0,)
+            condition = None
+            if cond_reg >= 0:
+                condition = (creg_names[cond_reg], cond_val)
+            append(Instruction(self.names[code], tuple(params[:widths[code]]), qubits,
+                               (clbit,) if clbit >= 0 else (), condition))
+        return Circuit(self.qregs.items(), self.cregs.items(), instructions)
+
+    def save(self, path):
+        """Write the arrays to a NumPy ``.npz`` file."""
+        rows = sorted(self.barriers)
+        offsets = np.cumsum([0] + [len(self.barriers[row]) for row in rows])
+        qubits = np.concatenate([self.barriers[row] for row in rows]) if rows else []
+        np.savez(path, qreg_names=list(self.qregs), qreg_sizes=list(self.qregs.values()),
+                 creg_names=list(self.cregs), creg_sizes=list(self.cregs.values()),
+                 names=self.names, widths=self.widths, opcode=self.opcode, qubit0=self.qubit0,
+                 qubit1=self.qubit1, clbit=self.clbit, cond_reg=self.cond_reg,
+                 cond_val=self.cond_val, params=self.params,
+                 barrier_rows=np.asarray(rows, dtype=np.int64),
+                 barrier_offsets=offsets,
+                 barrier_qubits=np.asarray(qubits, dtype=np.int32))
+
+    @classmethod
+    def load_npz(cls, path):
+        """Read a circuit written by ``save``."""
+        with np.load(path) as data:
+            offsets = data["barrier_offsets"]
+            barriers = dict((int(row), data["barrier_qubits"][offsets[i]:offsets[i + 1]])
+                            for i, row in enumerate(data["barrier_rows"]))
+            return cls(zip(data["qreg_names"].tolist(), data["qreg_sizes"].tolist()),
+                       zip(data["creg_names"].tolist(), data["creg_sizes"].tolist()),
+                       data["names"].tolist(), data["widths"].tolist(), data["opcode"], data["qubit0"],
+                       data["qubit1"], data["clbit"], data["cond_reg"], data["cond_val"],
+                       data["params"], barriers)
+
+
+# Number of parameters of the standard instructions.
+STANDARD_WIDTHS = (3, 0, 0, 0, 0, 1, 2, 3, 0, 0)
+
+
+class _Builder(object):
+    """Collects the rows of a columnar circuit before the arrays exist.
+
+    Gate calls expanded through a template are grouped by template and written
+    with array operations in ``build``; other instructions are kept as
+    ``Instruction`` objects with their row number.
+    """
+
+    def __init__(self, qregs, cregs):
+        self.qregs = qregs
+        self.cregs = cregs
+        self.names = list(STANDARD_NAMES)
+        self.widths = list(STANDARD_WIDTHS)
+        self.codes = dict((name, code) for code, name in enumerate(self.names))
+        self.creg_index = dict((name, index) for index, name in enumerate(cregs))
+        self.num_rows = 0
+        self.width = 3
+        # template name -> [template, starts, qubits, values, cond_reg, cond_val]
+        self.groups = OrderedDict()
+        self.single = []
+
+    def code(self, name, width):
+        """Return the opcode of ``name``, adding it with ``width`` parameters if needed."""
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+            self.widths.append(width)
+        return code
+
+    def add_template(self, template, qubits, values, condition):
+        """Add one application of a gate."""
+        group = self.groups.get(template.name)
+        if group is None:
+            group = self.groups[template.name] = [template, [], [], [], [], []]
+            for name, params, _ in template.ops:
+                self.code(name, len(params))
+                self.width = max(self.width, len(params))
+        group[1].append(self.num_rows)
+        group[2].append(qubits)
+        group[3].append(values)
+        if condition is None:
+            group[4].append(NO_BIT)
+            group[5].append(0)
+        else:
+            group[4].append(self.creg_index[condition[0]])
+            group[5].append(condition[1])
+        self.num_rows += len(template.ops)
+
+    def add(self, instruction):
+        """Add one instruction."""
+        self.code(instruction.name, len(instruction.params))
+        self.width = max(self.width, len(instruction.params))
+        self.single.append((self.num_rows, instruction))
+        self.num_rows += 1
+
+    def build(self):
+        """Return the ``ColumnarCircuit``."""
+        size = self.num_rows
+        opcode = np.empty(size, dtype=np.int16)
+        qubit0 = np.empty(size, dtype=np.int32)
+        qubit1 = np.empty(size, dtype=np.int32)
+        clbit = np.full(size, NO_BIT, dtype=np.int32)
+        cond_reg = np.empty(size, dtype=np.int16)
+        cond_val = np.empty(size, dtype=np.int64)
+        params = np.zeros((size, self.width))
+        for template, starts, qubits, values, regs, vals in self.groups.values():
+            length = len(template.ops)
+            rows = (np.asarray(starts)[:, None] + np.arange(length)).ravel()
+            count = len(starts)
+            opcode[rows] = np.tile([self.codes[name] for name, _, _ in template.ops], count)
+            # An extra column of -1 stands for the missing second qubit.
+            qubits = np.hstack((np.asarray(qubits, dtype=np.int32).reshape(count, -1),
+                                np.full((count, 1), NO_BIT, dtype=np.int32)))
+            missing = qubits.shape[1] - 1
+            first = [positions[0] for _, _, positions in template.ops]
+            second = [positions[1] if len(positions) > 1 else missing
+                      for _, _, positions in template.ops]
+            qubit0[rows] = qubits[:, first].ravel()
+            qubit1[rows] = qubits[:, second].ravel()
+            cond_reg[rows] = np.repeat(regs, length)
+            cond_val[rows] = np.repeat(vals, length)
+            if template.params:
+                flat = template.bind(values)
+            else:
+                flat = np.tile(np.asarray(template.function(), dtype=float), (count, 1))
+            # Index of each parameter in the flat table, the extra last column
+            # being zero for the unused ones.
+            flat = np.hstack((flat.reshape(count, -1), np.zeros((count, 1))))
+            index = np.full((length, self.width), flat.shape[1] - 1, dtype=np.intp)
+            column = 0
+            for position, (_, op_params, _) in enumerate(template.ops):
+                index[position, :len(op_params)] = np.arange(column, column + len(op_params))
+                column += len(op_params)
+            params[rows] = flat[:, index].reshape(count * length, self.width)
+        barriers = {}
+        creg_index = self.creg_index
+        for row, instruction in self.single:
+            opcode[row] = self.codes[instruction.name]
+            qubits = instruction.qubits
+            if instruction.name == "barrier":
+                qubit0[row] = qubit1[row] = NO_BIT
+                barriers[row] = np.asarray(qubits, dtype=np.int32)
+            else:
+                qubit0[row] = qubits[0]
+                qubit1[row] = qubits[1] if len(qubits) > 1 else NO_BIT
+            if instruction.clbits:
+                clbit[row] = instruction.clbits[0]
+            if instruction.condition is None:
+                cond_reg[row] = NO_BIT
+                cond_val[row] = 0
+            else:
+                cond_reg[row] = creg_index[instruction.condition[0]]
+                cond_val[row] = instruction.condition[1]
+            params[row, :len(instruction.params)] = instruction.params
+        return ColumnarCircuit(self.qregs.items(), self.cregs.items(), self.names, self.widths,
+                               opcode, qubit0, qubit1, clbit, cond_reg, cond_val, params, barriers)
+
+
+def _check_width(name, qubits):
+    if len(qubits) > 2:
+        raise QasmError("columnar circuits hold gates on at most two qubits, "
+                        "'%s' acts on %d" % (name, len(qubits)))
+
+
+def from_circuit(circuit):
+    """Return the ``ColumnarCircuit`` of a ``Circuit``."""
+    builder = _Builder(circuit.qregs, circuit.cregs)
+    for instruction in circuit.instructions:
+        if instruction.name != "barrier":
+            _check_width(instruction.name, instruction.qubits)
+        builder.add(instruction)
+    return builder.build()
+
+
+def from_program(program, basis=DEFAULT_BASIS):
+    """Return the ``ColumnarCircuit`` of a parsed program unrolled to ``basis``."""
+    unroller = Unroller(program.gates, basis)
+    circuit = Circuit(program.qregs.items(), program.cregs.items())
+    qubit_offsets = circuit.qubit_offsets()
+    clbit_offsets = circuit.clbit_offsets()
+    builder = _Builder(program.qregs, program.cregs)
+    vectorized = {}
+    for statement in program.statements:
+        if isinstance(statement, (Register, GateDeclaration)):
+            continue
+        if isinstance(statement, Operation):
+            template = unroller.template(statement.name)
+            if template.name not in vectorized:
+                for name, _, positions in template.ops:
+                    if name != "barrier":
+                        _check_width(name, positions)
+                vectorized[template.name] = all(name != "barrier"
+                                                for name, _, _ in template.ops)
+            values = [param.evaluate() for param in statement.params]
+            for qubits in broadcast(statement.args, program.qregs, qubit_offsets):
+                if vectorized[template.name]:
+                    builder.add_template(template, qubits, values, statement.condition)
+                else:
+                    for instruction in template.instantiate(values, qubits,
+                                                            statement.condition):
+                        builder.add(instruction)
+        elif isinstance(statement, Measure):
+            qubits = argument_bits(statement.qubit, program.qregs, qubit_offsets)
+            clbits = argument_bits(statement.clbit, program.cregs, clbit_offsets)
+            for qubit, clbit in zip(qubits, clbits):
+                builder.add(Instruction("measure", (), (qubit,), (clbit,),
+                                        statement.condition))
+        elif isinstance(statement, Reset):
+            for qubit in argument_bits(statement.qubit, program.qregs, qubit_offsets):
+                builder.add(Instruction("reset", (), (qubit,), (), statement.condition))
+        elif isinstance(statement, Barrier):
+            qubits = []
+            for arg in statement.args:
+                qubits.extend(argument_bits(arg, program.qregs, qubit_offsets))
+            builder.add(Instruction("barrier", (), tuple(qubits), (), None))
+    return builder.build()
+
+
+def load(path, basis=DEFAULT_BASIS):
+    """Parse an OpenQASM file into a ``ColumnarCircuit`` unrolled to ``basis``."""
+    return from_program(parse_file(path), basis)
+
+
+def main(argv=None):
+    """Load OpenQASM files into columnar circuits and print their statistics."""
+    parser = argparse.ArgumentParser(
+        description="Load OpenQASM files as columnar circuits and show gate counts.")
+    parser.add_argument("qasm", nargs="+", help="OpenQASM files")
+    parser.add_argument("-b", "--basis", default=",".join(DEFAULT_BASIS),
+                        help="comma separated gates to keep")
+    parser.add_argument("-o", "--output", default=None,
+                        help="save the arrays to this .npz file (one input only)")
+    args = parser.parse_args(argv)
+
+    if args.output and len(args.qasm) > 1:
+        parser.error("--output needs a single input file")
+    basis = [name for name in args.basis.split(",") if name]
+    for path in args.qasm:
+        start = time.time()
+        try:
+            circuit = load(path, basis)
+        except QasmError as err:
+            print("Error: " + str(err), file=sys.stderr)
+            return 1
+        elapsed = time.time() - start
+        counts = ", ".join("%s: %d" % item for item in circuit.gate_counts().items())
+        print("%s,%d,%d,%.4f,%s" % (path, circuit.num_qubits, len(circuit), elapsed, counts))
+        if args.output:
+            circuit.save(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
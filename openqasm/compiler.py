@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Compilation of parameter expressions into Python functions.
+
+Gate parameters are small expression trees. Rather than walking the trees for
+every gate application, ``compile_expressions`` folds the constant parts and
+turns what is left into the source of one Python function, compiled once and
+cached by its text. With ``vectorized=True`` the same function runs on NumPy
+arrays, which binds the parameters of many applications of a gate at once.
+"""
+
+import math
+
+from .nodes import BinaryOp, Function, Negate, Parameter
+
+# Compiled functions by (source, vectorized).
+_CACHE = {}
+
+# Longest chain of operations written as one Python expression. Python's own
+# compiler recurses on each of them, so longer chains are cut into
+# temporaries.
+_MAX_CHAIN = 500
+
+_MATH_NAMESPACE = {
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "exp": math.exp,
+    "ln": math.log,
+    "sqrt": math.sqrt,
+}
+
+
+def _numpy_namespace():
+    import numpy
+    return {
+        "sin": numpy.sin,
+        "cos": numpy.cos,
+        "tan": numpy.tan,
+        "exp": numpy.exp,
+        "ln": numpy.log,
+        "sqrt": numpy.sqrt,
+    }
+
+
+def function_source(expressions, params):
+    """Return the Python source of the function computing ``expressions``.
+
+    The function is called ``_compiled``, takes one positional argument per
+    name in ``params`` and returns a tuple with one value per expression.
+    """
+    names = dict((name, "_p%d" % index) for index, name in enumerate(params))
+    lines = []
+    values = [_cut_chains(expression.fold(), names, lines).pycode(names)
+              for expression in expressions]
+    body = ", ".join(values) + ("," if len(values) == 1 else "")
+    return "def _compiled(%s):\n%s    return (%s)\n" % (
+        ", ".join(names[name] for name in params),
+        "".join("    %s\n" % line for line in lines), body)
+
+
+def _cut_chains(expression, names, lines):
+    """Return ``expression`` with its long chains of operations cut.
+
+    Every ``_MAX_CHAIN`` operations, the chain computed so far is assigned to
+    a temporary: the assignment is appended to ``lines`` and the temporary,
+    added to ``names``, stands for it in the rest of the chain.
+    """
+    if isinstance(expression, Negate):
+        return Negate(_cut_chains(expression.operand, names, lines))
+    if isinstance(expression, Function):
+        return Function(expression.name, _cut_chains(expression.argument, names, lines))
+    if not isinstance(expression, BinaryOp):
+        return expression
+    chain = expression.chain()
+    result = _cut_chains(chain[-1].left, names, lines)
+    for count, node in enumerate(reversed(chain), 1):
+        result = BinaryOp(node.operator, result, _cut_chains(node.right, names, lines))
+        if count % _MAX_CHAIN == 0 and node is not expression:
+            # Parameter names cannot start with an underscore.
+            temporary = "_t%d" % len(lines)
+            names[temporary] = temporary
+            lines.append("%s = %s" % (temporary, result.pycode(names)))
+            result = Parameter(temporary)
+    return result
+
+
+def compile_expressions(expressions, params, vectorized=False):
+    """Return a function from parameter values to the values of ``expressions``.
+
+    Args:
+        expressions (list(Expression)): expressions over ``params``.
+        params (list(str)): parameter names, in the order of the arguments.
+        vectorized (bool): use NumPy functions, so that the arguments can be
+            arrays. Constant expressions then come back as plain floats.
+    """
+    source = function_source(expressions, params)
+    key = (source, vectorized)
+    function = _CACHE.get(key)
+    if function is None:
+        namespace = _numpy_namespace() if vectorized else dict(_MATH_NAMESPACE)
+        exec(compile(source, "<qasm expressions>", "exec"), namespace)  # pylint: disable=exec-used
+        function = namespace["_compiled"]
+        _CACHE[key] = function
+    return function
+
+
+def evaluate_batch(expressions, params, values):
+    """Evaluate ``expressions`` for many parameter bindings at once.
+
+    Args:
+        expressions (list(Expression)): expressions over ``params``.
+        params (list(str)): parameter names.
+        values (array): one row of parameter values per binding.
+
+    Returns:
+        numpy.ndarray: one row per binding and one column per expression.
+    """
+    import numpy
+    values = numpy.asarray(values, dtype=float).reshape(-1, len(params))
+    result = numpy.empty((values.shape[0], len(expressions)))
+    if expressions:
+        function = compile_expressions(expressions, params, vectorized=True)
+        for column, value in enumerate(function(*values.T)):
+            result[:, column] = value
+    return result
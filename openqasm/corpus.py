@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Corpus tools: finding, summarizing and measuring OpenQASM files.
+
+Everything here is pure Python, so listing or checking thousands of files
+does not pay for loading a simulator.
+"""
+
+import os
+import re
+from collections import Counter
+
+from .circuit import NON_GATES
+
+_QUBITS_RE = re.compile(r"_n([0-9]+)")
+_DEPTH_RE = re.compile(r"n[0-9]+_d([0-9]+)")
+
+
+def find_files(paths, extensions=(".qasm",)):
+    """Return the files under ``paths`` (files or directories), sorted."""
+    found = []
+    for path in paths:
+        if os.path.isfile(path):
+            found.append(path)
+            continue
+        for directory, _, names in os.walk(path):
+            found.extend(os.path.join(directory, name) for name in names
+                         if name.endswith(tuple(extensions)))
+    return sorted(found)
+
+
+def benchmark_summary(directory):
+    """Count the files of a benchmark folder by qubits and depth.
+
+    File names carry the width as ``_n<qubits>`` and, for some benchmarks,
+    the depth as ``_d<depth>`` right after it.
+
+    Returns:
+        list(tuple): ``(qubits, depth, count)`` sorted, depth being None
+        when the names have none.
+    """
+    counts = Counter()
+    for name in os.listdir(directory):
+        if not name.endswith(".qasm"):
+            continue
+        match = _QUBITS_RE.search(name)
+        if not match:
+            continue
+        depth = _DEPTH_RE.search(name)
+        counts[(int(match.group(1)), int(depth.group(1)) if depth else None)] += 1
+    return sorted((qubits, depth, count) for (qubits, depth), count in counts.items())
+
+
+class LevelTracker(object):
+    """ASAP layers of the instructions of a flat circuit, fed in order.
+
+    An instruction waits for the previous instructions on its qubits. With a
+    condition, it also waits for the measurements into the condition
+    register, but not for the other instructions reading it. A measurement
+    waits for the previous measurements into its bit and for the previous
+    conditions on its register. Barriers add no layer but align their
+    qubits: nothing after a barrier starts before the latest of them.
+
+    This is the one ASAP pass of the package: ``openqasm.schedule`` feeds it
+    the rows of columnar circuits.
+
+    Args:
+        qregs (list): ``(name, size)`` of the quantum registers.
+        cregs (list): ``(name, size)`` of the classical registers.
+    """
+
+    def __init__(self, qregs, cregs):
+        self.creg_index = {}
+        self.creg_of_clbit = []
+        for index, (name, size) in enumerate(cregs):
+            self.creg_index[name] = index
+            self.creg_of_clbit.extend([index] * size)
+        # First layer where each qubit is free, where each classical bit and
+        # register holds its last measurement, and after the last reading of
+        # each register by a condition.
+        self.qubit_ready = [0] * sum(size for _, size in qregs)
+        self.clbit_written = [0] * len(self.creg_of_clbit)
+        self.written = [0] * len(self.creg_index)
+        self.read = [0] * len(self.creg_index)
+
+    def place(self, qubits, clbit=-1, creg=-1, barrier=False):
+        """Return the layer of the next instruction, from 0, and occupy it.
+
+        For a barrier, this is the first layer after it.
+
+        Args:
+            qubits (list(int)): qubits of the instruction.
+            clbit (int): bit a measurement writes, or -1.
+            creg (int): index of the register of the condition, or -1.
+            barrier (bool): whether the instruction is a barrier.
+        """
+        qubit_ready = self.qubit_ready
+        start = 0
+        for qubit in qubits:
+            if qubit_ready[qubit] > start:
+                start = qubit_ready[qubit]
+        if barrier:
+            for qubit in qubits:
+                qubit_ready[qubit] = start
+            return start
+        if creg >= 0 and self.written[creg] > start:
+            start = self.written[creg]
+        if clbit >= 0:
+            target = self.creg_of_clbit[clbit]
+            start = max(start, self.clbit_written[clbit], self.read[target])
+            self.clbit_written[clbit] = start + 1
+            if self.written[target] < start + 1:
+                self.written[target] = start + 1
+        if creg >= 0 and self.read[creg] < start + 1:
+            self.read[creg] = start + 1
+        for qubit in qubits:
+            qubit_ready[qubit] = start + 1
+        return start
+
+    def level(self, instruction):
+        """Return the layer of the next instruction, from 1.
+
+        A barrier gets the layer of the latest instruction before it.
+        """
+        condition = instruction.condition
+        start = self.place(instruction.qubits,
+                           instruction.clbits[0] if instruction.clbits else -1,
+                           self.creg_index[condition[0]] if condition is not None else -1,
+                           instruction.name == "barrier")
+        return start if instruction.name == "barrier" else start + 1
+
+
+def asap_levels(circuit):
+    """Return the ASAP layer of each instruction of a flat circuit, from 1.
+
+    See ``LevelTracker`` for the rules.
+    """
+    tracker = LevelTracker(circuit.qregs.items(), circuit.cregs.items())
+    return [tracker.level(instruction) for instruction in circuit.instructions]
+
+
+def depth(circuit):
+    """Return the depth of a flat circuit, with the rules of ``asap_levels``."""
+    return max(asap_levels(circuit) + [0])
+
+
+def statistics(circuit):
+    """Return a dict of figures of a flat circuit."""
+    counts = circuit.count_ops()
+    return {
+        "qubits": circuit.num_qubits,
+        "clbits": circuit.num_clbits,
+        "instructions": len(circuit),
+        "gates": sum(count for name, count in counts.items() if name not in NON_GATES),
+        "two_qubit_gates": sum(1 for instruction in circuit.instructions
+                               if instruction.name not in NON_GATES and
+                               len(instruction.qubits) >= 2),
+        "depth": depth(circuit),
+        "counts": dict(counts),
+    }
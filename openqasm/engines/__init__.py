@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Reference simulation engines.
+
+Engines take a flat ``Circuit`` and return a ``Result`` with the counts of
+the classical registers, keyed like QISKit does: registers in reverse order
+of declaration separated by spaces, each written from its highest bit down.
+
+``get_engine`` imports the engine modules only when they are asked for.
+"""
+
+import importlib
+
+from ..exceptions import QasmError
+
+# Engine class of each backend name, as (module, class).
+ENGINES = {
+    "local_mps_simulator": ("openqasm.engines.mps", "MPSEngine"),
+    "local_sharedmem_simulator": ("openqasm.engines.sharedmem", "SharedMemoryEngine"),
+}
+
+
+class Result(object):
+    """Outcome of an engine run.
+
+    Attributes:
+        counts (dict): number of shots giving each classical outcome.
+        metadata (dict): engine specific figures, e.g. truncation errors.
+    """
+
+    def __init__(self, counts, metadata=None):
+        self.counts = counts
+        self.metadata = dict(metadata or {})
+
+    def get_counts(self):
+        """Return the counts."""
+        return self.counts
+
+
+def get_engine(name, **options):
+    """Return an instance of the engine called ``name``.
+
+    Raises:
+        ValueError: if there is no such engine.
+    """
+    if name not in ENGINES:
+        raise ValueError("unknown engine '%s', expected one of %s"
+                         % (name, ", ".join(sorted(ENGINES))))
+    module_name, class_name = ENGINES[name]
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)(**options)
+
+
+def counts_key(clbits, cregs):
+    """Return the counts key of the classical bit values ``clbits``.
+
+    Args:
+        clbits (list(int)): value of each classical bit, by global index.
+        cregs (OrderedDict): classical register sizes by name.
+    """
+    parts = []
+    offset = 0
+    for size in cregs.values():
+        parts.append("".join(str(clbits[offset + index]) for index in range(size - 1, -1, -1)))
+        offset += size
+    return " ".join(reversed(parts))
+
+
+def register_value(clbits, cregs, name):
+    """Return the integer value of register ``name``, as an ``if`` compares it."""
+    offset = 0
+    for creg, size in cregs.items():
+        if creg == name:
+            value = 0
+            for index in range(size - 1, -1, -1):
+                value = (value << 1) | clbits[offset + index]
+            return value
+        offset += size
+    raise QasmError("condition on unknown classical register '%s'" % name)
+
+
+def is_terminal(instructions):
+    """Return True if the measurements come last and nothing is classical.
+
+    The final distribution can then be sampled once for all the shots.
+    """
+    measured = False
+    for instruction in instructions:
+        if instruction.condition is not None or instruction.name == "reset":
+            return False
+        if instruction.name == "measure":
+            measured = True
+        elif measured and instruction.name != "barrier":
+            return False
+    return True
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Matrix-product-state engine.
+
+The state of ``n`` qubits is a chain of ``n`` tensors of shape
+``(left bond, 2, right bond)`` kept in mixed canonical form. Two-qubit gates
+are applied to neighbouring sites and split again with an SVD that keeps at
+most ``max_bond`` singular values; gates on distant qubits first bring them
+together with SWAPs, and the qubits stay where they were moved. Memory is
+thus bounded by ``n * max_bond**2`` amplitudes, which fits QFT, BV, CC and
+shallow quantum volume circuits of 40 or more qubits.
+
+Each truncation that drops a relative weight ``eps`` of the state turns it
+into one with fidelity ``1 - eps`` to the untruncated state. The result
+reports the product of those fidelities as an estimate, and a lower bound
+from summing the angles ``arccos(sqrt(1 - eps))``; the total variation
+distance between the sampled and exact distributions is at most
+``sqrt(1 - lower bound)``.
+
+Example run:
+  python -m openqasm.engines.mps benchmarks/qft/qft_n20.qasm -s 1000 --max-bond 32
+"""
+
+import argparse
+import math
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from ..columnar import DEFAULT_BASIS
+from ..exceptions import QasmError
+from ..gates import SINGLE_QUBIT_GATES, single_qubit_matrix
+from ..unroller import unroll_file
+from . import Result, counts_key, is_terminal, register_value
+
+CX_MATRIX = np.array([[1, 0, 0, 0],
+                      [0, 1, 0, 0],
+                      [0, 0, 0, 1],
+                      [0, 0, 1, 0]], dtype=complex)
+# The same gate with the control on the second site.
+CX_REVERSED = np.array([[1, 0, 0, 0],
+                        [0, 0, 0, 1],
+                        [0, 0, 1, 0],
+                        [0, 1, 0, 0]], dtype=complex)
+SWAP_MATRIX = np.array([[1, 0, 0, 0],
+                        [0, 0, 1, 0],
+                        [0, 1, 0, 0],
+                        [0, 0, 0, 1]], dtype=complex)
+
+
+class MPS(object):
+    """A matrix product state in mixed canonical form.
+
+    Args:
+        num_qubits (int): number of qubits, all starting in ``|0>``.
+        max_bond (int): largest bond dimension kept by the SVDs.
+        cutoff (float): singular values whose squared weight is below this
+            are dropped whatever the bond dimension.
+
+    Attributes:
+        tensors (list): site tensors of shape ``(left, 2, right)``.
+        qubit_at (list): qubit held by each site.
+        site_of (list): site holding each qubit.
+        center (int): the site all others are canonical towards.
+        discarded (list(float)): weight dropped by each lossy truncation.
+    """
+
+    def __init__(self, num_qubits, max_bond=64, cutoff=1e-14):
+        self.max_bond = max_bond
+        self.cutoff = cutoff
+        zero = np.zeros((1, 2, 1), dtype=complex)
+        zero[0, 0, 0] = 1
+        self.tensors = [zero.copy() for _ in range(num_qubits)]
+        self.qubit_at = list(range(num_qubits))
+        self.site_of = list(range(num_qubits))
+        self.center = 0
+        self.discarded = []
+
+    def copy(self):
+        """Return an independent copy of the state."""
+        other = MPS.__new__(MPS)
+        other.max_bond = self.max_bond
+        other.cutoff = self.cutoff
+        other.tensors = [tensor.copy() for tensor in self.tensors]
+        other.qubit_at = list(self.qubit_at)
+        other.site_of = list(self.site_of)
+        other.center = self.center
+        other.discarded = list(self.discarded)
+        return other
+
+    @property
+    def num_qubits(self):
+        """Number of qubits."""
+        return len(self.tensors)
+
+    def bond_dimensions(self):
+        """Return the dimension of each bond between neighbouring sites."""
+        return [tensor.shape[2] for tensor in self.tensors[:-1]]
+
+    def move_center(self, site):
+        """Make every site other than ``site`` canonical with QR steps."""
+        tensors = self.tensors
+        while self.center < site:
+            index = self.center
+            left, _, right = tensors[index].shape
+            q_factor, r_factor = np.linalg.qr(tensors[index].reshape(left * 2, right))
+            tensors[index] = q_factor.reshape(left, 2, -1)
+            tensors[index + 1] = np.tensordot(r_factor, tensors[index + 1], axes=(1, 0))
+            self.center += 1
+        while self.center > site:
+            index = self.center
+            left, _, right = tensors[index].shape
+            q_factor, r_factor = np.linalg.qr(tensors[index].reshape(left, 2 * right).T)
+            tensors[index] = q_factor.T.reshape(-1, 2, right)
+            tensors[index - 1] = np.tensordot(tensors[index - 1], r_factor.T, axes=(2, 0))
+            self.center -= 1
+
+    def apply_single(self, matrix, qubit):
+        """Apply a 2x2 unitary to ``qubit``."""
+        site = self.site_of[qubit]
+        self.tensors[site] = np.einsum("ab,lbr->lar", matrix, self.tensors[site])
+
+    def _apply_sites(self, matrix, site):
+        """Apply a 4x4 unitary to sites ``site`` and ``site + 1`` and split them."""
+        self.move_center(site)
+        first, second = self.tensors[site], self.tensors[site + 1]
+        left, right = first.shape[0], second.shape[2]
+        theta = np.tensordot(first, second, axes=(2, 0))
+        theta = np.einsum("abij,lijr->labr", matrix.reshape(2, 2, 2, 2), theta)
+        u_factor, singular, v_factor = np.linalg.svd(theta.reshape(left * 2, 2 * right),
+                                                     full_matrices=False)
+        weights = singular ** 2
+        total = weights.sum()
+        keep = int(np.count_nonzero(weights > self.cutoff * total))
+        keep = max(1, min(keep, self.max_bond))
+        dropped = weights[keep:].sum() / total
+        if keep < len(singular) and dropped > self.cutoff:
+            self.discarded.append(float(dropped))
+        singular = singular[:keep] / math.sqrt(weights[:keep].sum())
+        self.tensors[site] = u_factor[:, :keep].reshape(left, 2, keep)
+        self.tensors[site + 1] = (singular[:, None] * v_factor[:keep]).reshape(keep, 2, right)
+        self.center = site + 1
+
+    def swap_sites(self, site):
+        """Exchange the qubits at ``site`` and ``site + 1``."""
+        self._apply_sites(SWAP_MATRIX, site)
+        first, second = self.qubit_at[site], self.qubit_at[site + 1]
+        self.qubit_at[site], self.qubit_at[site + 1] = second, first
+        self.site_of[first], self.site_of[second] = site + 1, site
+
+    def apply_two(self, matrix, first, second):
+        """Apply a 4x4 unitary to two qubits.
+
+        ``matrix`` is indexed by ``2 * bit(first) + bit(second)``.
+        """
+        site_first, site_second = self.site_of[first], self.site_of[second]
+        if site_first > site_second:
+            matrix = SWAP_MATRIX.dot(matrix).dot(SWAP_MATRIX)
+            first, second = second, first
+            site_first, site_second = site_second, site_first
+        # Move the second qubit left, one site at a time, until it is next to
+        # the first one, which keeps its site. The sweep runs right to left
+        # wherever the canonical center is: the first swap moves the center
+        # to site_second - 1 and every later one moves it back two sites.
+        for site in range(site_second - 1, site_first, -1):
+            self.swap_sites(site)
+        self._apply_sites(matrix, site_first)
+
+    def apply_cx(self, control, target):
+        """Apply a CNOT."""
+        if self.site_of[control] < self.site_of[target]:
+            self.apply_two(CX_MATRIX, control, target)
+        else:
+            self.apply_two(CX_REVERSED, target, control)
+
+    def probability_one(self, qubit):
+        """Return the probability of measuring ``qubit`` as 1."""
+        site = self.site_of[qubit]
+        self.move_center(site)
+        tensor = self.tensors[site]
+        zero = np.vdot(tensor[:, 0, :], tensor[:, 0, :]).real
+        one = np.vdot(tensor[:, 1, :], tensor[:, 1, :]).real
+        return one / (zero + one)
+
+    def project(self, qubit, outcome):
+        """Collapse ``qubit`` to ``outcome`` and renormalize."""
+        site = self.site_of[qubit]
+        self.move_center(site)
+        tensor = self.tensors[site]
+        tensor[:, 1 - outcome, :] = 0
+        tensor /= np.linalg.norm(tensor)
+
+    def measure(self, qubit, rng):
+        """Measure ``qubit``, collapse the state and return the outcome."""
+        outcome = int(rng.random_sample() < self.probability_one(qubit))
+        self.project(qubit, outcome)
+        return outcome
+
+    def sample(self, shots, rng):
+        """Return ``shots`` samples of all the qubits, as an array of bits.
+
+        Row ``i`` column ``q`` is the value of qubit ``q`` in shot ``i``.
+        """
+        self.move_center(0)
+        bits = np.zeros((shots, self.num_qubits), dtype=np.int8)
+        environment = np.ones((shots, 1), dtype=complex)
+        for site, tensor in enumerate(self.tensors):
+            zero = environment.dot(tensor[:, 0, :])
+            one = environment.dot(tensor[:, 1, :])
+            weight_zero = np.einsum("ij,ij->i", zero.conj(), zero).real
+            weight_one = np.einsum("ij,ij->i", one.conj(), one).real
+            outcome = rng.random_sample(shots) * (weight_zero + weight_one) >= weight_zero
+            environment = np.where(outcome[:, None], one, zero)
+            norms = np.sqrt(np.where(outcome, weight_one, weight_zero))
+            environment /= norms[:, None]
+            bits[:, self.qubit_at[site]] = outcome
+        return bits
+
+    def statevector(self):
+        """Return the dense statevector; qubit ``q`` is bit ``q`` of the index."""
+        state = np.ones((1, 1), dtype=complex)
+        for tensor in self.tensors:
+            state = np.tensordot(state, tensor, axes=(state.ndim - 1, 0))
+        state = state.reshape((2,) * self.num_qubits)
+        # Axis i holds site i; order the axes from the highest qubit down.
+        axes = [self.site_of[qubit] for qubit in range(self.num_qubits - 1, -1, -1)]
+        return np.transpose(state, axes).ravel()
+
+    def fidelity_estimate(self):
+        """Return the product of the fidelities of the truncations."""
+        return float(np.prod([1 - eps for eps in self.discarded]))
+
+    def fidelity_lower_bound(self):
+        """Return a lower bound of the fidelity to the untruncated state."""
+        angle = sum(math.acos(math.sqrt(max(0.0, 1 - eps))) for eps in self.discarded)
+        if angle >= math.pi / 2:
+            return 0.0
+        return math.cos(angle) ** 2
+
+
+class MPSEngine(object):
+    """Run circuits on a ``MPS``.
+
+    Args:
+        max_bond (int): largest bond dimension.
+        cutoff (float): relative weight below which singular values are dropped.
+        seed (int): seed of the random numbers used for measurements.
+    """
+
+    name = "local_mps_simulator"
+
+    def __init__(self, max_bond=64, cutoff=1e-14, seed=None):
+        self.max_bond = max_bond
+        self.cutoff = cutoff
+        self.rng = np.random.RandomState(seed)
+
+    def _apply(self, state, instruction, clbits, cregs):
+        """Apply one instruction; ``clbits`` holds the classical bits."""
+        if instruction.condition is not None:
+            name, value = instruction.condition
+            if register_value(clbits, cregs, name) != value:
+                return
+        name = instruction.name
+        if name == "barrier":
+            return
+        if name == "measure":
+            clbits[instruction.clbits[0]] = state.measure(instruction.qubits[0], self.rng)
+        elif name == "reset":
+            if state.measure(instruction.qubits[0], self.rng):
+                state.apply_single(single_qubit_matrix("x", ()), instruction.qubits[0])
+        elif name in ("cx", "CX"):
+            state.apply_cx(*instruction.qubits)
+        elif name in SINGLE_QUBIT_GATES:
+            state.apply_single(single_qubit_matrix(name, instruction.params),
+                               instruction.qubits[0])
+        else:
+            raise QasmError("the MPS engine does not know gate '%s'" % name)
+
+    def run(self, circuit, shots=1):
+        """Run ``circuit`` and return a ``Result``.
+
+        The circuit must be unrolled to single-qubit gates and CX.
+        """
+        instructions = circuit.instructions
+        state = MPS(circuit.num_qubits, self.max_bond, self.cutoff)
+        counts = Counter()
+        if is_terminal(instructions):
+            measures = [(instruction.qubits[0], instruction.clbits[0])
+                        for instruction in instructions if instruction.name == "measure"]
+            for instruction in instructions:
+                if instruction.name != "measure":
+                    self._apply(state, instruction, None, circuit.cregs)
+            bits = state.sample(shots, self.rng)
+            clbits = [0] * circuit.num_clbits
+            for row in bits.tolist():
+                for qubit, clbit in measures:
+                    clbits[clbit] = row[qubit]
+                counts[counts_key(clbits, circuit.cregs)] += 1
+            worst = state
+        else:
+            # Share the simulation up to the first classical operation.
+            start = 0
+            for start, instruction in enumerate(instructions):
+                if instruction.condition is not None or \
+                        instruction.name in ("measure", "reset"):
+                    break
+                self._apply(state, instruction, None, circuit.cregs)
+            else:
+                start = len(instructions)
+            worst = state
+            for _ in range(shots):
+                trajectory = state.copy()
+                clbits = [0] * circuit.num_clbits
+                for instruction in instructions[start:]:
+                    self._apply(trajectory, instruction, clbits, circuit.cregs)
+                counts[counts_key(clbits, circuit.cregs)] += 1
+                if trajectory.fidelity_lower_bound() < worst.fidelity_lower_bound():
+                    worst = trajectory
+        lower_bound = worst.fidelity_lower_bound()
+        metadata = {
+            "max_bond": self.max_bond,
+            "largest_bond": max(worst.bond_dimensions() or [1]),
+            "truncations": len(worst.discarded),
+            "discarded_weight": float(sum(worst.discarded)),
+            "fidelity_estimate": worst.fidelity_estimate(),
+            "fidelity_lower_bound": lower_bound,
+            "tvd_bound": math.sqrt(max(0.0, 1 - lower_bound)),
+        }
+        return Result(dict(counts), metadata)
+
+
+def main(argv=None):
+    """Simulate an OpenQASM file with the MPS engine."""
+    parser = argparse.ArgumentParser(
+        description="Simulate an OpenQASM file with a matrix product state.")
+    parser.add_argument("qasm", help="OpenQASM file")
+    parser.add_argument("-s", "--shots", default=1, type=int, help="number of shots")
+    parser.add_argument("--max-bond", default=64, type=int,
+                        help="largest bond dimension kept")
+    parser.add_argument("--seed", default=None, type=int, help="random seed")
+    parser.add_argument("-t", "--top", default=10, type=int,
+                        help="number of most frequent outcomes to print")
+    args = parser.parse_args(argv)
+
+    try:
+        circuit = unroll_file(args.qasm, DEFAULT_BASIS)
+    except QasmError as err:
+        print("Error: " + str(err), file=sys.stderr)
+        return 1
+    start = time.time()
+    result = MPSEngine(args.max_bond, seed=args.seed).run(circuit, args.shots)
+    elapsed = time.time() - start
+    for key, count in sorted(result.counts.items(), key=lambda item: -item[1])[:args.top]:
+        print("%s %d" % (key, count))
+    print("time: %.3f s" % elapsed)
+    for key in sorted(result.metadata):
+        print("%s: %s" % (key, result.metadata[key]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,460 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Statevector engine sharing the amplitudes between worker processes.
+
+The ``2**n`` amplitudes live in one ``multiprocessing.shared_memory`` block
+that every worker maps, split into ``2**k`` equal chunks. Qubit ``q`` is bit
+``q`` of the amplitude index, so the ``n - k`` low qubits are *local*: a
+gate on them transforms each chunk on its own. The ``k`` high qubits select
+the chunk, and a gate on one of them combines the chunks pairwise. Runs of
+local gates go to the workers as one task per chunk and pairwise gates as
+one task per pair of chunks; tasks only carry gate names, matrices and chunk
+numbers, never amplitudes.
+
+Example run:
+  python -m openqasm.engines.sharedmem benchmarks/qft/qft_n20.qasm -p 8
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ..columnar import DEFAULT_BASIS
+from ..exceptions import QasmError
+from ..gates import SINGLE_QUBIT_GATES, single_qubit_matrix
+from ..unroller import unroll_file
+from . import Result, counts_key, is_terminal, register_value
+
+# Smallest number of local qubits worth giving a chunk of its own.
+MIN_LOCAL_QUBITS = 12
+
+X_MATRIX = np.array([[0, 1], [1, 0]], dtype=complex)
+
+# Amplitude arrays of a worker, set by ``_attach``.
+_ARRAYS = {}
+
+
+def _swap(first, second):
+    """Exchange the contents of two equally shaped views in place."""
+    temp = first.copy()
+    first[...] = second
+    second[...] = temp
+
+
+def apply_matrix(chunk, matrix, qubit):
+    """Apply a 2x2 matrix to local ``qubit`` of a chunk, in place."""
+    view = chunk.reshape(-1, 2, 1 << qubit)
+    zero, one = view[:, 0, :], view[:, 1, :]
+    if matrix[0, 1] == 0 and matrix[1, 0] == 0:
+        # Phases such as u1 and rz only scale the amplitudes.
+        if matrix[0, 0] != 1:
+            zero *= matrix[0, 0]
+        one *= matrix[1, 1]
+        return
+    temp = zero.copy()
+    zero *= matrix[0, 0]
+    zero += matrix[0, 1] * one
+    one *= matrix[1, 1]
+    one += matrix[1, 0] * temp
+
+
+def apply_cx(chunk, control, target):
+    """Apply a CNOT between two local qubits of a chunk, in place."""
+    high, low = max(control, target), min(control, target)
+    view = chunk.reshape(-1, 2, 1 << (high - low - 1), 2, 1 << low)
+    if control > target:
+        _swap(view[:, 1, :, 0, :], view[:, 1, :, 1, :])
+    else:
+        _swap(view[:, 0, :, 1, :], view[:, 1, :, 1, :])
+
+
+def _chunk(arrays, index, key="state"):
+    """Return chunk ``index`` of an amplitude array."""
+    size = 1 << arrays["local"]
+    return arrays[key][index * size:(index + 1) * size]
+
+
+def execute(arrays, task):
+    """Run one task on the amplitude arrays and return its result.
+
+    Tasks are tuples whose first item names the work:
+
+    * ``("local", chunk, ops)``: apply ``("u", matrix, qubit)`` and
+      ``("cx", control, target)`` ops whose target is local; a control on a
+      high qubit is checked against the chunk number.
+    * ``("pair_u", first, second, matrix)``: apply a matrix on a high qubit,
+      ``first`` and ``second`` being the chunks where it is 0 and 1.
+    * ``("pair_cx", first, second, control)``: apply a CNOT whose target is
+      a high qubit; ``control`` is a local qubit or None for a whole swap.
+    * ``("weights", chunk, qubit)``: return the weights of ``qubit`` being
+      0 and 1 in the chunk (``qubit`` None sums the whole chunk).
+    * ``("project", chunk, qubit, outcome, scale)``: keep the amplitudes
+      where ``qubit`` is ``outcome`` and multiply them by ``scale``.
+    * ``("sample", chunk, shots, seed)``: return ``shots`` amplitude indexes
+      drawn from the chunk.
+    * ``("save", chunk)`` and ``("restore", chunk)``: copy the chunk to or
+      from the backup array.
+    """
+    kind = task[0]
+    local = arrays["local"]
+    if kind == "local":
+        index, ops = task[1], task[2]
+        chunk = _chunk(arrays, index)
+        for op in ops:
+            if op[0] == "u":
+                apply_matrix(chunk, op[1], op[2])
+            elif op[1] >= local:
+                if (index >> (op[1] - local)) & 1:
+                    apply_matrix(chunk, X_MATRIX, op[2])
+            else:
+                apply_cx(chunk, op[1], op[2])
+    elif kind == "pair_u":
+        first, second = _chunk(arrays, task[1]), _chunk(arrays, task[2])
+        matrix = task[3]
+        if matrix[0, 1] == 0 and matrix[1, 0] == 0:
+            first *= matrix[0, 0]
+            second *= matrix[1, 1]
+        else:
+            zero = first.copy()
+            first *= matrix[0, 0]
+            first += matrix[0, 1] * second
+            second *= matrix[1, 1]
+            second += matrix[1, 0] * zero
+    elif kind == "pair_cx":
+        first, second = _chunk(arrays, task[1]), _chunk(arrays, task[2])
+        control = task[3]
+        if control is None:
+            _swap(first, second)
+        else:
+            _swap(first.reshape(-1, 2, 1 << control)[:, 1, :],
+                  second.reshape(-1, 2, 1 << control)[:, 1, :])
+    elif kind == "weights":
+        index, qubit = task[1], task[2]
+        chunk = _chunk(arrays, index)
+        if qubit is None:
+            return float(np.vdot(chunk, chunk).real), 0.0
+        if qubit >= local:
+            weight = float(np.vdot(chunk, chunk).real)
+            if (index >> (qubit - local)) & 1:
+                return 0.0, weight
+            return weight, 0.0
+        view = chunk.reshape(-1, 2, 1 << qubit)
+        return (float(np.vdot(view[:, 0, :], view[:, 0, :]).real),
+                float(np.vdot(view[:, 1, :], view[:, 1, :]).real))
+    elif kind == "project":
+        index, qubit, outcome, scale = task[1:]
+        chunk = _chunk(arrays, index)
+        if qubit >= local:
+            if (index >> (qubit - local)) & 1 == outcome:
+                chunk *= scale
+            else:
+                chunk[:] = 0
+        else:
+            view = chunk.reshape(-1, 2, 1 << qubit)
+            view[:, 1 - outcome, :] = 0
+            view[:, outcome, :] *= scale
+    elif kind == "sample":
+        index, shots, seed = task[1:]
+        chunk = _chunk(arrays, index)
+        probabilities = chunk.real ** 2 + chunk.imag ** 2
+        rng = np.random.RandomState(seed)
+        picks = rng.choice(len(chunk), shots, p=probabilities / probabilities.sum())
+        return picks + (index << local)
+    elif kind == "save":
+        _chunk(arrays, task[1], "backup")[:] = _chunk(arrays, task[1])
+    elif kind == "restore":
+        _chunk(arrays, task[1])[:] = _chunk(arrays, task[1], "backup")
+    else:
+        raise ValueError("unknown task '%s'" % kind)
+    return None
+
+
+def _open_array(name, size):
+    """Map the shared memory block ``name`` as ``size`` amplitudes."""
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray((size,), dtype=complex, buffer=block.buf)
+
+
+def _attach(names, size, local):
+    """Worker initializer: map the shared amplitude arrays."""
+    _ARRAYS["local"] = local
+    _ARRAYS["blocks"] = []
+    for key, name in names.items():
+        block, array = _open_array(name, size)
+        _ARRAYS["blocks"].append(block)
+        _ARRAYS[key] = array
+
+
+def _worker(task):
+    """Run a task on the arrays mapped by ``_attach``."""
+    return execute(_ARRAYS, task)
+
+
+class _State(object):
+    """Amplitudes in shared memory and the pool of workers sharing them."""
+
+    def __init__(self, num_qubits, num_chunks, processes, backup):
+        self.num_qubits = num_qubits
+        self.num_chunks = num_chunks
+        self.high = num_chunks.bit_length() - 1
+        self.local = num_qubits - self.high
+        size = 1 << num_qubits
+        self.blocks = {}
+        self.arrays = {"local": self.local}
+        for key in ("state", "backup") if backup else ("state",):
+            block = shared_memory.SharedMemory(create=True, size=size * 16)
+            self.blocks[key] = block
+            self.arrays[key] = np.ndarray((size,), dtype=complex, buffer=block.buf)
+        self.arrays["state"][:] = 0
+        self.arrays["state"][0] = 1
+        self.pool = None
+        if processes > 1 and num_chunks > 1:
+            names = dict((key, block.name) for key, block in self.blocks.items())
+            self.pool = multiprocessing.Pool(processes, _attach, (names, size, self.local))
+
+    def run(self, tasks):
+        """Run tasks in parallel and return their results in order."""
+        if self.pool is None:
+            return [execute(self.arrays, task) for task in tasks]
+        return self.pool.map(_worker, tasks, chunksize=1)
+
+    def close(self):
+        """Stop the workers and free the shared memory."""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+        self.arrays.clear()
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+
+
+class SharedMemoryEngine(object):
+    """Run circuits on a statevector split between processes.
+
+    Args:
+        processes (int): number of worker processes; defaults to the number
+            of CPUs. With 1, or for small circuits, everything runs in the
+            calling process.
+        seed (int): seed of the random numbers used for measurements.
+    """
+
+    name = "local_sharedmem_simulator"
+
+    def __init__(self, processes=None, seed=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.rng = np.random.RandomState(seed)
+
+    def num_chunks(self, num_qubits):
+        """Return the number of chunks used for ``num_qubits`` qubits.
+
+        Two chunks per process keep every process busy on pairwise gates,
+        which touch two chunks at a time.
+        """
+        if self.processes == 1:
+            return 1
+        high = (2 * self.processes - 1).bit_length()
+        return 1 << max(0, min(high, num_qubits - MIN_LOCAL_QUBITS))
+
+    def run(self, circuit, shots=1):
+        """Run ``circuit`` and return a ``Result``.
+
+        The circuit must be unrolled to single-qubit gates and CX.
+        """
+        terminal = is_terminal(circuit.instructions)
+        num_chunks = self.num_chunks(circuit.num_qubits)
+        state = _State(circuit.num_qubits, num_chunks, self.processes,
+                       backup=not terminal and shots > 1)
+        try:
+            if terminal:
+                counts = self._sample(state, circuit, shots)
+            else:
+                counts = self._trajectories(state, circuit, shots)
+        finally:
+            state.close()
+        metadata = {
+            "processes": self.processes if num_chunks > 1 else 1,
+            "chunks": num_chunks,
+        }
+        return Result(dict(counts), metadata)
+
+    def _sample(self, state, circuit, shots):
+        """Apply the gates once and sample the final measurements."""
+        _Runner(self, state, circuit).run(
+            [instruction for instruction in circuit.instructions
+             if instruction.name != "measure"])
+        weights = np.array([weight for weight, _ in state.run(
+            [("weights", index, None) for index in range(state.num_chunks)])])
+        per_chunk = self.rng.multinomial(shots, weights / weights.sum())
+        tasks = [("sample", index, int(count), int(self.rng.randint(2 ** 31)))
+                 for index, count in enumerate(per_chunk) if count]
+        picks = Counter(np.concatenate(state.run(tasks)).tolist())
+        measures = [(instruction.qubits[0], instruction.clbits[0])
+                    for instruction in circuit.instructions if instruction.name == "measure"]
+        counts = Counter()
+        clbits = [0] * circuit.num_clbits
+        for index, count in picks.items():
+            for qubit, clbit in measures:
+                clbits[clbit] = (index >> qubit) & 1
+            counts[counts_key(clbits, circuit.cregs)] += count
+        return counts
+
+    def _trajectories(self, state, circuit, shots):
+        """Run the shots one by one from the shared unitary prefix."""
+        instructions = circuit.instructions
+        start = 0
+        for start, instruction in enumerate(instructions):
+            if instruction.condition is not None or instruction.name in ("measure", "reset"):
+                break
+        else:
+            start = len(instructions)
+        _Runner(self, state, circuit).run(instructions[:start])
+        chunks = range(state.num_chunks)
+        if shots > 1:
+            state.run([("save", index) for index in chunks])
+        counts = Counter()
+        for shot in range(shots):
+            if shot:
+                state.run([("restore", index) for index in chunks])
+            runner = _Runner(self, state, circuit)
+            runner.run(instructions[start:])
+            counts[counts_key(runner.clbits, circuit.cregs)] += 1
+        return counts
+
+
+class _Runner(object):
+    """Turn instructions into tasks, batching runs of local gates."""
+
+    def __init__(self, engine, state, circuit):
+        self.rng = engine.rng
+        self.state = state
+        self.cregs = circuit.cregs
+        self.clbits = [0] * circuit.num_clbits
+        self.pending = []
+
+    def flush(self):
+        """Send the pending local gates to the workers."""
+        if self.pending:
+            ops = self.pending
+            self.pending = []
+            self.state.run([("local", index, ops) for index in range(self.state.num_chunks)])
+
+    def pairs(self, qubit):
+        """Return the pairs of chunks differing in high ``qubit``."""
+        bit = 1 << (qubit - self.state.local)
+        return [(index, index | bit) for index in range(self.state.num_chunks)
+                if not index & bit]
+
+    def gate(self, matrix, qubit):
+        """Apply a single-qubit gate."""
+        if qubit < self.state.local:
+            self.pending.append(("u", matrix, qubit))
+            return
+        self.flush()
+        self.state.run([("pair_u", first, second, matrix)
+                        for first, second in self.pairs(qubit)])
+
+    def cx(self, control, target):
+        """Apply a CNOT."""
+        local = self.state.local
+        if target < local:
+            self.pending.append(("cx", control, target))
+            return
+        self.flush()
+        if control < local:
+            tasks = [("pair_cx", first, second, control)
+                     for first, second in self.pairs(target)]
+        else:
+            bit = 1 << (control - local)
+            tasks = [("pair_cx", first, second, None)
+                     for first, second in self.pairs(target) if first & bit]
+        self.state.run(tasks)
+
+    def measure(self, qubit):
+        """Measure ``qubit``, collapse the state and return the outcome."""
+        self.flush()
+        chunks = range(self.state.num_chunks)
+        weights = self.state.run([("weights", index, qubit) for index in chunks])
+        zero = sum(weight[0] for weight in weights)
+        one = sum(weight[1] for weight in weights)
+        outcome = int(self.rng.random_sample() * (zero + one) >= zero)
+        scale = 1 / np.sqrt(one if outcome else zero)
+        self.state.run([("project", index, qubit, outcome, scale) for index in chunks])
+        return outcome
+
+    def run(self, instructions):
+        """Apply instructions, then wait for the pending gates."""
+        for instruction in instructions:
+            if instruction.condition is not None:
+                name, value = instruction.condition
+                if register_value(self.clbits, self.cregs, name) != value:
+                    continue
+            name = instruction.name
+            if name == "barrier":
+                continue
+            if name == "measure":
+                self.clbits[instruction.clbits[0]] = self.measure(instruction.qubits[0])
+            elif name == "reset":
+                if self.measure(instruction.qubits[0]):
+                    self.gate(X_MATRIX, instruction.qubits[0])
+            elif name in ("cx", "CX"):
+                self.cx(*instruction.qubits)
+            elif name in SINGLE_QUBIT_GATES:
+                self.gate(single_qubit_matrix(name, instruction.params), instruction.qubits[0])
+            else:
+                raise QasmError("the shared memory engine does not know gate '%s'" % name)
+        self.flush()
+
+
+def main(argv=None):
+    """Simulate an OpenQASM file with the shared memory engine."""
+    parser = argparse.ArgumentParser(
+        description="Simulate an OpenQASM file with a statevector shared by processes.")
+    parser.add_argument("qasm", help="OpenQASM file")
+    parser.add_argument("-s", "--shots", default=1, type=int, help="number of shots")
+    parser.add_argument("-p", "--processes", default=None, type=int,
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--seed", default=None, type=int, help="random seed")
+    parser.add_argument("-t", "--top", default=10, type=int,
+                        help="number of most frequent outcomes to print")
+    args = parser.parse_args(argv)
+
+    try:
+        circuit = unroll_file(args.qasm, DEFAULT_BASIS)
+    except QasmError as err:
+        print("Error: " + str(err), file=sys.stderr)
+        return 1
+    start = time.time()
+    result = SharedMemoryEngine(args.processes, seed=args.seed).run(circuit, args.shots)
+    elapsed = time.time() - start
+    for key, count in sorted(result.counts.items(), key=lambda item: -item[1])[:args.top]:
+        print("%s %d" % (key, count))
+    print("time: %.3f s" % elapsed)
+    for key in sorted(result.metadata):
+        print("%s: %s" % (key, result.metadata[key]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
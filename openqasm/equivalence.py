@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Equivalence checking of circuits with random probe states.
+
+Two circuits are equivalent when their gates make the same unitary up to a
+global phase and they measure the same qubits into the same bits at the end.
+``check`` runs both circuits on a batch of random input states at once. The
+batch is stacked as the fastest axis of one amplitude array, with the probe
+index acting as extra low qubits, so each gate is a single vectorized update
+of every probe (with the kernels of ``openqasm.engines.sharedmem``).
+
+Unitaries that differ give different outputs on a random state with
+probability one. A difference confined to ``k`` of the ``2**n`` basis states
+shows up with a size of about ``sqrt(k / 2**n)``, well above the tolerance
+for any width a statevector fits in memory. Circuits of at most
+``UNITARY_QUBITS`` qubits are checked exactly instead: the probes are then
+all the basis states, which builds the full unitaries.
+
+``check_qelib`` compares the gate definitions of ``qelib1.inc`` with their
+textbook matrices.
+
+Example run:
+  python -m openqasm.equivalence benchmarks/qft/qft_n10.qasm qft_n10_opt.qasm
+  python -m openqasm.equivalence benchmarks/qft/qft_n10.qasm --pass optimize
+  python -m openqasm.equivalence --qelib
+"""
+
+import argparse
+import cmath
+import math
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from .columnar import DEFAULT_BASIS
+from .engines.sharedmem import apply_cx, apply_matrix
+from .exceptions import QasmError
+from .gates import SINGLE_QUBIT_GATES, single_qubit_matrix
+from .optimize import optimize
+from .parser import parse
+from .unroller import unroll, unroll_file
+
+# Widths up to which the full unitaries are compared.
+UNITARY_QUBITS = 6
+# Random probes of wider circuits; rounded up to a power of two.
+DEFAULT_PROBES = 4
+# Largest distance allowed between the outputs of a probe.
+ATOL = 1e-7
+
+# Rewrites that keep the width of a circuit, from the path of the original.
+PASSES = {
+    "unroll": lambda path: unroll_file(path),
+    "optimize": lambda path: optimize(unroll_file(path, DEFAULT_BASIS)),
+}
+
+
+class Equivalence(namedtuple("Equivalence", ["equivalent", "error", "phase", "probes",
+                                             "exact", "reason"])):
+    """Outcome of ``check``.
+
+    Attributes:
+        equivalent (bool): True if the circuits are equivalent.
+        error (float): largest distance between the outputs of a probe, once
+            the global phase is removed.
+        phase (float): global phase of the second circuit relative to the first.
+        probes (int): number of input states.
+        exact (bool): True if the probes were all the basis states.
+        reason (str): why the circuits differ, or None.
+    """
+    __slots__ = ()
+
+    def __bool__(self):
+        return self.equivalent
+
+
+def split_measurements(circuit):
+    """Return the gates of a circuit and its final measurements.
+
+    Barriers are dropped.
+
+    Returns:
+        tuple(list(Instruction), dict): gates, and classical bit of each
+        measured qubit.
+
+    Raises:
+        QasmError: if there are resets, conditions, or gates on a measured qubit.
+    """
+    gates = []
+    measured = {}
+    for instruction in circuit:
+        name = instruction.name
+        if instruction.condition is not None:
+            raise QasmError("cannot compare '%s' with a condition" % name)
+        if name == "reset":
+            raise QasmError("cannot compare circuits with resets")
+        if name == "barrier":
+            continue
+        if name == "measure":
+            measured[instruction.qubits[0]] = instruction.clbits[0]
+            continue
+        for qubit in instruction.qubits:
+            if qubit in measured:
+                raise QasmError("cannot compare gate '%s' after a measurement of "
+                                "qubit %d" % (name, qubit))
+        gates.append(instruction)
+    return gates, measured
+
+
+def random_states(num_qubits, count, rng):
+    """Return ``count`` random states stacked with the probe index fastest."""
+    states = rng.standard_normal((1 << num_qubits, count)) + \
+        1j * rng.standard_normal((1 << num_qubits, count))
+    states /= np.linalg.norm(states, axis=0)
+    return states.ravel()
+
+
+def basis_states(num_qubits):
+    """Return all the basis states stacked with the probe index fastest."""
+    return np.eye(1 << num_qubits, dtype=complex).ravel()
+
+
+def apply_gates(gates, states, num_probes):
+    """Apply gates to stacked states in place.
+
+    Args:
+        gates (list(Instruction)): single-qubit gates and ``cx``.
+        states (numpy.ndarray): amplitudes, the probe index fastest.
+        num_probes (int): number of probes, a power of two.
+    """
+    low = num_probes.bit_length() - 1
+    for instruction in gates:
+        name = instruction.name
+        if name in SINGLE_QUBIT_GATES:
+            matrix = single_qubit_matrix(name, instruction.params)
+            apply_matrix(states, matrix, instruction.qubits[0] + low)
+        elif name in ("cx", "CX"):
+            control, target = instruction.qubits
+            apply_cx(states, control + low, target + low)
+        else:
+            raise QasmError("the equivalence checker does not know gate '%s'" % name)
+    return states
+
+
+def compare(first, second, num_probes):
+    """Return the global phase and the largest distance between stacked outputs.
+
+    The phase is the one of the summed overlaps, which for the basis states
+    is the phase of the trace of ``first^dagger second``.
+    """
+    first = first.reshape(-1, num_probes)
+    second = second.reshape(-1, num_probes)
+    overlap = np.vdot(first, second)
+    if abs(overlap) == 0:
+        return 0.0, float(np.max(np.linalg.norm(second - first, axis=0)))
+    phase = overlap / abs(overlap)
+    error = np.max(np.linalg.norm(second - phase * first, axis=0))
+    return cmath.phase(phase), float(error)
+
+
+def check(first, second, probes=DEFAULT_PROBES, seed=None, atol=ATOL, exact=None):
+    """Compare two flat circuits.
+
+    Args:
+        first (Circuit): reference circuit.
+        second (Circuit): circuit to check against it.
+        probes (int): random input states of wide circuits.
+        seed (int): seed of the random states.
+        atol (float): largest distance allowed between outputs.
+        exact (bool): compare the full unitaries; by default when the
+            circuits have at most ``UNITARY_QUBITS`` qubits.
+
+    Returns:
+        Equivalence: the outcome.
+    """
+    num_qubits = first.num_qubits
+    if second.num_qubits != num_qubits:
+        return Equivalence(False, float("inf"), 0.0, 0, False,
+                           "%d qubits against %d" % (num_qubits, second.num_qubits))
+    first_gates, first_measured = split_measurements(first)
+    second_gates, second_measured = split_measurements(second)
+    if first_measured != second_measured or (first_measured and
+                                             list(first.cregs.items()) !=
+                                             list(second.cregs.items())):
+        return Equivalence(False, float("inf"), 0.0, 0, False, "different measurements")
+
+    if exact is None:
+        exact = num_qubits <= UNITARY_QUBITS
+    if exact:
+        num_probes = 1 << num_qubits
+        states = basis_states(num_qubits)
+    else:
+        num_probes = 1 << max(0, int(probes) - 1).bit_length()
+        states = random_states(num_qubits, num_probes, np.random.RandomState(seed))
+    outputs = apply_gates(first_gates, states.copy(), num_probes)
+    states = apply_gates(second_gates, states, num_probes)
+    phase, error = compare(outputs, states, num_probes)
+    equivalent = error <= atol
+    return Equivalence(equivalent, error, phase, num_probes, exact,
+                       None if equivalent else "outputs differ by %.3g" % error)
+
+
+def check_files(first, second, basis=DEFAULT_BASIS, **options):
+    """Compare the circuits of two OpenQASM files; see ``check``."""
+    return check(unroll_file(first, basis), unroll_file(second, basis), **options)
+
+
+def check_pass(path, name, **options):
+    """Compare the circuit of a file with its rewrite by pass ``name`` of ``PASSES``."""
+    return check(unroll_file(path, DEFAULT_BASIS), PASSES[name](path), **options)
+
+
+def unitary(circuit):
+    """Return the matrix of the gates of a small circuit.
+
+    Column ``j`` is the output of basis state ``j``, qubit ``q`` being bit
+    ``q`` of the index.
+    """
+    gates, _ = split_measurements(circuit)
+    num_qubits = circuit.num_qubits
+    states = apply_gates(gates, basis_states(num_qubits), 1 << num_qubits)
+    return states.reshape(1 << num_qubits, 1 << num_qubits)
+
+
+# Textbook matrices, written out rather than taken from openqasm.gates. The
+# first argument of a gate is bit 0 of the matrix index.
+
+def _u(theta, phi, lam):
+    return np.array([[math.cos(theta / 2), -cmath.exp(1j * lam) * math.sin(theta / 2)],
+                     [cmath.exp(1j * phi) * math.sin(theta / 2),
+                      cmath.exp(1j * (phi + lam)) * math.cos(theta / 2)]])
+
+
+def _rz(phi):
+    return np.diag([cmath.exp(-0.5j * phi), cmath.exp(0.5j * phi)])
+
+
+def _ry(theta):
+    return np.array([[math.cos(theta / 2), -math.sin(theta / 2)],
+                     [math.sin(theta / 2), math.cos(theta / 2)]])
+
+
+def _controlled(matrix, num_controls=1):
+    """Return the matrix of a single-qubit gate on the last argument
+    controlled by the others."""
+    size = 2 << num_controls
+    result = np.eye(size, dtype=complex)
+    rows = [size // 2 - 1, size - 1]
+    result[np.ix_(rows, rows)] = matrix
+    return result
+
+
+_X = np.array([[0, 1], [1, 0]])
+_H = np.array([[1, 1], [1, -1]]) / math.sqrt(2)
+
+# (parameters, matrix) of each gate of qelib1.inc.
+QELIB_MATRICES = {
+    "u3": ((0.3, -1.1, 2.2), _u(0.3, -1.1, 2.2)),
+    "u2": ((-1.1, 2.2), _u(math.pi / 2, -1.1, 2.2)),
+    "u1": ((2.2,), np.diag([1, cmath.exp(2.2j)])),
+    "cx": ((), _controlled(_X)),
+    "id": ((), np.eye(2)),
+    "x": ((), _X),
+    "y": ((), np.array([[0, -1j], [1j, 0]])),
+    "z": ((), np.diag([1, -1])),
+    "h": ((), _H),
+    "s": ((), np.diag([1, 1j])),
+    "sdg": ((), np.diag([1, -1j])),
+    "t": ((), np.diag([1, cmath.exp(0.25j * math.pi)])),
+    "tdg": ((), np.diag([1, cmath.exp(-0.25j * math.pi)])),
+    "rx": ((0.7,), np.array([[math.cos(0.35), -1j * math.sin(0.35)],
+                             [-1j * math.sin(0.35), math.cos(0.35)]])),
+    "ry": ((0.7,), _ry(0.7)),
+    "rz": ((0.7,), _rz(0.7)),
+    "cz": ((), _controlled(np.diag([1, -1]))),
+    "cy": ((), _controlled(np.array([[0, -1j], [1j, 0]]))),
+    "ch": ((), _controlled(_H)),
+    "ccx": ((), _controlled(_X, 2)),
+    "crz": ((0.7,), _controlled(_rz(0.7))),
+    "cu1": ((2.2,), _controlled(np.diag([1, cmath.exp(2.2j)]))),
+    # The U of the OpenQASM 2.0 specification is Rz(phi) Ry(theta) Rz(lambda),
+    # which only differs from u3 by a phase: that phase matters once controlled.
+    "cu3": ((0.3, -1.1, 2.2), _controlled(_rz(-1.1).dot(_ry(0.3)).dot(_rz(2.2)))),
+}
+
+
+def gate_circuit(name, params, num_qubits):
+    """Return the flat circuit of one application of a ``qelib1.inc`` gate."""
+    args = ",".join("q[%d]" % index for index in range(num_qubits))
+    call = name + ("(%s)" % ",".join(repr(value) for value in params) if params else "")
+    source = 'include "qelib1.inc";\nqreg q[%d];\n%s %s;\n' % (num_qubits, call, args)
+    return unroll(parse(source, "<%s>" % name))
+
+
+def check_qelib(atol=ATOL):
+    """Compare every gate definition of ``qelib1.inc`` with its textbook matrix.
+
+    Returns:
+        list(tuple(str, float, bool)): name, distance between the matrices up
+        to a global phase, and whether it is within ``atol``.
+    """
+    rows = []
+    for name in sorted(QELIB_MATRICES):
+        params, matrix = QELIB_MATRICES[name]
+        num_qubits = len(matrix).bit_length() - 1
+        actual = unitary(gate_circuit(name, params, num_qubits))
+        _, error = compare(np.asarray(matrix, dtype=complex).ravel(), actual.ravel(),
+                           len(matrix))
+        rows.append((name, error, error <= atol))
+    return rows
+
+
+def main(argv=None):
+    """Check that two OpenQASM files, or a file and its rewrite, are equivalent."""
+    parser = argparse.ArgumentParser(
+        description="Check the equivalence of OpenQASM circuits with random probe states.")
+    parser.add_argument("qasm", nargs="*", help="reference file and file to check")
+    parser.add_argument("--pass", dest="rewrite", choices=sorted(PASSES), default=None,
+                        help="check the reference file against its rewrite by this pass")
+    parser.add_argument("--qelib", action="store_true",
+                        help="check the gate definitions of qelib1.inc")
+    parser.add_argument("-n", "--probes", default=DEFAULT_PROBES, type=int,
+                        help="random input states of circuits wider than %d qubits"
+                        % UNITARY_QUBITS)
+    parser.add_argument("--seed", default=None, type=int, help="random seed")
+    parser.add_argument("--atol", default=ATOL, type=float,
+                        help="largest distance allowed between outputs")
+    args = parser.parse_args(argv)
+
+    status = 0
+    if args.qelib:
+        for name, error, good in check_qelib(args.atol):
+            print("%-5s %10.3g %s" % (name, error, "ok" if good else "DIFFERS"))
+            status |= not good
+    if len(args.qasm) != (1 if args.rewrite else 2):
+        if args.qelib and not args.qasm:
+            return status
+        parser.error("give two files, or one file and --pass")
+    options = {"probes": args.probes, "seed": args.seed, "atol": args.atol}
+    try:
+        if args.rewrite:
+            result = check_pass(args.qasm[0], args.rewrite, **options)
+        else:
+            result = check_files(args.qasm[0], args.qasm[1], **options)
+    except QasmError as err:
+        print("Error: " + str(err), file=sys.stderr)
+        return 1
+    if not result.probes:
+        print("NOT equivalent: " + result.reason)
+    else:
+        print("%s: %d %s, error %.3g, phase %.6f" % (
+            "equivalent" if result else "NOT equivalent",
+            result.probes, "basis states" if result.exact else "random probes",
+            result.error, result.phase))
+    return status | (not result)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Exceptions raised by the OpenQASM tools."""
+
+
+class QasmError(Exception):
+    """Base class for errors raised while reading or processing OpenQASM."""
+
+    def __init__(self, message, filename=None, line=None):
+        self.message = message
+        self.filename = filename
+        self.line = line
+        super(QasmError, self).__init__(str(self))
+
+    def __str__(self):
+        where = ""
+        if self.filename is not None:
+            where = self.filename + ":"
+        if self.line is not None:
+            where += str(self.line) + ":"
+        if where:
+            return where + " " + self.message
+        return self.message
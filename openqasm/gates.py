@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Matrices of the OpenQASM gates.
+
+Single-qubit gates are all ``U(theta,phi,lambda)`` up to a global phase:
+``u3_angles`` gives the angles of the ``qelib1.inc`` gates, ``u3_matrix`` the
+matrix of a set of angles and ``matrix_to_u3`` goes back from a matrix.
+"""
+
+import cmath
+import math
+
+import numpy as np
+
+# Gates are considered equal when their entries differ by less than this.
+ATOL = 1e-9
+
+_HALF_PI = math.pi / 2
+
+# (theta, phi, lambda) of each single-qubit gate, from its parameters.
+U3_ANGLES = {
+    "U": lambda theta, phi, lam: (theta, phi, lam),
+    "u3": lambda theta, phi, lam: (theta, phi, lam),
+    "u2": lambda phi, lam: (_HALF_PI, phi, lam),
+    "u1": lambda lam: (0.0, 0.0, lam),
+    "id": lambda: (0.0, 0.0, 0.0),
+    "x": lambda: (math.pi, 0.0, math.pi),
+    "y": lambda: (math.pi, _HALF_PI, _HALF_PI),
+    "z": lambda: (0.0, 0.0, math.pi),
+    "h": lambda: (_HALF_PI, 0.0, math.pi),
+    "s": lambda: (0.0, 0.0, _HALF_PI),
+    "sdg": lambda: (0.0, 0.0, -_HALF_PI),
+    "t": lambda: (0.0, 0.0, math.pi / 4),
+    "tdg": lambda: (0.0, 0.0, -math.pi / 4),
+    "rx": lambda theta: (theta, -_HALF_PI, _HALF_PI),
+    "ry": lambda theta: (theta, 0.0, 0.0),
+    "rz": lambda phi: (0.0, 0.0, phi),
+}
+
+SINGLE_QUBIT_GATES = frozenset(U3_ANGLES)
+
+
+def u3_angles(name, params):
+    """Return ``(theta, phi, lambda)`` of a single-qubit gate."""
+    return U3_ANGLES[name](*params)
+
+
+def u3_matrix(theta, phi, lam):
+    """Return the 2x2 matrix of ``U(theta,phi,lambda)``."""
+    cos = math.cos(theta / 2)
+    sin = math.sin(theta / 2)
+    return np.array([[cos, -cmath.exp(1j * lam) * sin],
+                     [cmath.exp(1j * phi) * sin, cmath.exp(1j * (phi + lam)) * cos]])
+
+
+def single_qubit_matrix(name, params):
+    """Return the 2x2 matrix of a single-qubit gate."""
+    return u3_matrix(*u3_angles(name, params))
+
+
+def normalize_angle(angle):
+    """Return ``angle`` in the interval (-pi, pi]."""
+    angle = math.fmod(angle, 2 * math.pi)
+    if angle > math.pi:
+        angle -= 2 * math.pi
+    elif angle <= -math.pi:
+        angle += 2 * math.pi
+    return angle
+
+
+def matrix_to_u3(matrix):
+    """Return ``(theta, phi, lambda)`` of a 2x2 unitary, up to global phase.
+
+    When only a sum or a difference of ``phi`` and ``lambda`` matters,
+    ``phi`` is set to zero.
+    """
+    top_left, top_right = matrix[0, 0], matrix[0, 1]
+    bottom_left, bottom_right = matrix[1, 0], matrix[1, 1]
+    theta = 2 * math.atan2(abs(bottom_left), abs(top_left))
+    if abs(bottom_left) < ATOL:
+        phi = 0.0
+        lam = cmath.phase(bottom_right) - cmath.phase(top_left)
+    elif abs(top_left) < ATOL:
+        phi = 0.0
+        lam = cmath.phase(-top_right) - cmath.phase(bottom_left)
+    else:
+        phi = cmath.phase(bottom_left) - cmath.phase(top_left)
+        lam = cmath.phase(-top_right) - cmath.phase(top_left)
+    return theta, normalize_angle(phi), normalize_angle(lam)
+
+
+def is_identity(matrix, atol=ATOL):
+    """Return True if ``matrix`` is the identity up to a global phase."""
+    phase = matrix[0, 0]
+    if abs(abs(phase) - 1) > atol:
+        return False
+    return np.allclose(matrix, phase * np.eye(len(matrix)), rtol=0, atol=atol)
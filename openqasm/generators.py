@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Benchmark circuit generators without QISKit.
+
+Each function returns a ``Circuit`` laid out like the files of the
+benchmarks folder, so ``circuit.qasm()`` gives the same text the QISKit
+based scripts used to write.
+
+The answers of ``bv`` and ``cc`` are known in advance: ``OUTCOMES`` gives the
+counts keys each circuit can produce, which the scripts record in the header
+of the file with ``outcomes_comment`` so results can be checked without a
+reference simulation.
+"""
+
+import math
+
+from .circuit import Circuit
+
+# Header comment tag of the possible outcomes of a file.
+OUTCOMES_TAG = "@outcomes"
+
+
+def bernstein_vazirani(num_qubits, hidden):
+    """Bernstein-Vazirani on ``num_qubits`` qubits.
+
+    Args:
+        num_qubits (int): query qubits plus the oracle qubit.
+        hidden (str): hidden bit string, its first character being the
+            highest query qubit; at most ``num_qubits - 1`` long.
+    """
+    oracle = num_qubits - 1
+    circuit = Circuit([("qr", num_qubits)], [("cr", oracle)])
+    for qubit in range(oracle):
+        circuit.append("h", [qubit])
+    circuit.append("x", [oracle])
+    circuit.append("h", [oracle])
+    circuit.append("barrier", range(num_qubits))
+    for qubit, bit in enumerate(reversed(hidden)):
+        if bit == "1":
+            circuit.append("cx", [qubit, oracle])
+    circuit.append("barrier", range(num_qubits))
+    for qubit in range(oracle):
+        circuit.append("h", [qubit])
+    for qubit in range(oracle):
+        circuit.append("measure", [qubit], clbits=[qubit])
+    return circuit
+
+
+def counterfeit_coin(num_coins, false_index):
+    """Counterfeit-coin finding with ``num_coins`` coins, one of them false.
+
+    The last qubit checks that an even number of coins is on the balance;
+    the rest of the circuit is conditioned on that intermediate measurement.
+    """
+    balance = num_coins
+    circuit = Circuit([("qr", num_coins + 1)], [("cr", num_coins + 1)])
+    for qubit in range(num_coins):
+        circuit.append("h", [qubit])
+    for qubit in range(num_coins):
+        circuit.append("cx", [qubit, balance])
+    circuit.append("measure", [balance], clbits=[balance])
+    circuit.append("x", [balance], condition=("cr", 0))
+    circuit.append("h", [balance], condition=("cr", 0))
+    for qubit in range(num_coins):
+        circuit.append("h", [qubit], condition=("cr", 2 ** num_coins))
+    circuit.append("barrier", range(num_coins + 1))
+    circuit.append("cx", [false_index, balance], condition=("cr", 0))
+    circuit.append("barrier", range(num_coins + 1))
+    for qubit in range(num_coins):
+        circuit.append("h", [qubit], condition=("cr", 0))
+    for qubit in range(num_coins):
+        circuit.append("measure", [qubit], clbits=[qubit])
+    return circuit
+
+
+def qft(num_qubits):
+    """Quantum Fourier transform of ``num_qubits`` qubits, then measured.
+
+    Controlled phases are written with ``u1`` and ``cx`` only.
+    """
+    circuit = Circuit([("q", num_qubits)], [("c", num_qubits)])
+    for high in range(num_qubits):
+        for low in range(high):
+            angle = math.pi / float(2 ** (high - low))
+            circuit.append("u1", [high], [angle / 2])
+            circuit.append("cx", [high, low])
+            circuit.append("u1", [low], [-angle / 2])
+            circuit.append("cx", [high, low])
+            circuit.append("u1", [low], [angle / 2])
+        circuit.append("h", [high])
+    circuit.append("barrier", range(num_qubits))
+    for qubit in range(num_qubits):
+        circuit.append("measure", [qubit], clbits=[qubit])
+    return circuit
+
+
+def bernstein_vazirani_outcomes(num_qubits, hidden):
+    """Counts keys of ``bernstein_vazirani``: the hidden string, every shot."""
+    return [hidden.zfill(num_qubits - 1)]
+
+
+def counterfeit_coin_outcomes(num_coins, false_index):
+    """Counts keys of ``counterfeit_coin``, each with probability 1/4.
+
+    When the balance tips (odd number of coins on it), the coins end in all
+    zeros or all ones. Otherwise they end with only the false coin set, or
+    all but the false coin.
+    """
+    only = ["0"] * num_coins
+    only[num_coins - 1 - false_index] = "1"
+    only = "".join(only)
+    others = "".join("1" if bit == "0" else "0" for bit in only)
+    return ["1" + "0" * num_coins, "1" * (num_coins + 1), "0" + only, "0" + others]
+
+
+def outcomes_comment(keys):
+    """Return the header comment recording the possible counts keys."""
+    return OUTCOMES_TAG + " " + " ".join(sorted(key.replace(" ", "") for key in keys))
+
+
+GENERATORS = {
+    "bv": bernstein_vazirani,
+    "cc": counterfeit_coin,
+    "qft": qft,
+}
+
+OUTCOMES = {
+    "bv": bernstein_vazirani_outcomes,
+    "cc": counterfeit_coin_outcomes,
+}
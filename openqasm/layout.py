@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Locality-driven qubit layout for statevector simulators.
+
+A statevector simulator keeps qubit ``p`` at bit ``p`` of the amplitude
+index. When the amplitudes are split into chunks (across processes, nodes
+or devices) the top ``chunk_bits`` positions select the chunk, and a gate
+whose target sits there pairs amplitudes of two chunks: it cannot be batched
+with the local gates and moves data between chunks, as in
+``openqasm.engines.sharedmem``. A control on a high position only selects
+chunks, and costs nothing extra.
+
+``plan_layout`` weighs each qubit by the gates targeting it (two-qubit gates
+count ``TWO_QUBIT_WEIGHT``) and gives the heaviest qubits the lowest
+positions. Among qubits of equal weight, the ones interacting most with the
+qubits already placed come first, so hot pairs stay next to each other.
+
+``relayout`` rewrites a circuit on those positions. With a ``window``, the
+circuit is cut into segments of that many ASAP layers and each segment may
+move to its own layout: the swaps (three ``cx`` each) are inserted only when
+the segment saves more remote gates than they cost.
+
+Measurements keep their classical bits, so counts need no decoding. The
+returned permutations decode statevectors: logical qubit ``q`` sits at
+position ``initial[q]`` at the start and ``final[q]`` at the end.
+
+Example run:
+  python -m openqasm.layout benchmarks/bv/bv_n19.qasm -o bv_n19_layout.qasm -m bv_n19.json
+"""
+
+import argparse
+import json
+import sys
+
+from .circuit import NON_GATES, Instruction
+from .corpus import asap_levels
+from .exceptions import QasmError
+from .parser import parse_file
+from .unroller import unroll
+
+# Weight of a two-qubit gate relative to a single-qubit gate.
+TWO_QUBIT_WEIGHT = 2
+# Default number of positions selecting the chunk.
+CHUNK_BITS = 3
+
+
+def _weight(instruction):
+    return TWO_QUBIT_WEIGHT if len(instruction.qubits) > 1 else 1
+
+
+def interactions(instructions, num_qubits):
+    """Return the weight of the gates targeting each qubit, and of each pair.
+
+    Returns:
+        tuple(list, dict): weight by qubit, and weight by sorted qubit pair.
+    """
+    heat = [0] * num_qubits
+    pairs = {}
+    for instruction in instructions:
+        if instruction.name in NON_GATES:
+            continue
+        weight = _weight(instruction)
+        heat[instruction.qubits[-1]] += weight
+        qubits = instruction.qubits
+        for index, first in enumerate(qubits):
+            for second in qubits[index + 1:]:
+                pair = (min(first, second), max(first, second))
+                pairs[pair] = pairs.get(pair, 0) + weight
+    return heat, pairs
+
+
+def plan_layout(instructions, num_qubits):
+    """Return the position of each qubit, the heaviest qubits lowest."""
+    heat, pairs = interactions(instructions, num_qubits)
+    neighbors = [{} for _ in range(num_qubits)]
+    for (first, second), weight in pairs.items():
+        neighbors[first][second] = weight
+        neighbors[second][first] = weight
+    # Weight of the interactions of each unplaced qubit with the placed ones.
+    attached = [0] * num_qubits
+    unplaced = set(range(num_qubits))
+    positions = [0] * num_qubits
+    for position in range(num_qubits):
+        qubit = min(unplaced, key=lambda each: (-heat[each], -attached[each], each))
+        unplaced.remove(qubit)
+        positions[qubit] = position
+        for other, weight in neighbors[qubit].items():
+            attached[other] += weight
+    return positions
+
+
+def remote_cost(instructions, positions, num_qubits, chunk_bits=CHUNK_BITS):
+    """Return the weight of the gates whose target is on a chunk position."""
+    local = num_qubits - chunk_bits
+    return sum(_weight(instruction) for instruction in instructions
+               if instruction.name not in NON_GATES and
+               positions[instruction.qubits[-1]] >= local)
+
+
+def _swaps(positions, target):
+    """Return the position pairs to swap to go from ``positions`` to ``target``.
+
+    Both map qubits to positions; ``positions`` is updated in place.
+    """
+    occupant = [0] * len(positions)
+    for qubit, position in enumerate(positions):
+        occupant[position] = qubit
+    swaps = []
+    for qubit, position in enumerate(target):
+        current = positions[qubit]
+        if current == position:
+            continue
+        other = occupant[position]
+        swaps.append((current, position))
+        occupant[current], occupant[position] = other, qubit
+        positions[other], positions[qubit] = current, position
+    return swaps
+
+
+def _swap_instructions(first, second):
+    return [Instruction("cx", (), (first, second), (), None),
+            Instruction("cx", (), (second, first), (), None),
+            Instruction("cx", (), (first, second), (), None)]
+
+
+def _moved(instruction, positions):
+    return instruction._replace(qubits=tuple(positions[qubit]
+                                             for qubit in instruction.qubits))
+
+
+def relayout(circuit, window=None, chunk_bits=CHUNK_BITS):
+    """Return ``circuit`` on locality-driven positions.
+
+    Args:
+        circuit (Circuit): flat circuit; gates act on their last qubit.
+        window (int): ASAP layers per segment, or None for one layout.
+        chunk_bits (int): positions selecting the chunk.
+
+    Returns:
+        tuple: the new ``Circuit``, and the initial and final position of
+        each qubit.
+    """
+    num_qubits = circuit.num_qubits
+    instructions = circuit.instructions
+    if not window:
+        positions = plan_layout(instructions, num_qubits)
+        moved = [_moved(instruction, positions) for instruction in instructions]
+        return circuit.copy(moved), positions, list(positions)
+
+    levels = asap_levels(circuit)
+    segments = []
+    for instruction, level in zip(instructions, levels):
+        index = max(0, level - 1) // window
+        while len(segments) <= index:
+            segments.append([])
+        segments[index].append(instruction)
+
+    positions = None
+    initial = None
+    output = []
+    for segment in segments:
+        target = plan_layout(segment, num_qubits)
+        if positions is None:
+            positions = target
+            initial = list(target)
+        else:
+            moving = list(positions)
+            swaps = _swaps(moving, target)
+            swap_cost = sum(remote_cost(_swap_instructions(first, second), range(num_qubits),
+                                        num_qubits, chunk_bits) for first, second in swaps)
+            saved = remote_cost(segment, positions, num_qubits, chunk_bits) - \
+                remote_cost(segment, target, num_qubits, chunk_bits)
+            if saved > swap_cost:
+                for first, second in swaps:
+                    output.extend(_swap_instructions(first, second))
+                positions = moving
+        output.extend(_moved(instruction, positions) for instruction in segment)
+    if positions is None:
+        positions = initial = list(range(num_qubits))
+    return circuit.copy(output), initial, list(positions)
+
+
+def layout_labels(circuit, positions):
+    """Return ``{qubit label: position label}`` of a layout."""
+    return dict((circuit.qubit_label(qubit), circuit.qubit_label(position))
+                for qubit, position in enumerate(positions))
+
+
+def main(argv=None):
+    """Write an OpenQASM file on locality-driven qubit positions."""
+    parser = argparse.ArgumentParser(
+        description="Renumber the qubits of an OpenQASM file so that the most used "
+                    "ones get the low positions of a statevector.")
+    parser.add_argument("qasm", help="OpenQASM file")
+    parser.add_argument("-o", "--output", default=None,
+                        help="write the remapped circuit to this file")
+    parser.add_argument("-m", "--map", default=None,
+                        help="write the initial and final layouts as JSON to this file")
+    parser.add_argument("-w", "--window", default=None, type=int,
+                        help="ASAP layers per segment with its own layout")
+    parser.add_argument("-c", "--chunk-bits", default=CHUNK_BITS, type=int,
+                        help="positions selecting the chunk of the statevector")
+    parser.add_argument("-b", "--basis", default="u1,u2,u3,cx,id",
+                        help="comma separated gates to unroll to")
+    parser.add_argument("-p", "--prec", default=15, type=int,
+                        help="digits of the parameters")
+    args = parser.parse_args(argv)
+
+    try:
+        circuit = unroll(parse_file(args.qasm), [name for name in args.basis.split(",")
+                                                  if name])
+    except QasmError as err:
+        print("Error: " + str(err), file=sys.stderr)
+        return 1
+    moved, initial, final = relayout(circuit, args.window, args.chunk_bits)
+
+    num_qubits = circuit.num_qubits
+    before = remote_cost(circuit.instructions, range(num_qubits), num_qubits,
+                         args.chunk_bits)
+    after = remote_cost(moved.instructions, range(num_qubits), num_qubits, args.chunk_bits)
+    report = sys.stdout if args.output else sys.stderr
+    report.write("remote gate weight: %d -> %d, instructions: %d -> %d\n"
+                 % (before, after, len(circuit), len(moved)))
+    if args.output is None:
+        sys.stdout.write(moved.qasm(args.prec))
+    else:
+        with open(args.output, "w") as output:
+            output.write(moved.qasm(args.prec))
+    if args.map:
+        with open(args.map, "w") as map_file:
+            json.dump({"initial": layout_labels(circuit, initial),
+                       "final": layout_labels(circuit, final)},
+                      map_file, indent=1, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Measurement light-cone pruning.
+
+``prune`` walks a circuit backwards from its measurements and keeps only the
+instructions that can influence a measured value:
+
+* measurements are always kept and make their qubit live;
+* a gate is kept if one of its qubits is live, and then all its qubits are;
+* a reset is kept if its qubit is live, and the qubit is no longer live
+  before it, since a reset discards the state of its qubit;
+* barriers are kept on their live qubits only.
+
+Gates with a condition are kept or dropped like the others: the measurements
+feeding a condition are kept anyway. The qubits that no kept instruction
+touches are then removed and the others renumbered within their registers.
+
+Example run:
+  python -m openqasm.lightcone benchmarks/sat/sat_n7_vars=3_clauses=3_clauselen=3_fd2ff8bf99b05c13216600154bc6bc21.qasm
+"""
+
+import argparse
+import json
+import sys
+
+from .circuit import Circuit, Instruction
+from .exceptions import QasmError
+from .parser import parse_file
+from .unroller import unroll
+
+
+def light_cone(circuit):
+    """Return the instructions of ``circuit`` that can influence a measurement.
+
+    Barriers are restricted to their live qubits.
+    """
+    live = [False] * circuit.num_qubits
+    kept = []
+    for instruction in reversed(circuit.instructions):
+        qubits = instruction.qubits
+        name = instruction.name
+        if name == "measure":
+            live[qubits[0]] = True
+        elif name == "barrier":
+            qubits = tuple(qubit for qubit in qubits if live[qubit])
+            if not qubits:
+                continue
+            instruction = instruction._replace(qubits=qubits)
+        elif not any(live[qubit] for qubit in qubits):
+            continue
+        elif name == "reset" and instruction.condition is None:
+            live[qubits[0]] = False
+        else:
+            for qubit in qubits:
+                live[qubit] = True
+        kept.append(instruction)
+    kept.reverse()
+    return kept
+
+
+def compact(circuit):
+    """Remove the qubits no instruction touches.
+
+    Returns:
+        tuple: the new ``Circuit`` and the list giving the new global index of
+        each old qubit, or -1 for the removed ones.
+    """
+    used = [False] * circuit.num_qubits
+    for instruction in circuit.instructions:
+        for qubit in instruction.qubits:
+            used[qubit] = True
+    remap = []
+    qregs = []
+    offset = 0
+    for name, size in circuit.qregs.items():
+        new_size = 0
+        for index in range(offset, offset + size):
+            if used[index]:
+                remap.append(sum(size for _, size in qregs) + new_size)
+                new_size += 1
+            else:
+                remap.append(-1)
+        if new_size:
+            qregs.append((name, new_size))
+        offset += size
+    instructions = [Instruction(instruction.name, instruction.params,
+                                tuple(remap[qubit] for qubit in instruction.qubits),
+                                instruction.clbits, instruction.condition)
+                    for instruction in circuit.instructions]
+    return Circuit(qregs, circuit.cregs.items(), instructions, circuit.gates), remap
+
+
+def prune(circuit):
+    """Return the light cone of the measurements of ``circuit`` on its own qubits.
+
+    Returns:
+        tuple: the reduced ``Circuit`` and the qubit remap of ``compact``.
+    """
+    return compact(circuit.copy(light_cone(circuit)))
+
+
+def remap_labels(before, after, remap):
+    """Return ``{old label: new label}`` for the qubits kept by ``prune``."""
+    return dict((before.qubit_label(old), after.qubit_label(new))
+                for old, new in enumerate(remap) if new >= 0)
+
+
+def main(argv=None):
+    """Prune an OpenQASM file to the light cone of its measurements."""
+    parser = argparse.ArgumentParser(
+        description="Remove the gates and qubits of an OpenQASM file that cannot "
+                    "influence its measurements.")
+    parser.add_argument("qasm", help="OpenQASM file")
+    parser.add_argument("-o", "--output", default=None,
+                        help="write the reduced circuit to this file")
+    parser.add_argument("-m", "--map", default=None,
+                        help="write the qubit remap as JSON to this file")
+    parser.add_argument("-b", "--basis", default=None,
+                        help="comma separated gates to unroll to (default: keep "
+                             "the gates of the file)")
+    parser.add_argument("-p", "--prec", default=15, type=int,
+                        help="digits of the parameters")
+    args = parser.parse_args(argv)
+
+    try:
+        program = parse_file(args.qasm)
+    except QasmError as err:
+        print("Error: " + str(err), file=sys.stderr)
+        return 1
+    if args.basis is None:
+        basis = list(program.gates)
+    else:
+        basis = [name for name in args.basis.split(",") if name]
+    circuit = unroll(program, basis)
+    pruned, remap = prune(circuit)
+
+    report = sys.stdout if args.output else sys.stderr
+    report.write("qubits: %d -> %d, instructions: %d -> %d\n"
+                 % (circuit.num_qubits, pruned.num_qubits, len(circuit), len(pruned)))
+    if args.output is None:
+        sys.stdout.write(pruned.qasm(args.prec))
+    else:
+        with open(args.output, "w") as output:
+            output.write(pruned.qasm(args.prec))
+    if args.map:
+        with open(args.map, "w") as map_file:
+            json.dump(remap_labels(circuit, pruned, remap), map_file, indent=1, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
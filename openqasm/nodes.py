@@ -0,0 +1,501 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Syntax tree of an OpenQASM 2.0 program.
+
+Expressions (gate parameters) and statements are small immutable objects.
+Every node can print itself back as OpenQASM with its ``qasm()`` method.
+"""
+
+import math
+
+# Functions allowed in OpenQASM 2.0 parameter expressions.
+FUNCTIONS = {
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "exp": math.exp,
+    "ln": math.log,
+    "sqrt": math.sqrt,
+}
+
+BINARY_OPERATORS = {
+    "+": lambda left, right: left + right,
+    "-": lambda left, right: left - right,
+    "*": lambda left, right: left * right,
+    "/": lambda left, right: left / right,
+    "^": lambda left, right: left ** right,
+}
+
+# Binding strength used to print the minimum number of parentheses.
+_PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2, "^": 4}
+
+
+def format_real(value, prec=15):
+    """Return ``value`` as an OpenQASM real literal with ``prec`` digits."""
+    text = "%.*g" % (prec, value)
+    if "e" in text and "." not in text:
+        mantissa, exponent = text.split("e")
+        text = mantissa + ".0e" + exponent
+    return text
+
+
+class Expression(object):
+    """Base class of the parameter expressions."""
+
+    __slots__ = ()
+    precedence = 5
+
+    def evaluate(self, bindings=None):
+        """Return the value of the expression.
+
+        Args:
+            bindings (dict): values of the free parameters by name.
+        """
+        raise NotImplementedError
+
+    def substitute(self, mapping):
+        """Return a copy where the parameters in ``mapping`` are replaced.
+
+        Args:
+            mapping (dict): expression to put in place of each parameter name.
+        """
+        raise NotImplementedError
+
+    def parameters(self):
+        """Return the set of free parameter names."""
+        raise NotImplementedError
+
+    def fold(self):
+        """Return an equivalent expression with the constant parts computed."""
+        raise NotImplementedError
+
+    def pycode(self, names):
+        """Return the expression as Python source.
+
+        Args:
+            names (dict): Python variable to use for each parameter name.
+        """
+        raise NotImplementedError
+
+    def qasm(self, prec=15):
+        """Return the OpenQASM text of the expression."""
+        raise NotImplementedError
+
+    def __str__(self):
+        return self.qasm()
+
+    def __repr__(self):
+        return "<%s %s>" % (type(self).__name__, self.qasm())
+
+
+class Real(Expression):
+    """A numeric literal or the constant ``pi``."""
+
+    __slots__ = ("value", "text")
+
+    def __init__(self, value, text=None):
+        self.value = value
+        self.text = text
+
+    def evaluate(self, bindings=None):
+        return self.value
+
+    def substitute(self, mapping):
+        return self
+
+    def parameters(self):
+        return set()
+
+    def fold(self):
+        return self
+
+    def pycode(self, names):
+        if not math.isfinite(self.value):
+            return "(float('%r'))" % self.value
+        if math.copysign(1.0, self.value) < 0:
+            return "(%r)" % self.value
+        return repr(self.value)
+
+    def qasm(self, prec=15):
+        if self.text is not None:
+            return self.text
+        if self.value < 0:
+            return "-" + format_real(-self.value, prec)
+        return format_real(self.value, prec)
+
+    @property
+    def precedence(self):  # pylint: disable=invalid-overridden-method
+        """Negative literals print with a sign and bind like a negation."""
+        return 3 if self.text is None and self.value < 0 else 5
+
+
+class Parameter(Expression):
+    """A reference to a gate parameter."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def evaluate(self, bindings=None):
+        try:
+            return bindings[self.name]
+        except (KeyError, TypeError):
+            raise NameError("unbound parameter '%s'" % self.name)
+
+    def substitute(self, mapping):
+        return mapping.get(self.name, self)
+
+    def parameters(self):
+        return {self.name}
+
+    def fold(self):
+        return self
+
+    def pycode(self, names):
+        return names[self.name]
+
+    def qasm(self, prec=15):
+        return self.name
+
+
+class Negate(Expression):
+    """Unary minus."""
+
+    __slots__ = ("operand",)
+    precedence = 3
+
+    def __init__(self, operand):
+        self.operand = operand
+
+    def evaluate(self, bindings=None):
+        return -self.operand.evaluate(bindings)
+
+    def substitute(self, mapping):
+        return Negate(self.operand.substitute(mapping))
+
+    def parameters(self):
+        return self.operand.parameters()
+
+    def fold(self):
+        operand = self.operand.fold()
+        if isinstance(operand, Real):
+            return Real(-operand.value)
+        return Negate(operand)
+
+    def pycode(self, names):
+        return "(-%s)" % self.operand.pycode(names)
+
+    def qasm(self, prec=15):
+        text = self.operand.qasm(prec)
+        if self.operand.precedence <= self.precedence:
+            text = "(" + text + ")"
+        return "-" + text
+
+
+class BinaryOp(Expression):
+    """One of ``+ - * / ^`` applied to two expressions."""
+
+    __slots__ = ("operator", "left", "right")
+
+    def __init__(self, operator, left, right):
+        self.operator = operator
+        self.left = left
+        self.right = right
+
+    @property
+    def precedence(self):  # pylint: disable=invalid-overridden-method
+        """Binding strength of the operator."""
+        return _PRECEDENCE[self.operator]
+
+    def chain(self):
+        """Return the operations down the left operands, this one first.
+
+        The parser builds left associative sums and products with the first
+        operand deepest, so the methods below walk this chain with a loop:
+        long expressions do not hit the recursion limit.
+        """
+        chain = [self]
+        while isinstance(chain[-1].left, BinaryOp):
+            chain.append(chain[-1].left)
+        return chain
+
+    def evaluate(self, bindings=None):
+        chain = self.chain()
+        value = chain[-1].left.evaluate(bindings)
+        for node in reversed(chain):
+            value = BINARY_OPERATORS[node.operator](value, node.right.evaluate(bindings))
+        return value
+
+    def substitute(self, mapping):
+        chain = self.chain()
+        result = chain[-1].left.substitute(mapping)
+        for node in reversed(chain):
+            result = BinaryOp(node.operator, result, node.right.substitute(mapping))
+        return result
+
+    def parameters(self):
+        chain = self.chain()
+        names = chain[-1].left.parameters()
+        for node in chain:
+            names |= node.right.parameters()
+        return names
+
+    def fold(self):
+        chain = self.chain()
+        left = chain[-1].left.fold()
+        for node in reversed(chain):
+            right = node.right.fold()
+            if isinstance(left, Real) and isinstance(right, Real):
+                try:
+                    left = Real(BINARY_OPERATORS[node.operator](left.value, right.value))
+                    continue
+                except (ArithmeticError, ValueError):
+                    # Leave it for evaluate() to report
+                    pass
+            left = BinaryOp(node.operator, left, right)
+        return left
+
+    def pycode(self, names):
+        chain = self.chain()
+        text = chain[-1].left.pycode(names)
+        below = None
+        for node in reversed(chain):
+            # The left operand only needs parentheses where Python would
+            # group it differently, which keeps long chains flat.
+            if below is not None and (node.operator == "^" or below.precedence < node.precedence):
+                text = "(" + text + ")"
+            operator = "**" if node.operator == "^" else node.operator
+            text = "%s %s %s" % (text, operator, node.right.pycode(names))
+            below = node
+        return "(" + text + ")"
+
+    def qasm(self, prec=15):
+        chain = self.chain()
+        text = chain[-1].left.qasm(prec)
+        below = chain[-1].left
+        for node in reversed(chain):
+            right = node.right.qasm(prec)
+            mine = node.precedence
+            if node.operator == "^":
+                # Right associative
+                if below.precedence <= mine:
+                    text = "(" + text + ")"
+                if node.right.precedence < mine:
+                    right = "(" + right + ")"
+            else:
+                if below.precedence < mine:
+                    text = "(" + text + ")"
+                if node.right.precedence <= mine:
+                    right = "(" + right + ")"
+            text = text + node.operator + right
+            below = node
+        return text
+
+
+class Function(Expression):
+    """One of the unary functions in ``FUNCTIONS``."""
+
+    __slots__ = ("name", "argument")
+
+    def __init__(self, name, argument):
+        self.name = name
+        self.argument = argument
+
+    def evaluate(self, bindings=None):
+        return FUNCTIONS[self.name](self.argument.evaluate(bindings))
+
+    def substitute(self, mapping):
+        return Function(self.name, self.argument.substitute(mapping))
+
+    def parameters(self):
+        return self.argument.parameters()
+
+    def fold(self):
+        argument = self.argument.fold()
+        if isinstance(argument, Real):
+            try:
+                return Real(FUNCTIONS[self.name](argument.value))
+            except (ArithmeticError, ValueError):
+                pass
+        return Function(self.name, argument)
+
+    def pycode(self, names):
+        return "%s(%s)" % (self.name, self.argument.pycode(names))
+
+    def qasm(self, prec=15):
+        return self.name + "(" + self.argument.qasm(prec) + ")"
+
+
+class Argument(object):
+    """A quantum or classical argument: a register or one of its bits."""
+
+    __slots__ = ("name", "index")
+
+    def __init__(self, name, index=None):
+        self.name = name
+        self.index = index
+
+    def qasm(self):
+        """Return the OpenQASM text of the argument."""
+        if self.index is None:
+            return self.name
+        return "%s[%d]" % (self.name, self.index)
+
+    def __repr__(self):
+        return "<Argument %s>" % self.qasm()
+
+
+class Statement(object):
+    """Base class of the statements. ``line`` is the source line number."""
+
+    __slots__ = ("line",)
+
+    def qasm(self, prec=15):
+        """Return the OpenQASM text of the statement."""
+        raise NotImplementedError
+
+    def __repr__(self):
+        return "<%s %s>" % (type(self).__name__, self.qasm())
+
+
+class Register(Statement):
+    """A ``qreg`` or ``creg`` declaration."""
+
+    __slots__ = ("kind", "name", "size")
+
+    def __init__(self, kind, name, size, line=None):
+        self.kind = kind
+        self.name = name
+        self.size = size
+        self.line = line
+
+    def qasm(self, prec=15):
+        return "%s %s[%d];" % (self.kind, self.name, self.size)
+
+
+class GateDeclaration(Statement):
+    """A ``gate`` or ``opaque`` declaration.
+
+    ``body`` holds ``Operation`` and ``Barrier`` statements whose arguments are
+    the formal qubit names; it is ``None`` for opaque gates.
+    """
+
+    __slots__ = ("name", "params", "qubits", "body")
+
+    def __init__(self, name, params, qubits, body=None, line=None):
+        self.name = name
+        self.params = tuple(params)
+        self.qubits = tuple(qubits)
+        self.body = body
+        self.line = line
+
+    @property
+    def opaque(self):
+        """True for ``opaque`` declarations."""
+        return self.body is None
+
+    def _signature(self):
+        text = self.name
+        if self.params:
+            text += "(" + ",".join(self.params) + ")"
+        return text + " " + ",".join(self.qubits)
+
+    def qasm(self, prec=15):
+        if self.opaque:
+            return "opaque " + self._signature() + ";"
+        lines = ["gate " + self._signature(), "{"]
+        for statement in self.body:
+            lines.append("  " + statement.qasm(prec))
+        lines.append("}")
+        return "\n".join(lines)
+
+
+def _condition_prefix(condition):
+    if condition is None:
+        return ""
+    return "if(%s==%d) " % condition
+
+
+class Operation(Statement):
+    """Application of a gate (``U``, ``CX`` or a declared gate).
+
+    ``condition`` is ``None`` or a ``(creg, value)`` pair from an ``if``.
+    """
+
+    __slots__ = ("name", "params", "args", "condition")
+
+    def __init__(self, name, params, args, condition=None, line=None):
+        self.name = name
+        self.params = tuple(params)
+        self.args = tuple(args)
+        self.condition = condition
+        self.line = line
+
+    def qasm(self, prec=15):
+        text = self.name
+        if self.params:
+            text += "(" + ",".join(param.qasm(prec) for param in self.params) + ")"
+        text += " " + ",".join(arg.qasm() for arg in self.args) + ";"
+        return _condition_prefix(self.condition) + text
+
+
+class Measure(Statement):
+    """A ``measure`` statement."""
+
+    name = "measure"
+    __slots__ = ("qubit", "clbit", "condition")
+
+    def __init__(self, qubit, clbit, condition=None, line=None):
+        self.qubit = qubit
+        self.clbit = clbit
+        self.condition = condition
+        self.line = line
+
+    def qasm(self, prec=15):
+        return _condition_prefix(self.condition) + \
+            "measure %s -> %s;" % (self.qubit.qasm(), self.clbit.qasm())
+
+
+class Reset(Statement):
+    """A ``reset`` statement."""
+
+    name = "reset"
+    __slots__ = ("qubit", "condition")
+
+    def __init__(self, qubit, condition=None, line=None):
+        self.qubit = qubit
+        self.condition = condition
+        self.line = line
+
+    def qasm(self, prec=15):
+        return _condition_prefix(self.condition) + "reset %s;" % self.qubit.qasm()
+
+
+class Barrier(Statement):
+    """A ``barrier`` statement."""
+
+    name = "barrier"
+    __slots__ = ("args",)
+
+    def __init__(self, args, line=None):
+        self.args = tuple(args)
+        self.line = line
+
+    def qasm(self, prec=15):
+        return "barrier " + ",".join(arg.qasm() for arg in self.args) + ";"
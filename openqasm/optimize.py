@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Peephole optimization of flat circuits.
+
+``optimize`` makes one pass over a circuit and
+
+* fuses every run of single-qubit gates on a qubit into one ``u1``, ``u2`` or
+  ``u3`` (the cheapest that fits);
+* drops the runs that amount to the identity, which covers ``id`` and
+  zero-angle rotations;
+* cancels pairs of identical ``cx`` with nothing in between on their qubits,
+  then keeps fusing the single-qubit gates around the removed pair.
+
+Diagonal gates commute with a ``cx`` on its control, so pending diagonal
+gates on a control qubit are carried past the ``cx`` and fused with the
+gates after it, which merges for instance the ``u1`` rotations of
+consecutive controlled-phase gates.
+
+Instructions with a condition, measurements, resets and barriers are never
+moved, and single-qubit gates are not fused across them.
+
+Example run:
+  python -m openqasm.optimize benchmarks/qft/qft_n10.qasm -o qft_n10_opt.qasm
+"""
+
+import argparse
+import math
+import sys
+
+import numpy as np
+
+from .circuit import Instruction
+from .columnar import DEFAULT_BASIS
+from .exceptions import QasmError
+from .gates import (ATOL, SINGLE_QUBIT_GATES, is_identity, matrix_to_u3,
+                    single_qubit_matrix)
+from .unroller import unroll_file
+
+CX_GATES = frozenset(["cx", "CX"])
+
+_HALF_PI = math.pi / 2
+
+
+def u_instruction(matrix, qubit):
+    """Return the cheapest of ``u1``, ``u2`` and ``u3`` for ``matrix``, or None."""
+    if is_identity(matrix):
+        return None
+    theta, phi, lam = matrix_to_u3(matrix)
+    if abs(theta) < ATOL:
+        return Instruction("u1", (phi + lam,), (qubit,), (), None)
+    if abs(theta - _HALF_PI) < ATOL:
+        return Instruction("u2", (phi, lam), (qubit,), (), None)
+    return Instruction("u3", (theta, phi, lam), (qubit,), (), None)
+
+
+def _is_diagonal(matrix):
+    """Return True if there is no matrix (identity) or it is diagonal."""
+    return matrix is None or (abs(matrix[0, 1]) < ATOL and abs(matrix[1, 0]) < ATOL)
+
+
+class _Optimizer(object):
+    """State of one optimization pass.
+
+    ``output`` holds the kept instructions, with None for the removed ones,
+    and ``history[q]`` the positions in ``output`` of the instructions on
+    qubit ``q`` that are still there.
+    """
+
+    def __init__(self, num_qubits):
+        self.output = []
+        self.history = [[] for _ in range(num_qubits)]
+        self.pending = [None] * num_qubits
+
+    def emit(self, instruction, keep=()):
+        """Append an instruction after the pending gates on its qubits.
+
+        The pending gates of the qubits in ``keep`` commute with the
+        instruction and stay pending.
+        """
+        for qubit in instruction.qubits:
+            if qubit not in keep:
+                self.flush(qubit)
+        position = len(self.output)
+        self.output.append(instruction)
+        for qubit in instruction.qubits:
+            self.history[qubit].append(position)
+
+    def absorb(self, qubit, matrix):
+        """Compose ``matrix`` after the pending gates of ``qubit``."""
+        pending = self.pending[qubit]
+        self.pending[qubit] = matrix if pending is None else matrix.dot(pending)
+
+    def flush(self, qubit):
+        """Emit the fused pending gates of ``qubit``."""
+        pending = self.pending[qubit]
+        if pending is None:
+            return
+        self.pending[qubit] = None
+        instruction = u_instruction(pending, qubit)
+        if instruction is not None:
+            self.history[qubit].append(len(self.output))
+            self.output.append(instruction)
+
+    def last(self, qubit):
+        """Return the position of the last kept instruction on ``qubit``."""
+        history = self.history[qubit]
+        return history[-1] if history else None
+
+    def cancel_cx(self, instruction):
+        """Remove the previous ``cx`` if it equals ``instruction``.
+
+        Returns True on success. The single-qubit gates before the removed
+        ``cx`` go back to the pending gates, to be fused with what follows.
+        """
+        control, target = instruction.qubits
+        pending = self.pending[target]
+        if pending is not None and not is_identity(pending):
+            return False
+        if not _is_diagonal(self.pending[control]):
+            return False
+        position = self.last(control)
+        if position is None or position != self.last(target):
+            return False
+        previous = self.output[position]
+        if previous.name not in CX_GATES or previous.qubits != instruction.qubits or \
+                previous.condition is not None:
+            return False
+        self.output[position] = None
+        self.pending[target] = None
+        for qubit in (control, target):
+            self.history[qubit].pop()
+            self.reopen(qubit)
+        return True
+
+    def reopen(self, qubit):
+        """Move the last instruction on ``qubit`` back to the pending gates if it
+        is an unconditioned single-qubit gate."""
+        position = self.last(qubit)
+        if position is None:
+            return
+        instruction = self.output[position]
+        if instruction.name in SINGLE_QUBIT_GATES and instruction.condition is None:
+            self.history[qubit].pop()
+            self.output[position] = None
+            matrix = single_qubit_matrix(instruction.name, instruction.params)
+            pending = self.pending[qubit]
+            self.pending[qubit] = matrix if pending is None else pending.dot(matrix)
+
+    def run(self, instructions):
+        """Optimize ``instructions`` and return the kept ones."""
+        for instruction in instructions:
+            name = instruction.name
+            if name in SINGLE_QUBIT_GATES:
+                matrix = single_qubit_matrix(name, instruction.params)
+                if instruction.condition is None:
+                    self.absorb(instruction.qubits[0], matrix)
+                elif not is_identity(matrix):
+                    self.emit(instruction)
+            elif name in CX_GATES and instruction.condition is None:
+                if not self.cancel_cx(instruction):
+                    control = instruction.qubits[0]
+                    keep = (control,) if _is_diagonal(self.pending[control]) else ()
+                    self.emit(instruction, keep)
+            else:
+                self.emit(instruction)
+        for qubit in range(len(self.pending)):
+            self.flush(qubit)
+        return [instruction for instruction in self.output if instruction is not None]
+
+
+def optimize(circuit):
+    """Return an optimized copy of ``circuit``."""
+    return circuit.copy(_Optimizer(circuit.num_qubits).run(circuit.instructions))
+
+
+def count_diff(before, after):
+    """Return ``(name, before, after)`` rows comparing two circuits, plus a total."""
+    first = before.count_ops()
+    second = after.count_ops()
+    rows = [(name, first.get(name, 0), second.get(name, 0))
+            for name in sorted(set(first) | set(second))]
+    rows.append(("total", len(before), len(after)))
+    return rows
+
+
+def print_report(rows, out=sys.stdout):
+    """Print the gate-count diff returned by ``count_diff``."""
+    out.write("%-10s %10s %10s %10s\n" % ("gate", "before", "after", "diff"))
+    for name, first, second in rows:
+        out.write("%-10s %10d %10d %+10d\n" % (name, first, second, second - first))
+
+
+def main(argv=None):
+    """Optimize an OpenQASM file and report the gate counts before and after."""
+    parser = argparse.ArgumentParser(
+        description="Fuse single-qubit gates and cancel CX pairs in an OpenQASM file.")
+    parser.add_argument("qasm", help="OpenQASM file")
+    parser.add_argument("-o", "--output", default=None,
+                        help="write the optimized circuit to this file")
+    parser.add_argument("-b", "--basis", default=",".join(DEFAULT_BASIS),
+                        help="comma separated gates to unroll to before optimizing")
+    parser.add_argument("-p", "--prec", default=15, type=int,
+                        help="digits of the parameters")
+    args = parser.parse_args(argv)
+
+    basis = [name for name in args.basis.split(",") if name]
+    try:
+        circuit = unroll_file(args.qasm, basis)
+    except QasmError as err:
+        print("Error: " + str(err), file=sys.stderr)
+        return 1
+    optimized = optimize(circuit)
+    if args.output is None:
+        sys.stdout.write(optimized.qasm(args.prec))
+        print_report(count_diff(circuit, optimized), sys.stderr)
+    else:
+        with open(args.output, "w") as output:
+            output.write(optimized.qasm(args.prec))
+        print_report(count_diff(circuit, optimized))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
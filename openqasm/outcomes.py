@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Expected outcomes and linear-time checks of sampled counts.
+
+Results are compared as bit-packed arrays rather than dictionaries of
+strings: a counts key becomes the integer whose bit ``i`` is classical bit
+``i`` (the key read as binary once the register separators are removed), so
+outcomes of up to 64 bits fit in one ``uint64``. ``pack_counts`` returns the
+keys sorted with their counts alongside.
+
+The expected side is either
+
+* the possible outcomes recorded in the file header by the generators (the
+  ``//@outcomes`` comment, see ``openqasm.generators``), read by
+  ``read_outcomes`` without parsing the circuit, or
+* a reference run saved with ``save_reference`` as sorted packed arrays.
+
+``unexpected`` and ``count_mismatches`` merge the two sorted arrays in one
+linear pass, so a million distinct 40-bit outcomes pack and check in
+under a second.
+"""
+
+import json
+
+import numpy as np
+
+from .generators import OUTCOMES_TAG
+
+# Widest outcomes that can be packed.
+MAX_BITS = 64
+
+
+def read_outcomes(path):
+    """Return the counts keys recorded in the header of a file, or None.
+
+    Only the comment lines before the first statement are read.
+    """
+    with open(path) as source:
+        for line in source:
+            line = line.strip()
+            if not line:
+                continue
+            if not line.startswith("//"):
+                return None
+            fields = line[2:].split()
+            if fields and fields[0] == OUTCOMES_TAG:
+                return fields[1:]
+    return None
+
+
+def pack_keys(keys):
+    """Return counts keys as ``uint64`` values, in the same order.
+
+    Raises:
+        ValueError: if the keys are wider than ``MAX_BITS`` or of mixed widths.
+    """
+    keys = [key.replace(" ", "") for key in keys]
+    if not keys:
+        return np.zeros(0, dtype=np.uint64)
+    width = len(keys[0])
+    if width > MAX_BITS:
+        raise ValueError("cannot pack outcomes of %d bits" % width)
+    text = "".join(keys).encode()
+    if len(text) != width * len(keys):
+        raise ValueError("outcomes of different widths")
+    bits = (np.frombuffer(text, dtype=np.uint8).reshape(len(keys), width) - ord("0"))
+    if width == 0:
+        return np.zeros(len(keys), dtype=np.uint64)
+    if bits.max() > 1:
+        raise ValueError("outcomes must be written with 0 and 1")
+    weights = np.left_shift(np.uint64(1), np.arange(width - 1, -1, -1, dtype=np.uint64))
+    return bits.astype(np.uint64).dot(weights)
+
+
+def pack_counts(counts):
+    """Return the sorted packed keys of a counts dictionary and their counts."""
+    keys = pack_keys(list(counts))
+    values = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+    order = np.argsort(keys, kind="stable")
+    return keys[order], values[order]
+
+
+def _merge(expected, actual):
+    """Return the position in ``expected`` of each value of ``actual``, or -1.
+
+    Both arrays are sorted and without repeats. A stable sort of the two
+    concatenated runs is a single merge (timsort finds the runs), so this
+    takes linear time, and each actual value lands just after its equal
+    expected value when there is one.
+    """
+    merged = np.concatenate((expected, actual))
+    order = np.argsort(merged, kind="stable")
+    values = merged[order]
+    positions = np.full(len(actual), -1, dtype=np.int64)
+    is_actual = order >= len(expected)
+    found = np.zeros(len(order), dtype=bool)
+    found[1:] = is_actual[1:] & ~is_actual[:-1] & (values[1:] == values[:-1])
+    previous = np.empty(len(order), dtype=np.int64)
+    previous[0] = -1
+    previous[1:] = order[:-1]
+    positions[order[is_actual] - len(expected)] = np.where(found[is_actual],
+                                                           previous[is_actual], -1)
+    return positions
+
+
+def unexpected(keys, expected):
+    """Return the packed keys of ``keys`` missing from ``expected``.
+
+    Args:
+        keys (numpy.ndarray): sorted packed outcomes of a run.
+        expected (numpy.ndarray): sorted packed possible outcomes.
+    """
+    return keys[_merge(expected, keys) < 0]
+
+
+def count_mismatches(keys, counts, ref_keys, ref_counts):
+    """Return ``(key, count, reference count)`` of the outcomes that differ.
+
+    Outcomes missing from the reference have a reference count of 0;
+    outcomes of the reference that did not occur are not reported.
+    """
+    positions = _merge(ref_keys, keys)
+    reference = np.where(positions >= 0, ref_counts[np.maximum(positions, 0)], 0)
+    differ = reference != counts
+    return list(zip(keys[differ].tolist(), counts[differ].tolist(),
+                    reference[differ].tolist()))
+
+
+def key_text(value, width):
+    """Return the counts key text of a packed outcome, without separators."""
+    return format(int(value), "0%db" % width)
+
+
+def save_reference(path, counts):
+    """Save counts as sorted packed arrays (``numpy.savez``)."""
+    keys, values = pack_counts(counts)
+    width = len(next(iter(counts)).replace(" ", "")) if counts else 0
+    with open(path, "wb") as out:
+        np.savez(out, keys=keys, counts=values, width=width)
+
+
+def load_reference(path):
+    """Return the packed keys, counts and width of a saved reference.
+
+    ``.ref`` files holding a JSON counts dictionary are read too.
+    """
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            return data["keys"], data["counts"], int(data["width"])
+    with open(path) as source:
+        counts = json.load(source)
+    width = len(next(iter(counts)).replace(" ", "")) if counts else 0
+    return pack_counts(counts) + (width,)
+
+
+def verify_counts(counts, outcomes=None, reference=None):
+    """Check counts against possible outcomes or a reference.
+
+    Args:
+        counts (dict): counts of a run.
+        outcomes (list(str)): possible counts keys, from ``read_outcomes``.
+        reference (tuple): packed reference, from ``load_reference``.
+
+    Returns:
+        str: description of the first problems, or None if the counts agree.
+    """
+    keys, values = pack_counts(counts)
+    width = len(next(iter(counts)).replace(" ", "")) if counts else 0
+    if outcomes is not None:
+        expected = np.unique(pack_keys(outcomes))
+        wrong = unexpected(keys, expected)
+        if len(wrong):
+            return "%d unexpected outcomes, e.g. %s" % (
+                len(wrong), ", ".join(key_text(key, width) for key in wrong[:3]))
+        return None
+    mismatches = count_mismatches(keys, values, reference[0], reference[1])
+    if mismatches:
+        return "%d counts differ, e.g. %s" % (len(mismatches), ", ".join(
+            "%s: %d instead of %d" % (key_text(key, width), count, ref)
+            for key, count, ref in mismatches[:3]))
+    return None
@@ -0,0 +1,752 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Lexer and parser for OpenQASM 2.0.
+
+``parse_file`` and ``parse`` return a ``Program``: the list of statements with
+the include files spliced in, plus the register and gate tables. The parser
+also runs the semantic checks of the specification (declared names, argument
+counts, register bounds) and raises ``QasmError`` on the first problem.
+
+An include is textual: the included file is parsed in the context of the
+includer, so it may use the registers and gates declared before it. Files
+are parsed one after the other on a stack rather than by recursion, so
+include chains of any depth parse, and a file including itself raises
+``QasmError``.
+"""
+
+import math
+import os
+import re
+from collections import OrderedDict
+
+from .exceptions import QasmError
+from .nodes import (FUNCTIONS, Argument, Barrier, BinaryOp, Function, GateDeclaration,
+                    Measure, Negate, Operation, Parameter, Real, Register, Reset)
+
+LIBS_PATH = os.path.join(os.path.dirname(__file__), "libs")
+
+_TOKEN_RE = re.compile(r"""
+    (?P<space>[ \t\r\f\v]+)
+  | (?P<newline>\n)
+  | (?P<comment>//[^\n]*)
+  | (?P<real>(?:[0-9]+\.[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?|[0-9]+[eE][-+]?[0-9]+)
+  | (?P<int>[0-9]+)
+  | (?P<id>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<string>"[^"\n]*")
+  | (?P<symbol>->|==|[-+*/^()\[\]{},;])
+  | (?P<error>.)
+""", re.VERBOSE)
+
+KEYWORDS = frozenset(["OPENQASM", "include", "qreg", "creg", "gate", "opaque",
+                      "barrier", "measure", "reset", "if", "U", "CX", "pi"]) | \
+    frozenset(FUNCTIONS)
+
+_NAME_RE = re.compile(r"[a-z][A-Za-z0-9_]*$")
+
+# Token kinds
+ID = "id"
+INT = "int"
+REAL = "real"
+STRING = "string"
+SYMBOL = "symbol"
+EOF = "eof"
+
+
+def tokenize(source, filename=None):
+    """Return the list of ``(kind, text, line)`` tokens of ``source``.
+
+    Whitespace and comments are dropped. The list ends with an ``eof`` token.
+    """
+    tokens = []
+    append = tokens.append
+    line = 1
+    for match in _TOKEN_RE.finditer(source):
+        kind = match.lastgroup
+        if kind == "space" or kind == "comment":
+            continue
+        if kind == "newline":
+            line += 1
+            continue
+        text = match.group()
+        if kind == "error":
+            raise QasmError("illegal character '%s'" % text, filename, line)
+        if kind == "symbol" or kind == ID:
+            append((text if kind == "symbol" else ID, text, line))
+        else:
+            append((kind, text, line))
+    append((EOF, "", line))
+    return tokens
+
+
+class Program(object):
+    """A parsed OpenQASM program.
+
+    Attributes:
+        filename (str): source file, if any.
+        version (str): the ``OPENQASM`` version, or None if not declared.
+        statements (list): ``Register``, ``GateDeclaration``, ``Operation``,
+            ``Measure``, ``Reset`` and ``Barrier`` nodes in source order, with
+            the included files spliced in.
+        qregs (OrderedDict): quantum register sizes by name.
+        cregs (OrderedDict): classical register sizes by name.
+        gates (dict): ``GateDeclaration`` by name.
+        includes (list): absolute paths of the included files.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.version = None
+        self.statements = []
+        self.qregs = OrderedDict()
+        self.cregs = OrderedDict()
+        self.gates = {}
+        self.includes = []
+
+    @property
+    def num_qubits(self):
+        """Total number of qubits."""
+        return sum(self.qregs.values())
+
+    @property
+    def num_clbits(self):
+        """Total number of classical bits."""
+        return sum(self.cregs.values())
+
+    def qasm(self, prec=15):
+        """Return the program as OpenQASM, with the includes inlined."""
+        lines = ["OPENQASM %s;" % (self.version or "2.0")]
+        lines.extend(statement.qasm(prec) for statement in self.statements)
+        return "\n".join(lines) + "\n"
+
+
+class Parser(object):
+    """Recursive descent parser for one OpenQASM source.
+
+    Args:
+        source (str): OpenQASM text.
+        filename (str): path used for error messages and relative includes.
+        include_path (list): extra directories searched for include files,
+            after the directory of ``filename``. The bundled ``qelib1.inc`` is
+            always found.
+        program (Program): program to extend.
+
+    Attributes:
+        direct_includes (list): absolute paths of the files this source
+            includes itself, without the ones they include.
+    """
+
+    def __init__(self, source, filename=None, include_path=None, program=None):
+        self.filename = filename
+        self.tokens = tokenize(source, filename)
+        self.pos = 0
+        self.include_path = list(include_path or [])
+        self.program = program if program is not None else Program(filename)
+        self.direct_includes = []
+        self._root = os.path.abspath(filename) if filename is not None else None
+        # Include files being parsed, innermost last.
+        self._open = []
+        # The main source and the paths of the open include files.
+        self._active = set([self._root])
+        # Modification time of the include files read or taken from the cache.
+        self._mtimes = {}
+        self._serial = 0
+        # Serial of the file that declared each name; the main source is 0.
+        self._owner = {}
+        # Self-contained include files closed inside the outermost open one,
+        # as (path, statements start and end, includes start and end).
+        self._closed = []
+
+    # Token helpers
+
+    def _error(self, message, line=None):
+        if line is None:
+            line = self.tokens[self.pos][2]
+        return QasmError(message, self.filename, line)
+
+    def _peek(self):
+        return self.tokens[self.pos][0]
+
+    def _next(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def _expect(self, kind, what=None):
+        token = self.tokens[self.pos]
+        if token[0] != kind:
+            found = token[1] if token[0] != EOF else "end of file"
+            raise self._error("expected %s but found '%s'" % (what or "'%s'" % kind, found))
+        self.pos += 1
+        return token
+
+    def _expect_name(self, what):
+        token = self._expect(ID, what)
+        if token[1] in KEYWORDS:
+            raise self._error("'%s' is a reserved word" % token[1], token[2])
+        return token[1]
+
+    def _expect_int(self):
+        return int(self._expect(INT, "an integer")[1])
+
+    # Program
+
+    def parse(self):
+        """Parse the whole source and return the ``Program``."""
+        self._version()
+        while True:
+            if self._peek() != EOF:
+                self._statement()
+            elif self._open:
+                self._close_include()
+            else:
+                return self.program
+
+    def _version(self):
+        if self.tokens[self.pos][1] == "OPENQASM":
+            self._next()
+            token = self._next()
+            if token[0] not in (REAL, INT):
+                raise self._error("expected a version number after OPENQASM", token[2])
+            if not token[1].startswith("2"):
+                raise self._error("unsupported OpenQASM version %s" % token[1], token[2])
+            if self.program.version is None:
+                self.program.version = token[1]
+            self._expect(";")
+
+    def _statement(self):
+        token = self.tokens[self.pos]
+        text = token[1] if token[0] == ID else None
+        if text == "include":
+            self._include()
+        elif text == "qreg" or text == "creg":
+            self._register()
+        elif text == "gate":
+            self._gate()
+        elif text == "opaque":
+            self._opaque()
+        elif text == "barrier":
+            self._next()
+            args = self._arguments(self.program.qregs, "quantum register")
+            self._expect(";")
+            self.program.statements.append(Barrier(args, token[2]))
+        elif text == "if":
+            self._if()
+        else:
+            self._quantum_op(None)
+
+    def _include(self):
+        line = self._next()[2]
+        name = self._expect(STRING, "a file name")[1][1:-1]
+        self._expect(";")
+        path = self._find_include(name, line)
+        if path in self._active:
+            active = [self._root] + [include.path for include in self._open]
+            chain = active[active.index(path):] + [path]
+            raise self._error("include cycle: " + " -> ".join(
+                os.path.basename(each) for each in chain), line)
+        if not self._open:
+            self.direct_includes.append(path)
+        self.program.includes.append(path)
+        cached = _cached_include(path, self.include_path, self._active)
+        if cached is not None:
+            program = cached.program()
+            self._mtimes.update((name, cached.mtimes[name]) for name in cached.files())
+            self.program.includes.extend(program.includes)
+            self._splice(program)
+            return
+        self._mtimes[path] = os.path.getmtime(path)
+        with open(path) as include_file:
+            tokens = tokenize(include_file.read(), path)
+        self._serial += 1
+        self._open.append(_Include(path, self._serial, self, len(self.program.statements),
+                                   len(self.program.includes)))
+        self._active.add(path)
+        self.filename, self.tokens, self.pos = path, tokens, 0
+        self._version()
+
+    def _close_include(self):
+        """Go back to the includer at the end of an include file.
+
+        An include file using nothing declared outside of it parses the same
+        way in any context: it is cached for the next programs including it.
+        Its statements are only recorded as a range of the program lists here,
+        so that closing every file of a long include chain stays linear.
+        """
+        include = self._open.pop()
+        self._active.discard(include.path)
+        self.filename, self.tokens, self.pos = include.outer
+        if self._open:
+            outer = self._open[-1]
+            outer.first_used = min(outer.first_used, include.first_used)
+        if include.first_used < include.serial:
+            _INCLUDE_CACHE.pop((include.path, tuple(self.include_path)), None)
+        else:
+            self._closed.append((include.path, include.statements, len(self.program.statements),
+                                 include.includes, len(self.program.includes)))
+        if not self._open and self._closed:
+            self._cache_closed(include)
+
+    def _cache_closed(self, outermost):
+        """Cache the self-contained files closed while ``outermost`` was open.
+
+        They share one copy of the statements and includes of ``outermost``,
+        which keeps the cache independent of later changes to the program.
+        """
+        statements = self.program.statements[outermost.statements:]
+        includes = self.program.includes[outermost.includes:]
+        mtimes = dict((name, self._mtimes[name]) for name in [outermost.path] + includes)
+        for path, first, last, first_include, last_include in self._closed:
+            _INCLUDE_CACHE[path, tuple(self.include_path)] = _CachedInclude(
+                path, statements, (first - outermost.statements, last - outermost.statements),
+                includes, (first_include - outermost.includes, last_include - outermost.includes),
+                mtimes)
+        self._closed = []
+
+    def _use(self, name):
+        """Note that the current file refers to the declared ``name``."""
+        if self._open:
+            include = self._open[-1]
+            include.first_used = min(include.first_used, self._owner.get(name, include.serial))
+
+    def _find_include(self, name, line):
+        directories = []
+        if self.filename is not None:
+            directories.append(os.path.dirname(os.path.abspath(self.filename)))
+        directories.extend(self.include_path)
+        directories.append(LIBS_PATH)
+        for directory in directories:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                return os.path.abspath(path)
+        raise self._error("include file '%s' not found" % name, line)
+
+    def _splice(self, included):
+        """Append the statements of an included program.
+
+        The included program is valid on its own, so only clashes with what
+        is declared here need checking; its tables are merged in bulk, which
+        keeps long include chains linear.
+        """
+        program = self.program
+        declared = set(program.gates).union(program.qregs, program.cregs)
+        tables = (included.gates, included.qregs, included.cregs)
+        if not all(declared.isdisjoint(table) for table in tables):
+            # Report the clash at the statement that causes it.
+            for statement in included.statements:
+                self._add(statement)
+            return
+        program.gates.update(included.gates)
+        program.qregs.update(included.qregs)
+        program.cregs.update(included.cregs)
+        program.statements.extend(included.statements)
+        for table in tables:
+            self._owner.update(dict.fromkeys(table, self._serial))
+
+    def _add(self, statement):
+        """Declare what ``statement`` introduces and append it."""
+        program = self.program
+        if isinstance(statement, (Register, GateDeclaration)):
+            name = statement.name
+            if name in program.qregs or name in program.cregs or name in program.gates:
+                raise self._error("'%s' is already declared" % name, statement.line)
+            self._owner[name] = self._serial
+            if isinstance(statement, GateDeclaration):
+                program.gates[name] = statement
+            elif statement.kind == "qreg":
+                program.qregs[name] = statement.size
+            else:
+                program.cregs[name] = statement.size
+        program.statements.append(statement)
+
+    def _register(self):
+        _, kind, line = self._next()
+        name = self._expect_name("a register name")
+        self._expect("[")
+        size = self._expect_int()
+        self._expect("]")
+        self._expect(";")
+        if size <= 0:
+            raise self._error("register '%s' must have a positive size" % name, line)
+        self._add(Register(kind, name, size, line))
+
+    # Gate declarations
+
+    def _gate_signature(self):
+        name = self._expect_name("a gate name")
+        if not _NAME_RE.match(name):
+            raise self._error("gate names must start with a lowercase letter")
+        params = []
+        if self._peek() == "(":
+            self._next()
+            if self._peek() != ")":
+                params = self._name_list("a parameter name")
+            self._expect(")")
+        qubits = self._name_list("a qubit name")
+        for names, what in ((params, "parameter"), (qubits, "qubit")):
+            if len(set(names)) != len(names):
+                raise self._error("duplicate %s name in gate '%s'" % (what, name))
+        return name, params, qubits
+
+    def _name_list(self, what):
+        names = [self._expect_name(what)]
+        while self._peek() == ",":
+            self._next()
+            names.append(self._expect_name(what))
+        return names
+
+    def _opaque(self):
+        line = self._next()[2]
+        name, params, qubits = self._gate_signature()
+        self._expect(";")
+        self._add(GateDeclaration(name, params, qubits, None, line))
+
+    def _gate(self):
+        line = self._next()[2]
+        name, params, qubits = self._gate_signature()
+        self._expect("{")
+        body = []
+        scope = frozenset(params)
+        while self._peek() != "}":
+            token = self.tokens[self.pos]
+            if token[0] == EOF:
+                raise self._error("missing '}' at the end of gate '%s'" % name)
+            if token[1] == "barrier":
+                self._next()
+                args = [Argument(each) for each in self._name_list("a qubit name")]
+                self._expect(";")
+                statement = Barrier(args, token[2])
+            else:
+                gate_name, gate_params, args = self._gate_call(scope)
+                statement = Operation(gate_name, gate_params, [Argument(arg) for arg in args],
+                                      None, token[2])
+            for arg in statement.args:
+                if arg.name not in qubits:
+                    raise self._error("'%s' is not an argument of gate '%s'" % (arg.name, name),
+                                      token[2])
+            if len(set(arg.name for arg in statement.args)) != len(statement.args):
+                raise self._error("duplicate qubit argument", token[2])
+            body.append(statement)
+        self._next()
+        self._add(GateDeclaration(name, params, qubits, body, line))
+
+    def _gate_call(self, scope):
+        """Parse ``name(params) a,b;`` inside a gate body."""
+        line = self.tokens[self.pos][2]
+        name = self._next()[1]
+        params = self._parameters(scope)
+        args = self._name_list("a qubit name")
+        self._expect(";")
+        self._check_gate(name, len(params), len(args), line)
+        return name, params, args
+
+    def _check_gate(self, name, num_params, num_qubits, line):
+        if name == "U":
+            expected = (3, 1)
+        elif name == "CX":
+            expected = (0, 2)
+        else:
+            gate = self.program.gates.get(name)
+            if gate is None:
+                raise self._error("gate '%s' is not defined" % name, line)
+            self._use(name)
+            expected = (len(gate.params), len(gate.qubits))
+        if expected[0] != num_params:
+            raise self._error("gate '%s' takes %d parameter(s), %d given"
+                              % (name, expected[0], num_params), line)
+        if expected[1] != num_qubits:
+            raise self._error("gate '%s' takes %d qubit(s), %d given"
+                              % (name, expected[1], num_qubits), line)
+
+    # Quantum operations
+
+    def _if(self):
+        line = self._next()[2]
+        self._expect("(")
+        creg = self._expect_name("a classical register")
+        if creg not in self.program.cregs:
+            raise self._error("'%s' is not a classical register" % creg, line)
+        self._use(creg)
+        self._expect("==")
+        value = self._expect_int()
+        self._expect(")")
+        self._quantum_op((creg, value))
+
+    def _quantum_op(self, condition):
+        token = self.tokens[self.pos]
+        if token[0] != ID:
+            raise self._error("unexpected '%s'" % (token[1] or "end of file"))
+        line = token[2]
+        program = self.program
+        if token[1] == "measure":
+            self._next()
+            qubit = self._argument(program.qregs, "quantum register")
+            self._expect("->")
+            clbit = self._argument(program.cregs, "classical register")
+            self._expect(";")
+            if self._size(qubit, program.qregs) != self._size(clbit, program.cregs):
+                raise self._error("measure arguments have different sizes", line)
+            program.statements.append(Measure(qubit, clbit, condition, line))
+        elif token[1] == "reset":
+            self._next()
+            qubit = self._argument(program.qregs, "quantum register")
+            self._expect(";")
+            program.statements.append(Reset(qubit, condition, line))
+        else:
+            name = self._next()[1]
+            params = [self._constant(param, line) for param in self._parameters(frozenset())]
+            args = self._arguments(program.qregs, "quantum register")
+            self._expect(";")
+            self._check_gate(name, len(params), len(args), line)
+            self._check_broadcast(args, line)
+            program.statements.append(Operation(name, params, args, condition, line))
+
+    @staticmethod
+    def _size(arg, registers):
+        return registers[arg.name] if arg.index is None else 1
+
+    def _check_broadcast(self, args, line):
+        sizes = set(self.program.qregs[arg.name] for arg in args if arg.index is None)
+        if len(sizes) > 1:
+            raise self._error("register arguments have different sizes", line)
+        seen = set()
+        for arg in args:
+            if arg.index is None:
+                bits = [(arg.name, index) for index in range(self.program.qregs[arg.name])]
+            else:
+                bits = [(arg.name, arg.index)]
+            for bit in bits:
+                if bit in seen:
+                    raise self._error("duplicate qubit argument %s[%d]" % bit, line)
+                seen.add(bit)
+
+    def _arguments(self, registers, what):
+        args = [self._argument(registers, what)]
+        while self._peek() == ",":
+            self._next()
+            args.append(self._argument(registers, what))
+        return args
+
+    def _argument(self, registers, what):
+        line = self.tokens[self.pos][2]
+        name = self._expect(ID, "a " + what)[1]
+        if name not in registers:
+            raise self._error("'%s' is not a %s" % (name, what), line)
+        self._use(name)
+        index = None
+        if self._peek() == "[":
+            self._next()
+            index = self._expect_int()
+            self._expect("]")
+            if index >= registers[name]:
+                raise self._error("index %d out of range for %s[%d]"
+                                  % (index, name, registers[name]), line)
+        return Argument(name, index)
+
+    # Expressions
+
+    def _constant(self, expression, line):
+        """Fold a parameter without free names, keeping its text."""
+        if isinstance(expression, Real):
+            return expression
+        try:
+            return Real(expression.evaluate(), expression.qasm())
+        except (ArithmeticError, ValueError) as err:
+            raise self._error("invalid parameter %s: %s" % (expression.qasm(), err), line)
+
+    def _parameters(self, scope):
+        if self._peek() != "(":
+            return []
+        self._next()
+        params = []
+        if self._peek() != ")":
+            params.append(self._expression(scope))
+            while self._peek() == ",":
+                self._next()
+                params.append(self._expression(scope))
+        self._expect(")")
+        return params
+
+    def _expression(self, scope):
+        left = self._term(scope)
+        while self._peek() in ("+", "-"):
+            operator = self._next()[0]
+            left = BinaryOp(operator, left, self._term(scope))
+        return left
+
+    def _term(self, scope):
+        left = self._unary(scope)
+        while self._peek() in ("*", "/"):
+            operator = self._next()[0]
+            left = BinaryOp(operator, left, self._unary(scope))
+        return left
+
+    def _unary(self, scope):
+        if self._peek() == "-":
+            self._next()
+            return Negate(self._unary(scope))
+        if self._peek() == "+":
+            self._next()
+            return self._unary(scope)
+        return self._power(scope)
+
+    def _power(self, scope):
+        base = self._atom(scope)
+        if self._peek() == "^":
+            self._next()
+            return BinaryOp("^", base, self._unary(scope))
+        return base
+
+    def _atom(self, scope):
+        kind, text, line = self._next()
+        if kind == INT or kind == REAL:
+            return Real(float(text), text)
+        if kind == "(":
+            expression = self._expression(scope)
+            self._expect(")")
+            return expression
+        if kind == ID:
+            if text == "pi":
+                return Real(math.pi, "pi")
+            if text in FUNCTIONS:
+                self._expect("(")
+                argument = self._expression(scope)
+                self._expect(")")
+                return Function(text, argument)
+            if text in scope:
+                return Parameter(text)
+            raise self._error("unknown parameter '%s'" % text, line)
+        raise self._error("unexpected '%s' in expression" % (text or "end of file"), line)
+
+
+class _Include(object):
+    """An include file being parsed in the context of its includer.
+
+    Attributes:
+        outer: filename, tokens and position of the includer.
+        serial (int): number of the file; the files it includes get larger
+            ones while it is open.
+        first_used (int): smallest serial of the files declaring the names
+            this file and its includes used.
+        statements, includes (int): lengths of the program lists when the
+            file started.
+    """
+
+    def __init__(self, path, serial, parser, statements, includes):
+        self.path = path
+        self.serial = serial
+        self.outer = (parser.filename, parser.tokens, parser.pos)
+        self.first_used = serial
+        self.statements = statements
+        self.includes = includes
+
+
+class _CachedInclude(object):
+    """A parsed self-contained include file.
+
+    The statements and includes are ranges of lists shared with the other
+    files parsed along with it.
+
+    Attributes:
+        path (str): absolute path of the file.
+        mtimes (dict): modification time of the file, of every file it
+            includes and possibly of other files parsed along with it.
+    """
+
+    def __init__(self, path, statements, statement_range, includes, include_range, mtimes):
+        self.path = path
+        self.mtimes = mtimes
+        self._statements = statements
+        self._statement_range = statement_range
+        self._includes = includes
+        self._include_range = include_range
+        self._program = None
+
+    def files(self):
+        """Return the path of the file and of the files it includes."""
+        first, last = self._include_range
+        return [self.path] + self._includes[first:last]
+
+    def program(self):
+        """Return the file as a ``Program``, built on first use."""
+        if self._program is None:
+            program = Program(self.path)
+            first, last = self._statement_range
+            program.statements = self._statements[first:last]
+            program.includes = self.files()[1:]
+            for statement in program.statements:
+                if isinstance(statement, GateDeclaration):
+                    program.gates[statement.name] = statement
+                elif isinstance(statement, Register):
+                    table = program.qregs if statement.kind == "qreg" else program.cregs
+                    table[statement.name] = statement.size
+            self._program = program
+        return self._program
+
+
+# Parsed self-contained include files by path and include search path, as
+# ``_CachedInclude``. They only depend on their own text and the files they
+# include, which the search path picks, so every program that includes them
+# with the same search path can share the nodes while none of those files has
+# changed.
+_INCLUDE_CACHE = {}
+
+
+def clear_include_cache():
+    """Forget the parsed include files, e.g. to time a cold parse."""
+    _INCLUDE_CACHE.clear()
+
+
+def _cached_include(path, include_path, active):
+    """Return the cache entry of ``path`` for ``include_path`` if it is still valid.
+
+    An entry is stale when one of its files has changed, or when it includes
+    one of the ``active`` files, which must then be reported as a cycle.
+    """
+    entry = _INCLUDE_CACHE.get((path, tuple(include_path)))
+    if entry is None:
+        return None
+    files = entry.files()
+    if not active.isdisjoint(files):
+        return None
+    try:
+        if any(os.path.getmtime(name) != entry.mtimes[name] for name in files):
+            return None
+    except OSError:
+        return None
+    return entry
+
+
+def parse(source, filename=None, include_path=None):
+    """Parse OpenQASM text and return a ``Program``.
+
+    Args:
+        source (str): OpenQASM text.
+        filename (str): path used for messages and to resolve includes.
+        include_path (list): extra directories searched for include files.
+
+    Raises:
+        QasmError: if the source is not valid OpenQASM 2.0.
+    """
+    return Parser(source, filename, include_path).parse()
+
+
+def parse_file(path, include_path=None):
+    """Parse the OpenQASM file at ``path`` and return a ``Program``."""
+    with open(path) as source_file:
+        source = source_file.read()
+    return parse(source, path, include_path)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""ASAP layering of circuits into moments.
+
+``asap_layers`` puts every instruction of a ``ColumnarCircuit`` in the
+earliest layer where all the instructions it depends on are already done:
+
+* gates, measurements and resets wait for the previous instructions on their
+  qubits;
+* instructions with an ``if`` wait for the measurements into the condition
+  register; measurements wait for earlier measurements into the same bit and
+  for earlier instructions whose condition reads the register of that bit;
+* a barrier has no layer of its own but aligns its qubits, so nothing after
+  it starts before the latest of them.
+
+Instructions in one layer act on disjoint qubits, so a simulator can apply
+the single-qubit gates of a layer in one batched operation.
+
+Example run:
+  python -m openqasm.schedule benchmarks/quantum_volume/quantum_volume_n5_d2.qasm -w
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from .columnar import BARRIER, MEASURE, load
+from .corpus import LevelTracker
+from .exceptions import QasmError
+
+
+class Layers(object):
+    """Instructions of a circuit grouped by ASAP layer.
+
+    Attributes:
+        circuit (ColumnarCircuit): the scheduled circuit.
+        layer (numpy.ndarray): int32 layer of each row of the circuit. For a
+            barrier it is the first layer after the barrier.
+        order (numpy.ndarray): rows other than barriers, sorted by layer and
+            by program order within a layer.
+        offsets (numpy.ndarray): rows ``order[offsets[i]:offsets[i + 1]]``
+            make layer ``i``.
+    """
+
+    def __init__(self, circuit, layer):
+        self.circuit = circuit
+        self.layer = np.asarray(layer, dtype=np.int32)
+        operations = np.flatnonzero(circuit.opcode != BARRIER)
+        self.order = operations[np.argsort(self.layer[operations], kind="stable")]
+        depth = int(self.layer[operations].max()) + 1 if len(operations) else 0
+        counts = np.bincount(self.layer[operations], minlength=depth)
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self._single = (circuit.qubit1 < 0) & circuit.is_gate()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def depth(self):
+        """Number of layers."""
+        return len(self)
+
+    def widths(self):
+        """Return the number of instructions in each layer."""
+        return np.diff(self.offsets)
+
+    def rows(self, index):
+        """Return the rows of the circuit in layer ``index``."""
+        return self.order[self.offsets[index]:self.offsets[index + 1]]
+
+    def split(self, index):
+        """Return the rows of layer ``index`` as single- and multi-qubit parts.
+
+        The first array holds the single-qubit gates of the layer, which act
+        on distinct qubits and can be applied together; the second holds the
+        rest (two-qubit gates, measurements and resets).
+        """
+        rows = self.rows(index)
+        single = self._single[rows]
+        return rows[single], rows[~single]
+
+    def arrays(self):
+        """Return the layering as a dict of arrays, e.g. for ``numpy.savez``."""
+        return {"layer": self.layer, "order": self.order, "offsets": self.offsets,
+                "widths": self.widths()}
+
+
+def asap_layers(circuit):
+    """Return the ASAP ``Layers`` of a ``ColumnarCircuit``.
+
+    The layers come from ``openqasm.corpus.LevelTracker``, which the depth
+    figures of the corpus tools use as well.
+    """
+    tracker = LevelTracker(circuit.qregs.items(), circuit.cregs.items())
+    place = tracker.place
+    layer = [0] * len(circuit)
+    rows = zip(circuit.opcode.tolist(), circuit.qubit0.tolist(), circuit.qubit1.tolist(),
+               circuit.clbit.tolist(), circuit.cond_reg.tolist())
+    for row, (code, qubit0, qubit1, clbit, cond_reg) in enumerate(rows):
+        if code == BARRIER:
+            layer[row] = place(circuit.barriers[row].tolist(), barrier=True)
+        else:
+            qubits = (qubit0,) if qubit1 < 0 else (qubit0, qubit1)
+            layer[row] = place(qubits, clbit if code == MEASURE else -1, cond_reg)
+    return Layers(circuit, layer)
+
+
+def main(argv=None):
+    """Print the ASAP depth and layer widths of OpenQASM files."""
+    parser = argparse.ArgumentParser(
+        description="Schedule OpenQASM circuits in ASAP layers and report their widths.")
+    parser.add_argument("qasm", nargs="+", help="OpenQASM files")
+    parser.add_argument("-w", "--widths", action="store_true",
+                        help="print the width of every layer")
+    parser.add_argument("-o", "--output", default=None,
+                        help="save the layer arrays to this .npz file (one input only)")
+    args = parser.parse_args(argv)
+
+    if args.output and len(args.qasm) > 1:
+        parser.error("--output needs a single input file")
+    for path in args.qasm:
+        try:
+            layers = asap_layers(load(path))
+        except QasmError as err:
+            print("Error: " + str(err), file=sys.stderr)
+            return 1
+        widths = layers.widths()
+        print("%s,depth=%d,max_width=%d,mean_width=%.2f"
+              % (path, layers.depth, widths.max() if len(widths) else 0,
+                 widths.mean() if len(widths) else 0))
+        if args.widths:
+            print(" ".join(str(width) for width in widths))
+        if args.output:
+            np.savez(args.output, **layers.arrays())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
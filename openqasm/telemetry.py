@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Metrics of benchmark runs for Prometheus or an OpenTelemetry collector.
+
+A ``Telemetry`` keeps counters, gauges and histograms, each sample keyed by
+its labels (suite, backend, n, depth, phase...). ``phase`` times a block of
+work, records the resident memory after it and flushes every exporter, so a
+long sweep shows up on dashboards while it runs:
+
+* ``PrometheusTextfile`` rewrites a ``.prom`` file atomically, for the
+  node_exporter textfile collector;
+* ``OTLPExporter`` posts OTLP/HTTP JSON to a collector, by default
+  ``http://localhost:4318/v1/metrics``.
+
+Only the standard library is used.
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# Upper bounds of the duration histogram buckets, in seconds.
+DURATION_BUCKETS = (0.001, 0.01, 0.1, 1.0, 10.0, 60.0, 300.0, 1800.0, 3600.0)
+OTLP_ENDPOINT = "http://localhost:4318/v1/metrics"
+
+
+def current_rss():
+    """Return the resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        # Peak rather than current size, in kilobytes on Linux and bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Metric(object):
+    """One metric and its samples by label set.
+
+    Args:
+        name (str): metric name.
+        kind (str): ``counter``, ``gauge`` or ``histogram``.
+        help_text (str): description.
+        buckets (tuple): histogram bucket upper bounds.
+    """
+
+    def __init__(self, name, kind, help_text, buckets=DURATION_BUCKETS):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        # Counters and gauges: value. Histograms: [bucket counts, sum, count].
+        self.samples = {}
+
+    def add(self, labels, value):
+        """Add ``value`` to a counter."""
+        self.samples[labels] = self.samples.get(labels, 0) + value
+
+    def set(self, labels, value):
+        """Set a gauge."""
+        self.samples[labels] = value
+
+    def observe(self, labels, value):
+        """Record one value in a histogram."""
+        sample = self.samples.get(labels)
+        if sample is None:
+            sample = self.samples[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        sample[0][index] += 1
+        sample[1] += value
+        sample[2] += 1
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join('%s="%s"' % (key, str(value).replace("\\", "\\\\")
+                                       .replace('"', '\\"').replace("\n", "\\n"))
+                          for key, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def prometheus_text(metrics):
+    """Return metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in metrics:
+        lines.append("# HELP %s %s" % (metric.name, metric.help))
+        lines.append("# TYPE %s %s" % (metric.name, metric.kind))
+        for labels, sample in sorted(metric.samples.items()):
+            if metric.kind != "histogram":
+                lines.append("%s%s %s" % (metric.name, _label_text(labels), _number(sample)))
+                continue
+            counts, total, count = sample
+            cumulative = 0
+            for bound, bucket in zip(metric.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                lines.append("%s_bucket%s %d" % (metric.name, _label_text(
+                    labels, [("le", _number(bound))]), cumulative))
+            lines.append("%s_sum%s %s" % (metric.name, _label_text(labels), repr(total)))
+            lines.append("%s_count%s %d" % (metric.name, _label_text(labels), count))
+    return "\n".join(lines) + "\n"
+
+
+def otlp_payload(metrics, start_time, service="qasm-bench"):
+    """Return metrics as an OTLP ``ExportMetricsServiceRequest`` JSON object.
+
+    Sums and histograms are cumulative since ``start_time`` (seconds).
+    """
+    now = str(int(time.time() * 1e9))
+    start = str(int(start_time * 1e9))
+    exported = []
+    for metric in metrics:
+        points = []
+        for labels, sample in sorted(metric.samples.items()):
+            point = {
+                "attributes": [{"key": key, "value": {"stringValue": str(value)}}
+                               for key, value in labels],
+                "startTimeUnixNano": start,
+                "timeUnixNano": now,
+            }
+            if metric.kind == "histogram":
+                point.update({"count": str(sample[2]), "sum": sample[1],
+                              "bucketCounts": [str(count) for count in sample[0]],
+                              "explicitBounds": list(metric.buckets)})
+            else:
+                point["asDouble"] = float(sample)
+            points.append(point)
+        entry = {"name": metric.name, "description": metric.help}
+        if metric.kind == "counter":
+            entry["sum"] = {"dataPoints": points, "aggregationTemporality": 2,
+                            "isMonotonic": True}
+        elif metric.kind == "gauge":
+            entry["gauge"] = {"dataPoints": points}
+        else:
+            entry["histogram"] = {"dataPoints": points, "aggregationTemporality": 2}
+        exported.append(entry)
+    return {"resourceMetrics": [{
+        "resource": {"attributes": [{"key": "service.name",
+                                     "value": {"stringValue": service}}]},
+        "scopeMetrics": [{"scope": {"name": "openqasm.telemetry"}, "metrics": exported}],
+    }]}
+
+
+class PrometheusTextfile(object):
+    """Write the metrics to a file read by the node_exporter textfile collector."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, telemetry):
+        """Replace the file with the current metrics."""
+        temp = self.path + ".%d.tmp" % os.getpid()
+        with open(temp, "w") as out:
+            out.write(prometheus_text(telemetry.metrics.values()))
+        os.replace(temp, self.path)
+
+
+class OTLPExporter(object):
+    """Post the metrics to an OpenTelemetry collector as OTLP/HTTP JSON.
+
+    A collector that cannot be reached is reported once on stderr and does
+    not stop the benchmark.
+    """
+
+    def __init__(self, endpoint=OTLP_ENDPOINT, timeout=2.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.failures = 0
+
+    def export(self, telemetry):
+        """Post the current metrics."""
+        # urllib.request pulls in http, email and ssl: only load it when used.
+        import urllib.request
+        body = json.dumps(otlp_payload(telemetry.metrics.values(), telemetry.start_time))
+        request = urllib.request.Request(self.endpoint, body.encode(),
+                                         {"Content-Type": "application/json"})
+        try:
+            urllib.request.urlopen(request, timeout=self.timeout).close()
+        except (OSError, ValueError) as err:
+            if not self.failures:
+                print("telemetry: cannot post to %s: %s" % (self.endpoint, err),
+                      file=sys.stderr)
+            self.failures += 1
+
+
+class Telemetry(object):
+    """Metrics of a benchmark session and where to send them.
+
+    Args:
+        exporters (list): ``PrometheusTextfile`` or ``OTLPExporter``.
+        prefix (str): prefix of the metric names.
+    """
+
+    def __init__(self, exporters=(), prefix="qasmbench"):
+        self.exporters = list(exporters)
+        self.prefix = prefix
+        self.metrics = {}
+        self.start_time = time.time()
+
+    def metric(self, name, kind, help_text):
+        """Return the metric ``name``, creating it on first use."""
+        full_name = self.prefix + "_" + name
+        metric = self.metrics.get(full_name)
+        if metric is None:
+            metric = self.metrics[full_name] = Metric(full_name, kind, help_text)
+        return metric
+
+    @staticmethod
+    def _key(labels):
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name, value=1, help_text="", **labels):
+        """Add to a counter."""
+        self.metric(name, "counter", help_text).add(self._key(labels), value)
+
+    def set(self, name, value, help_text="", **labels):
+        """Set a gauge."""
+        self.metric(name, "gauge", help_text).set(self._key(labels), value)
+
+    def observe(self, name, value, help_text="", **labels):
+        """Record a value in a histogram."""
+        self.metric(name, "histogram", help_text).observe(self._key(labels), value)
+
+    @contextmanager
+    def phase(self, phase, **labels):
+        """Time a block of work and export the metrics after it.
+
+        Records ``phase_duration_seconds`` and ``rss_bytes`` with the given
+        labels plus ``phase``; a block that raises is counted in
+        ``phase_errors_total``.
+        """
+        start = time.time()
+        try:
+            yield
+        except BaseException:
+            self.inc("phase_errors_total", help_text="Phases that raised an error.",
+                     phase=phase, **labels)
+            raise
+        finally:
+            self.observe("phase_duration_seconds", time.time() - start,
+                         "Duration of each phase of a benchmark run.", phase=phase, **labels)
+            self.set("rss_bytes", current_rss(), "Resident memory after the phase.",
+                     phase=phase, **labels)
+            self.flush()
+
+    def flush(self):
+        """Send the metrics to every exporter."""
+        if not self.exporters:
+            return
+        self.set("last_flush_timestamp_seconds", time.time(),
+                 "Time of the last export, to alert on stalled runs.")
+        for exporter in self.exporters:
+            exporter.export(self)
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Gate expansion with memoized templates.
+
+Each gate definition is compiled once into a ``Template``: the flat list of
+basis operations its body expands to, with the parameters still symbolic and
+the qubits given as positions in the gate's argument list. The parameter
+expressions of a template are folded and compiled into a single function (see
+``openqasm.compiler``). Applying a gate is then one call of that function and
+a pass that maps the positions to global qubits, so unrolling a program takes
+time linear in the size of its output no matter how deep the gate
+definitions nest.
+
+Example run:
+  python -m openqasm.unroller examples/generic/bigadder.qasm -o bigadder_flat.qasm
+"""
+
+import argparse
+import sys
+
+from .circuit import Circuit, Instruction
+from .compiler import compile_expressions, evaluate_batch
+from .exceptions import QasmError
+from .nodes import Barrier, GateDeclaration, Measure, Operation, Parameter, Register, Reset
+from .parser import parse_file
+
+# The primitives of OpenQASM 2.0.
+PRIMITIVES = frozenset(["U", "CX"])
+
+
+class Template(object):
+    """A gate definition expanded down to the basis.
+
+    Attributes:
+        name (str): gate name.
+        params (tuple(str)): formal parameter names.
+        num_qubits (int): number of qubit arguments.
+        ops (list): ``(name, params, qubits)`` triples where ``params`` are
+            folded expressions over ``self.params`` and ``qubits`` are
+            positions in the gate's argument list. Barriers use the name
+            ``barrier``.
+        function (callable): compiled function from the gate parameters to
+            the flat tuple of the parameters of all the ops.
+    """
+
+    __slots__ = ("name", "params", "num_qubits", "ops", "function", "_layout")
+
+    def __init__(self, name, params, num_qubits, ops):
+        self.name = name
+        self.params = tuple(params)
+        self.num_qubits = num_qubits
+        self.ops = [(op_name, tuple(param.fold() for param in op_params), positions)
+                    for op_name, op_params, positions in ops]
+        self._layout = []
+        expressions = []
+        for op_name, op_params, positions in self.ops:
+            start = len(expressions)
+            expressions.extend(op_params)
+            self._layout.append((op_name, start, len(expressions), positions))
+        self.function = compile_expressions(expressions, self.params)
+
+    def expressions(self):
+        """Return the parameters of all the ops as one flat list."""
+        return [param for _, params, _ in self.ops for param in params]
+
+    def bind(self, values):
+        """Return the flat op parameters of many applications at once.
+
+        Args:
+            values (array): one row of gate parameter values per application.
+
+        Returns:
+            numpy.ndarray: one row per application, in the order of ``function``.
+        """
+        return evaluate_batch(self.expressions(), self.params, values)
+
+    def expand(self, flat, qubits, condition=None):
+        """Return the instructions of one application of the gate.
+
+        Args:
+            flat (tuple(float)): op parameters, as returned by ``function``.
+            qubits (tuple(int)): global qubits the gate is applied to.
+            condition (tuple): ``(creg, value)`` copied to every instruction.
+        """
+        return [Instruction(name, flat[start:stop],
+                            tuple(qubits[position] for position in positions), (), condition)
+                for name, start, stop, positions in self._layout]
+
+    def instantiate(self, values, qubits, condition=None):
+        """Return the instructions of the gate applied with parameter ``values``."""
+        return self.expand(self.function(*values), qubits, condition)
+
+
+class Unroller(object):
+    """Expand the gates of a program down to a basis.
+
+    Args:
+        gates (dict): ``GateDeclaration`` by name, usually ``Program.gates``.
+        basis (iterable(str)): gate names kept as they are. ``U`` and ``CX``
+            and the opaque gates are always kept.
+    """
+
+    def __init__(self, gates, basis=()):
+        self.gates = gates
+        self.basis = frozenset(basis) | PRIMITIVES
+        self._templates = {}
+        self.hits = 0
+        self.misses = 0
+
+    def is_basis(self, name):
+        """Return True if gates called ``name`` are not expanded."""
+        if name in self.basis:
+            return True
+        gate = self.gates.get(name)
+        return gate is not None and gate.opaque
+
+    def template(self, name):
+        """Return the memoized ``Template`` of the gate called ``name``."""
+        template = self._templates.get(name)
+        if template is not None:
+            self.hits += 1
+            return template
+        self.misses += 1
+        gate = self.gates.get(name)
+        if gate is None:
+            if name == "U":
+                gate = GateDeclaration("U", ("theta", "phi", "lambda"), ("q",))
+            elif name == "CX":
+                gate = GateDeclaration("CX", (), ("c", "t"))
+            else:
+                raise QasmError("gate '%s' is not defined" % name)
+        if self.is_basis(name):
+            ops = [(name, tuple(Parameter(param) for param in gate.params),
+                    tuple(range(len(gate.qubits))))]
+        else:
+            ops = self._expand_body(gate)
+        template = Template(name, gate.params, len(gate.qubits), ops)
+        self._templates[name] = template
+        return template
+
+    def _expand_body(self, gate):
+        ops = []
+        for statement in gate.body:
+            positions = tuple(gate.qubits.index(arg.name) for arg in statement.args)
+            if isinstance(statement, Barrier):
+                ops.append(("barrier", (), positions))
+            elif self.is_basis(statement.name):
+                ops.append((statement.name, statement.params, positions))
+            else:
+                inner = self.template(statement.name)
+                mapping = dict(zip(inner.params, statement.params))
+                for name, params, inner_positions in inner.ops:
+                    ops.append((name, tuple(param.substitute(mapping).fold() for param in params),
+                                tuple(positions[position] for position in inner_positions)))
+        return ops
+
+    def unroll(self, program):
+        """Return the ``Circuit`` of ``program`` expanded down to the basis."""
+        qregs = [(name, size) for name, size in program.qregs.items()]
+        cregs = [(name, size) for name, size in program.cregs.items()]
+        circuit = Circuit(qregs, cregs,
+                          gates=[(name, gate) for name, gate in program.gates.items()
+                                 if self.is_basis(name)])
+        qubit_offsets = circuit.qubit_offsets()
+        clbit_offsets = circuit.clbit_offsets()
+        extend = circuit.instructions.extend
+        for statement in program.statements:
+            if isinstance(statement, (Register, GateDeclaration)):
+                continue
+            if isinstance(statement, Operation):
+                template = self.template(statement.name)
+                try:
+                    flat = template.function(*[param.evaluate() for param in statement.params])
+                except (ArithmeticError, ValueError) as err:
+                    raise QasmError("invalid parameters for gate '%s': %s" % (statement.name, err),
+                                    program.filename, statement.line)
+                for qubits in broadcast(statement.args, program.qregs, qubit_offsets):
+                    extend(template.expand(flat, qubits, statement.condition))
+            elif isinstance(statement, Measure):
+                qubits = argument_bits(statement.qubit, program.qregs, qubit_offsets)
+                clbits = argument_bits(statement.clbit, program.cregs, clbit_offsets)
+                extend(Instruction("measure", (), (qubit,), (clbit,), statement.condition)
+                       for qubit, clbit in zip(qubits, clbits))
+            elif isinstance(statement, Reset):
+                extend(Instruction("reset", (), (qubit,), (), statement.condition)
+                       for qubit in argument_bits(statement.qubit, program.qregs, qubit_offsets))
+            elif isinstance(statement, Barrier):
+                qubits = []
+                for arg in statement.args:
+                    qubits.extend(argument_bits(arg, program.qregs, qubit_offsets))
+                extend([Instruction("barrier", (), tuple(qubits), (), None)])
+        return circuit
+
+
+def argument_bits(arg, registers, offsets):
+    """Return the global indices of the bits an argument refers to.
+
+    Args:
+        arg (Argument): a register or one of its bits.
+        registers (dict): register sizes by name.
+        offsets (dict): global index of the first bit of each register.
+    """
+    if arg.index is None:
+        return range(offsets[arg.name], offsets[arg.name] + registers[arg.name])
+    return range(offsets[arg.name] + arg.index, offsets[arg.name] + arg.index + 1)
+
+
+def broadcast(args, registers, offsets):
+    """Yield the tuples of global qubits of a (possibly broadcast) gate call."""
+    if all(arg.index is not None for arg in args):
+        yield tuple(offsets[arg.name] + arg.index for arg in args)
+        return
+    bits = [argument_bits(arg, registers, offsets) for arg in args]
+    size = max(len(each) for each in bits)
+    if size == 1:
+        yield tuple(each[0] for each in bits)
+        return
+    for index in range(size):
+        yield tuple(each[index] if len(each) > 1 else each[0] for each in bits)
+
+
+def unroll(program, basis=()):
+    """Return the ``Circuit`` of ``program`` expanded down to ``basis``.
+
+    Args:
+        program (Program): parsed program.
+        basis (iterable(str)): gate names to keep besides ``U`` and ``CX``.
+    """
+    return Unroller(program.gates, basis).unroll(program)
+
+
+def unroll_file(path, basis=()):
+    """Parse the OpenQASM file at ``path`` and unroll it down to ``basis``."""
+    return unroll(parse_file(path), basis)
+
+
+def main(argv=None):
+    """Write the program in a file expanded down to ``U`` and ``CX``."""
+    parser = argparse.ArgumentParser(
+        description="Expand the gates of an OpenQASM file down to U and CX.")
+    parser.add_argument("qasm", help="OpenQASM file")
+    parser.add_argument("-o", "--output", default=None,
+                        help="output file (default: standard output)")
+    parser.add_argument("-b", "--basis", default="",
+                        help="comma separated gates to keep, e.g. u1,u2,u3,cx")
+    parser.add_argument("-p", "--prec", default=15, type=int,
+                        help="digits of the parameters")
+    args = parser.parse_args(argv)
+
+    basis = [name for name in args.basis.split(",") if name]
+    try:
+        circuit = unroll_file(args.qasm, basis)
+    except QasmError as err:
+        print("Error: " + str(err), file=sys.stderr)
+        return 1
+
+    text = circuit.qasm(args.prec)
+    if args.output is None:
+        sys.stdout.write(text)
+    else:
+        with open(args.output, "w") as output:
+            output.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
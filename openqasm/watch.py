@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"""Watch directories and re-validate OpenQASM files as they change.
+
+``Watcher`` polls the modification times of the ``.qasm`` and ``.inc`` files
+under some directories. When files change, only they and the files that
+include them, directly or not, are parsed again; the parser keeps the
+parsed include files in memory, so an edit of a circuit does not reparse
+``qelib1.inc``. A file whose text is the same as at its last validation
+(e.g. regenerated identically) keeps its result.
+
+The unit of work is the file: a changed file is read, hashed with md5 and
+parsed again from the start, whatever part of it changed. Nothing is
+reused from its previous parse except the cached include files.
+
+Example run:
+  python -m openqasm.watch examples benchmarks
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+from .exceptions import QasmError
+from .parser import parse
+
+EXTENSIONS = (".qasm", ".inc")
+
+
+class FileState(object):
+    """What the watcher knows of one file.
+
+    Attributes:
+        mtime (float): modification time at the last scan.
+        digest (str): md5 of the text at the last validation.
+        includes (list): absolute paths of the files it includes.
+        error (QasmError): validation error, None if the file is valid.
+    """
+
+    def __init__(self, mtime):
+        self.mtime = mtime
+        self.digest = None
+        self.includes = []
+        self.error = None
+
+
+class Watcher(object):
+    """Validate OpenQASM files under ``roots`` incrementally.
+
+    Args:
+        roots (list): directories (or files) to watch.
+        include_path (list): extra directories searched for include files.
+    """
+
+    def __init__(self, roots, include_path=None):
+        self.roots = list(roots)
+        self.include_path = list(include_path or [])
+        self.files = {}
+
+    def _walk(self):
+        """Return the modification time of every watched file."""
+        found = {}
+        for root in self.roots:
+            if os.path.isfile(root):
+                paths = [root]
+            else:
+                paths = (os.path.join(directory, name)
+                         for directory, _, names in os.walk(root)
+                         for name in names if name.endswith(EXTENSIONS))
+            for path in paths:
+                path = os.path.abspath(path)
+                try:
+                    found[path] = os.path.getmtime(path)
+                except OSError:
+                    pass
+        return found
+
+    def scan(self):
+        """Return the sets of changed (or new) and removed files."""
+        found = self._walk()
+        changed = set()
+        for path, mtime in found.items():
+            state = self.files.get(path)
+            if state is None:
+                self.files[path] = FileState(mtime)
+                changed.add(path)
+            elif state.mtime != mtime:
+                state.mtime = mtime
+                changed.add(path)
+        removed = set(self.files) - set(found)
+        for path in removed:
+            del self.files[path]
+        return changed, removed
+
+    def affected(self, changed, removed):
+        """Return the files to validate again after ``changed`` and ``removed``.
+
+        Includes are recorded transitively, so one pass finds every file that
+        depends on a changed one. New or removed files may fix or break an
+        include, so files in error are checked again too.
+        """
+        touched = set(changed) | set(removed)
+        created = any(self.files[path].digest is None for path in changed)
+        paths = set(changed)
+        for path, state in self.files.items():
+            if touched.intersection(state.includes):
+                paths.add(path)
+            elif state.error is not None and (created or removed):
+                paths.add(path)
+        return sorted(paths)
+
+    def validate(self, path, force=True):
+        """Parse the whole of ``path`` and record its result.
+
+        Args:
+            path (str): absolute path of a watched file.
+            force (bool): parse even if the text is the same as at the last
+                validation; needed when an included file changed.
+
+        Returns:
+            bool: False if the file was skipped and its result stands.
+        """
+        state = self.files[path]
+        try:
+            with open(path, "rb") as source_file:
+                data = source_file.read()
+        except OSError as err:
+            state.error = QasmError(str(err), path)
+            return True
+        digest = hashlib.md5(data).hexdigest()
+        if digest == state.digest and not force:
+            return False
+        state.digest = digest
+        try:
+            program = parse(data.decode("utf-8"), path, self.include_path)
+        except (QasmError, UnicodeDecodeError, RecursionError, OSError) as err:
+            # An include deleted since the scan, or nesting too deep for the
+            # parser, is an error of this file; the watcher keeps running.
+            state.error = err if isinstance(err, QasmError) else QasmError(str(err), path)
+            state.includes = self._includes_of_error(state.error, path)
+        else:
+            state.error = None
+            state.includes = program.includes
+        return True
+
+    def _includes_of_error(self, error, path):
+        """Return the include that failed, if the error is located in one."""
+        if error.filename and os.path.abspath(error.filename) != path:
+            return [os.path.abspath(error.filename)]
+        return []
+
+    def poll(self):
+        """Scan once and validate what changed.
+
+        Returns:
+            list(tuple(str, QasmError, float)): path, error (None if valid)
+            and milliseconds spent, for every file validated again.
+        """
+        changed, removed = self.scan()
+        if not changed and not removed:
+            return []
+        touched = changed | removed
+        results = []
+        for path in self.affected(changed, removed):
+            force = path not in changed or bool(touched.intersection(self.files[path].includes))
+            start = time.time()
+            if self.validate(path, force):
+                elapsed = (time.time() - start) * 1000
+                results.append((path, self.files[path].error, elapsed))
+        return results
+
+    def errors(self):
+        """Return the current errors by path."""
+        return dict((path, state.error) for path, state in self.files.items()
+                    if state.error is not None)
+
+
+def report(results, out):
+    """Print the results of a poll."""
+    for path, error, elapsed in results:
+        if error is None:
+            out.write("ok     %s (%.1f ms)\n" % (os.path.relpath(path), elapsed))
+        else:
+            out.write("error  %s (%.1f ms)\n" % (error, elapsed))
+    out.flush()
+
+
+def main(argv=None):
+    """Watch directories and re-validate the OpenQASM files that change."""
+    parser = argparse.ArgumentParser(
+        description="Validate OpenQASM files again each time they change.")
+    parser.add_argument("roots", nargs="*", default=["examples", "benchmarks"],
+                        help="directories to watch (default: examples benchmarks)")
+    parser.add_argument("-I", "--include-path", action="append", default=[],
+                        help="extra directory searched for include files")
+    parser.add_argument("-i", "--interval", default=0.1, type=float,
+                        help="seconds between two scans")
+    parser.add_argument("--once", action="store_true",
+                        help="validate every file once and exit")
+    args = parser.parse_args(argv)
+
+    watcher = Watcher(args.roots, args.include_path)
+    start = time.time()
+    results = watcher.poll()
+    errors = watcher.errors()
+    report([result for result in results if result[1] is not None], sys.stdout)
+    print("%d files, %d errors (%.0f ms)"
+          % (len(watcher.files), len(errors), (time.time() - start) * 1000))
+    if args.once:
+        return 1 if errors else 0
+    try:
+        while True:
+            time.sleep(args.interval)
+            report(watcher.poll(), sys.stdout)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,7 +18,15 @@
 """Helpers."""
 
 import os
-from qiskit import qasm
+
+from openqasm import QasmError, parse_file
+from openqasm import parse as parse_source
+from openqasm.columnar import DEFAULT_BASIS
+from openqasm.unroller import unroll
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples")
+BENCHMARKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks")
+HEADER = 'OPENQASM 2.0;\ninclude "qelib1.inc";\n'
 
 
 def get_file_path(category, file_name):
@@ -28,7 +36,17 @@ def get_file_path(category, file_name):
         - file_name: "adder"
     """
 
-    return os.path.join(os.path.dirname(__file__), "../examples", category, file_name + ".qasm")
+    return os.path.join(EXAMPLES, category, file_name + ".qasm")
+
+
+def circuit_of(source, basis=DEFAULT_BASIS):
+    """
+    Flat circuit of an OpenQASM program, with qelib1.inc included
+      - source: OpenQASM statements after the header
+      - basis: gates to unroll to; None keeps the gates of qelib1.inc
+    """
+    program = parse_source(HEADER + source)
+    return unroll(program, program.gates if basis is None else basis)
 
 
 def parse(file_path, verbose=False, prec=15):
@@ -37,12 +55,10 @@ def parse(file_path, verbose=False, prec=15):
       - prec: Precision for the returned string
     """
 
-    qiskit_qasm = qasm.Qasm(file_path)
-
     try:
-        qiskit_qasm.parse().qasm(prec)
+        parse_file(file_path).qasm(prec)
         return True
-    except qasm.QasmError as err:
+    except QasmError as err:
         if verbose:
             print("Error:")
             print(err)
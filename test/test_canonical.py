@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for the canonical form and the structural hash"
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from openqasm import parse
+from openqasm.canonical import (CANONICAL_BASIS, StructuralHasher, canonical_circuit,
+                                find_duplicates, structural_hash)
+from openqasm.unroller import unroll
+from .harness import HEADER
+
+
+def hash_of(source):
+    "Structural hash of an OpenQASM program"
+    return structural_hash(unroll(parse(HEADER + source), CANONICAL_BASIS))
+
+
+class TestStructuralHash(unittest.TestCase):
+    "What the hash ignores and what it does not"
+
+    def test_invariants(self):
+        "Formatting, register names, float spelling and commuting order"
+        reference = hash_of("qreg q[3]; creg c[3]; h q[0]; cx q[0],q[1]; u1(pi/4) q[2];"
+                            "measure q -> c;")
+        self.assertEqual(reference, hash_of(
+            "// same circuit\nqreg r[3];\ncreg m[3];\nu1(0.785398163397448) r[2];\n"
+            "h r[0];\ncx r[0], r[1];\nmeasure r -> m;\n"))
+        self.assertEqual(reference, hash_of(
+            "qreg q[3]; creg c[3]; h q[0]; u1(pi/2/2) q[2]; cx q[0],q[1];"
+            "measure q[2] -> c[2]; measure q[0] -> c[0]; measure q[1] -> c[1];"))
+        self.assertEqual(reference, hash_of(
+            "qreg q[3]; creg c[3]; u2(0,pi) q[0]; CX q[0],q[1]; rz(pi/4) q[2];"
+            "measure q -> c;"))
+
+    def test_differences(self):
+        "Gates, their order on shared qubits, registers and conditions count"
+        reference = hash_of("qreg q[2]; creg c[2]; h q[0]; cx q[0],q[1]; t q[1];")
+        for source in ["qreg q[2]; creg c[2]; h q[0]; cx q[0],q[1]; tdg q[1];",
+                       "qreg q[2]; creg c[2]; h q[0]; t q[1]; cx q[0],q[1];",
+                       "qreg q[2]; creg c[2]; h q[1]; cx q[1],q[0]; t q[0];",
+                       "qreg q[1]; qreg r[1]; creg c[2]; h q[0]; cx q[0],r[0]; t r[0];",
+                       "qreg q[2]; creg c[1]; creg d[1]; h q[0]; cx q[0],q[1]; t q[1];",
+                       "qreg q[2]; creg c[2]; h q[0]; cx q[0],q[1]; if(c==1) t q[1];",
+                       "qreg q[2]; creg c[2]; h q[0]; cx q[0],q[1]; barrier q; t q[1];"]:
+            self.assertNotEqual(reference, hash_of(source), source)
+
+    def test_barriers(self):
+        "A barrier between independent gates is kept in place"
+        self.assertNotEqual(hash_of("qreg q[2]; h q[0]; barrier q; h q[1];"),
+                            hash_of("qreg q[2]; h q[1]; barrier q; h q[0];"))
+
+    def test_streaming(self):
+        "Feeding the instructions one by one gives the same hash"
+        circuit = unroll(parse(HEADER + "qreg q[3]; ccx q[0],q[1],q[2]; h q;"),
+                         CANONICAL_BASIS)
+        hasher = StructuralHasher(circuit.qregs.items(), circuit.cregs.items())
+        for instruction in circuit:
+            hasher.update(instruction)
+        self.assertEqual(hasher.hexdigest(), structural_hash(circuit))
+
+    def test_canonical_circuit(self):
+        "Equivalent spellings have the same canonical text and hash"
+        first = unroll(parse(HEADER + "qreg a[2]; creg b[2]; x a[1]; h a[0]; "
+                             "measure a -> b; if(b==2) x a[0];"), CANONICAL_BASIS)
+        second = unroll(parse(HEADER + "qreg q[2]; creg c[2]; h q[0]; x q[1]; "
+                              "measure q -> c; if(c==2) x q[0];"), CANONICAL_BASIS)
+        text = canonical_circuit(first).qasm()
+        self.assertEqual(text, canonical_circuit(second).qasm())
+        self.assertIn("qreg q0[2];", text)
+        self.assertIn("if(c0==2)", text)
+        self.assertEqual(structural_hash(canonical_circuit(first)), structural_hash(first))
+
+
+class TestDuplicates(unittest.TestCase):
+    "Duplicate files of a corpus"
+
+    def test_find_duplicates(self):
+        "Files are grouped by hash, and unreadable ones reported"
+        directory = tempfile.mkdtemp()
+        try:
+            sources = {"a.qasm": "qreg q[2]; h q[0]; h q[1];",
+                       "b.qasm": "qreg r[2];\nh r[1];\nh r[0];\n",
+                       "c.qasm": "qreg q[2]; h q;",
+                       "d.qasm": "qreg q[2]; x q[0];",
+                       "e.qasm": "qreg q[2]; nope q[0];"}
+            for name, source in sources.items():
+                with open(os.path.join(directory, name), "w") as out:
+                    out.write(HEADER + source)
+            duplicates, errors = find_duplicates([directory])
+            self.assertEqual([[os.path.basename(path) for path in group]
+                              for _, group in duplicates], [["a.qasm", "b.qasm", "c.qasm"]])
+            self.assertEqual([os.path.basename(path) for path in errors], ["e.qasm"])
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
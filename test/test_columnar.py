@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for columnar circuits"
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from openqasm import parse, parse_file
+from openqasm.columnar import DEFAULT_BASIS, ColumnarCircuit, from_circuit, from_program, load
+from openqasm.unroller import unroll
+from .harness import BENCHMARKS, EXAMPLES
+
+COLUMNS = ("opcode", "qubit0", "qubit1", "clbit", "cond_reg", "cond_val", "params")
+
+
+class TestColumnar(unittest.TestCase):
+    "Columnar circuits and the vectorized loader"
+
+    def assertSameColumns(self, first, second):  # pylint: disable=invalid-name
+        "Both circuits have equal arrays"
+        self.assertEqual(first.names, second.names)
+        self.assertEqual(first.widths, second.widths)
+        for column in COLUMNS:
+            np.testing.assert_array_equal(getattr(first, column), getattr(second, column))
+        self.assertEqual(sorted(first.barriers), sorted(second.barriers))
+
+    def test_loader_matches_unroller(self):
+        "The vectorized loader gives the instructions of the unroller"
+        for path in (os.path.join(BENCHMARKS, "cc", "cc_n10.qasm"),
+                     os.path.join(EXAMPLES, "generic", "ipea_3_pi_8.qasm"),
+                     os.path.join(EXAMPLES, "generic", "qec.qasm")):
+            program = parse_file(path)
+            circuit = from_program(program)
+            self.assertSameColumns(circuit, from_circuit(unroll(program, DEFAULT_BASIS)))
+            self.assertEqual(circuit.to_circuit().instructions,
+                             unroll(program, DEFAULT_BASIS).instructions)
+
+    def test_other_basis(self):
+        "Gates outside the standard names keep their own number of parameters"
+        program = parse('include "qelib1.inc"; qreg q[2]; creg c[2];'
+                        'h q[1]; rz(0.5) q[0]; cu1(0.25) q[0],q[1]; measure q -> c;')
+        basis = ["h", "rz", "cx"]
+        circuit = from_program(program, basis)
+        self.assertEqual(circuit.widths[circuit.code("h")], 0)
+        self.assertEqual(circuit.widths[circuit.code("rz")], 1)
+        flat = circuit.to_circuit()
+        self.assertEqual(flat.instructions, unroll(program, basis).instructions)
+        self.assertIn("h q[1];", flat.qasm())
+        self.assertEqual(unroll(parse(flat.qasm()), basis).instructions, flat.instructions)
+        path = os.path.join(tempfile.mkdtemp(), "basis.npz")
+        circuit.save(path)
+        self.assertEqual(ColumnarCircuit.load_npz(path).to_circuit().instructions,
+                         flat.instructions)
+
+    def test_columns(self):
+        "Rows hold the opcode, qubits, classical bit, condition and parameters"
+        circuit = from_program(parse('include "qelib1.inc"; qreg q[3]; creg c[3];'
+                                     'u2(0.5,pi) q[1]; cx q[2],q[0]; measure q[1] -> c[2];'
+                                     'if(c==4) u1(0.25) q[0]; barrier q;'))
+        self.assertEqual([circuit.names[code] for code in circuit.opcode],
+                         ["u2", "cx", "measure", "u1", "barrier"])
+        np.testing.assert_array_equal(circuit.qubit0, [1, 2, 1, 0, -1])
+        np.testing.assert_array_equal(circuit.qubit1, [-1, 0, -1, -1, -1])
+        np.testing.assert_array_equal(circuit.clbit, [-1, -1, 2, -1, -1])
+        np.testing.assert_array_equal(circuit.cond_reg, [-1, -1, -1, 0, -1])
+        np.testing.assert_array_equal(circuit.cond_val, [0, 0, 0, 4, 0])
+        np.testing.assert_allclose(circuit.params[0], [0.5, np.pi, 0])
+        np.testing.assert_array_equal(circuit.barriers[4], [0, 1, 2])
+
+    def test_array_operations(self):
+        "Counts, filters and per-qubit slices"
+        circuit = load(os.path.join(BENCHMARKS, "quantum_volume", "quantum_volume_n5_d2.qasm"))
+        counts = circuit.gate_counts()
+        self.assertEqual(counts["cx"], 12)
+        self.assertEqual(sum(counts.values()), len(circuit))
+        self.assertEqual(len(circuit.select(["cx"])), 12)
+        self.assertEqual(circuit.qubit_counts().sum(),
+                         len(circuit) - counts["barrier"] + counts["cx"])
+        sliced = circuit.on_qubit(3)
+        self.assertEqual(len(sliced), circuit.qubit_counts()[3] + 1)
+        self.assertTrue(np.all((sliced.qubit0 == 3) | (sliced.qubit1 == 3) |
+                               (sliced.qubit0 == -1)))
+
+    def test_save_and_load(self):
+        "Arrays survive a round trip through an .npz file"
+        circuit = load(os.path.join(EXAMPLES, "generic", "qec.qasm"))
+        path = os.path.join(tempfile.mkdtemp(), "qec.npz")
+        circuit.save(path)
+        again = ColumnarCircuit.load_npz(path)
+        self.assertSameColumns(circuit, again)
+        self.assertEqual(list(again.qregs.items()), list(circuit.qregs.items()))
+
+
+if __name__ == "__main__":
+    unittest.main()
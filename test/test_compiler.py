@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for constant folding and compiled parameter expressions"
+
+import math
+import unittest
+
+from openqasm import parse
+from openqasm.compiler import compile_expressions, evaluate_batch
+from openqasm.nodes import Real
+from openqasm.unroller import Unroller
+
+
+def gate_body_params(source):
+    "Parameters of the first statement in the body of the last declared gate"
+    program = parse(source)
+    gate = [statement for statement in program.statements if hasattr(statement, "body")][-1]
+    return gate.params, list(gate.body[0].params)
+
+
+class TestCompiler(unittest.TestCase):
+    "Folding and compilation"
+
+    def test_fold(self):
+        "Constant sub-expressions are computed"
+        _, params = gate_body_params("gate g(a) q { U(pi/2, -(2*pi)+a, sin(0)*a) q; }")
+        folded = [param.fold() for param in params]
+        self.assertIsInstance(folded[0], Real)
+        self.assertAlmostEqual(folded[0].value, math.pi / 2)
+        self.assertEqual(folded[1].parameters(), {"a"})
+        self.assertIsInstance(folded[1].left, Real)
+        self.assertEqual(folded[2].parameters(), {"a"})
+
+    def test_top_level_constants(self):
+        "Parameters of gate calls are folded by the parser but keep their text"
+        program = parse("qreg q[1]; U(pi/2, 2^3, -pi) q[0];")
+        params = program.statements[-1].params
+        self.assertEqual([param.value for param in params], [math.pi / 2, 8, -math.pi])
+        self.assertEqual(program.statements[-1].qasm(), "U(pi/2,2^3,-pi) q[0];")
+
+    def test_compiled_matches_tree(self):
+        "Compiled functions give the values of the tree walk"
+        names, params = gate_body_params(
+            "gate g(a,lambda) q { U(a^2/lambda, ln(a)-sqrt(lambda), -(a+lambda)/2) q; }")
+        function = compile_expressions(params, names)
+        bindings = {"a": 1.7, "lambda": 0.3}
+        expected = [param.evaluate(bindings) for param in params]
+        for value, wanted in zip(function(1.7, 0.3), expected):
+            self.assertAlmostEqual(value, wanted)
+
+    def test_compiled_signs(self):
+        "Negative literals and unary minus keep their binding under powers"
+        names, params = gate_body_params(
+            "gate g(a) q { U((-2)^a, -a^2, (-a)^2) q; }")
+        _, more = gate_body_params(
+            "gate h(a) q { U(-2^a, 2^-a, -(2^a)) q; }")
+        params = params + more
+        function = compile_expressions(params, names)
+        for value in (2.0, 3.0):
+            expected = [param.evaluate({"a": value}) for param in params]
+            for computed, wanted in zip(function(value), expected):
+                self.assertAlmostEqual(computed, wanted)
+        self.assertAlmostEqual(function(2.0)[0], 4.0)
+
+    def test_compiled_non_finite(self):
+        "Non-finite literals compile to valid Python"
+        function = compile_expressions([Real(float("inf")), Real(-float("inf"))], [])
+        self.assertEqual(function(), (float("inf"), -float("inf")))
+        function = compile_expressions([Real(float("nan"))], [])
+        self.assertTrue(math.isnan(function()[0]))
+
+    def test_long_chain(self):
+        "Chains longer than Python's compiler handles are cut into temporaries"
+        names, params = gate_body_params(
+            "gate g(a) q { U(%s, 0, 0) q; }" % "+".join(["a", "2*a", "a^2", "1/a"] * 1000))
+        function = compile_expressions(params, names)
+        self.assertAlmostEqual(function(2.0)[0], params[0].evaluate({"a": 2.0}))
+
+    def test_batch(self):
+        "Vectorized evaluation binds many applications at once"
+        names, params = gate_body_params("gate g(t,p) q { U(pi/2, t*p, cos(t)) q; }")
+        values = [[0.1 * index, 0.2 * index] for index in range(100)]
+        table = evaluate_batch(params, names, values)
+        self.assertEqual(table.shape, (100, 3))
+        for row, (theta, phi) in zip(table, values):
+            self.assertAlmostEqual(row[0], math.pi / 2)
+            self.assertAlmostEqual(row[1], theta * phi)
+            self.assertAlmostEqual(row[2], math.cos(theta))
+
+    def test_template_bind(self):
+        "Template.bind agrees with one application at a time"
+        program = parse('include "qelib1.inc";')
+        template = Unroller(program.gates).template("cu3")
+        values = [[0.3, 1.1, -0.7], [2.0, 0.5, 0.25]]
+        table = template.bind(values)
+        for row, each in zip(table, values):
+            for value, wanted in zip(row, template.function(*each)):
+                self.assertAlmostEqual(value, wanted)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for the randomized equivalence checker"
+
+import math
+import os
+import unittest
+
+import numpy as np
+
+from openqasm import QasmError, parse
+from openqasm.columnar import DEFAULT_BASIS
+from openqasm.equivalence import check, check_pass, check_qelib, unitary
+from openqasm.generators import bernstein_vazirani, qft
+from openqasm.optimize import optimize
+from openqasm.unroller import unroll, unroll_file
+from .harness import BENCHMARKS, EXAMPLES, circuit_of
+
+
+class TestEquivalence(unittest.TestCase):
+    "Exact and randomized comparisons"
+
+    def test_qelib(self):
+        "Every qelib1.inc definition matches its textbook matrix"
+        for name, error, good in check_qelib():
+            self.assertTrue(good, "%s differs by %g" % (name, error))
+
+    def test_unitary(self):
+        "Columns are the outputs of the basis states"
+        matrix = unitary(circuit_of("qreg q[2]; x q[0];"))
+        self.assertTrue(np.allclose(matrix, np.eye(4)[[1, 0, 3, 2]]))
+
+    def test_exact(self):
+        "Small circuits are compared up to a global phase only"
+        result = check(circuit_of("qreg q[2]; cz q[0],q[1]; x q[1]; z q[1];"),
+                       circuit_of("qreg q[2]; cz q[1],q[0]; y q[1];"))
+        self.assertTrue(result)
+        self.assertTrue(result.exact)
+        self.assertEqual(result.probes, 4)
+        self.assertAlmostEqual(result.phase, -math.pi / 2)
+        result = check(circuit_of("qreg q[2]; t q[0]; cx q[0],q[1];"),
+                       circuit_of("qreg q[2]; tdg q[0]; cx q[0],q[1];"))
+        self.assertFalse(result)
+
+    def test_random_probes(self):
+        "Wide circuits are told apart by random states"
+        prefix = "qreg q[10]; h q; "
+        first = circuit_of(prefix + "ccx q[7],q[8],q[9];")
+        self.assertTrue(check(first, circuit_of(prefix + "ccx q[8],q[7],q[9];"), seed=1))
+        result = check(first, circuit_of(prefix + "ccx q[7],q[9],q[8];"), seed=1)
+        self.assertFalse(result)
+        self.assertFalse(result.exact)
+        self.assertEqual(result.probes, 4)
+        self.assertEqual(check(first, first, probes=5).probes, 8)
+
+    def test_measurements(self):
+        "Final measurements must match, and mid-circuit ones are refused"
+        first = circuit_of("qreg q[2]; creg c[2]; h q[0]; measure q -> c;")
+        second = circuit_of("qreg q[2]; creg c[2]; h q[0]; measure q[0] -> c[1]; "
+                            "measure q[1] -> c[0];")
+        self.assertTrue(check(first, first))
+        self.assertEqual(check(first, second).reason, "different measurements")
+        with self.assertRaises(QasmError):
+            check(circuit_of("qreg q[2]; creg c[2]; measure q -> c; h q[0];"), first)
+
+    def test_small_angles(self):
+        "Optimizing keeps rotations too small for the default identity test"
+        circuit = circuit_of("qreg q[2]; cu1(6e-6) q[0],q[1]; cu1(-3e-6) q[1],q[0];")
+        self.assertTrue(check(circuit, optimize(circuit)))
+
+    def test_passes(self):
+        "Unrolling and optimizing keep the benchmarks equivalent"
+        for path in [os.path.join(BENCHMARKS, "qft", "qft_n12.qasm"),
+                     os.path.join(EXAMPLES, "generic", "adder.qasm"),
+                     os.path.join(EXAMPLES, "ibmqx2", "011_3_qubit_grover_50_.qasm")]:
+            for name in ("unroll", "optimize"):
+                self.assertTrue(check_pass(path, name, seed=7), "%s %s" % (path, name))
+
+    def test_generators(self):
+        "The generators rebuild the committed benchmarks"
+        for generated, name in [(bernstein_vazirani(12, "1" * 11), "bv/bv_n12.qasm"),
+                                (qft(12), "qft/qft_n12.qasm")]:
+            original = unroll_file(os.path.join(BENCHMARKS, name), DEFAULT_BASIS)
+            rebuilt = unroll(parse(generated.qasm()), DEFAULT_BASIS)
+            self.assertTrue(check(original, rebuilt, seed=3), name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for the locality-driven qubit layout"
+
+import os
+import unittest
+
+import numpy as np
+
+from openqasm.columnar import DEFAULT_BASIS
+from openqasm.engines import get_engine
+from openqasm.equivalence import unitary
+from openqasm.layout import plan_layout, relayout, remote_cost
+from openqasm.outcomes import read_outcomes
+from openqasm.unroller import unroll_file
+from .harness import BENCHMARKS, circuit_of
+
+
+def permutation(positions):
+    "Matrix moving qubit q of a basis state to position positions[q]"
+    size = 1 << len(positions)
+    matrix = np.zeros((size, size))
+    for index in range(size):
+        moved = sum(1 << position for qubit, position in enumerate(positions)
+                    if index >> qubit & 1)
+        matrix[moved, index] = 1
+    return matrix
+
+
+def cost(circuit, chunk_bits=1):
+    "Remote gate weight of a circuit on its own positions"
+    num_qubits = circuit.num_qubits
+    return remote_cost(circuit.instructions, range(num_qubits), num_qubits, chunk_bits)
+
+
+class TestPlan(unittest.TestCase):
+    "Positions given to the qubits"
+
+    def test_hottest_lowest(self):
+        "The qubit most targeted gets position 0, idle qubits the top"
+        circuit = circuit_of("qreg q[4]; x q[3]; cx q[0],q[3]; cx q[1],q[3]; h q[1];")
+        positions = plan_layout(circuit.instructions, 4)
+        self.assertEqual(positions[3], 0)
+        self.assertEqual(positions[1], 1)
+        self.assertEqual(sorted(positions), [0, 1, 2, 3])
+        self.assertEqual(positions[2], 3)
+
+    def test_pairs_adjacent(self):
+        "Among equally used qubits, the partner of a placed qubit comes next"
+        circuit = circuit_of("qreg q[4]; h q[0]; h q[0]; cx q[3],q[2]; cx q[1],q[0];")
+        positions = plan_layout(circuit.instructions, 4)
+        self.assertEqual(positions[:2], [0, 2])
+        self.assertEqual(positions[2], 1)
+
+    def test_bv_oracle(self):
+        "Every cx of Bernstein-Vazirani targets the oracle qubit"
+        path = os.path.join(BENCHMARKS, "bv", "bv_n10.qasm")
+        circuit = unroll_file(path, DEFAULT_BASIS)
+        moved, initial, final = relayout(circuit)
+        self.assertEqual(initial, final)
+        self.assertEqual(initial[circuit.num_qubits - 1], 0)
+        self.assertLess(cost(moved, 3), cost(circuit, 3))
+
+
+class TestRelayout(unittest.TestCase):
+    "The rewritten circuit is the original one on other positions"
+
+    SOURCE = ("qreg q[2]; qreg r[2]; creg c[4]; h q[0]; cx q[0],r[1]; t r[1];"
+              "cx q[1],r[1]; u3(0.1,0.2,0.3) q[1]; cx r[1],r[0]; h r[0]; cx q[0],r[0];"
+              "s q[0]; cx r[0],q[0]; cx q[1],q[0]; tdg q[0]; cx r[1],q[0];")
+
+    def assert_permuted(self, circuit, window=None):
+        "Check the unitary of the relaid-out circuit"
+        moved, initial, final = relayout(circuit, window, chunk_bits=1)
+        expected = permutation(final).dot(unitary(circuit)).dot(permutation(initial).T)
+        self.assertTrue(np.allclose(unitary(moved), expected, atol=1e-9))
+        return moved, initial, final
+
+    def test_static(self):
+        "One layout: a pure renumbering"
+        circuit = circuit_of(self.SOURCE)
+        moved, initial, final = self.assert_permuted(circuit)
+        self.assertEqual(initial, final)
+        self.assertEqual(len(moved), len(circuit))
+        self.assertLessEqual(cost(moved), cost(circuit))
+
+    def test_windows(self):
+        "Layouts per segment, with swaps in between"
+        circuit = circuit_of(self.SOURCE)
+        for window in (1, 2, 3, 100):
+            self.assert_permuted(circuit, window)
+        circuit = circuit_of("qreg q[2];" + "h q[0];" * 8 + "cx q[1],q[0];" + "h q[1];" * 8)
+        moved, initial, final = self.assert_permuted(circuit, 8)
+        self.assertEqual((initial, final), ([0, 1], [1, 0]))
+        self.assertGreater(len(moved), len(circuit))
+        self.assertLess(cost(moved), cost(circuit))
+
+    def test_swaps_pay_off(self):
+        "Swaps are only inserted when the segment saves more than they cost"
+        circuit = circuit_of("qreg q[3]; h q[2]; h q[2]; h q[0]; h q[1];")
+        moved, initial, final = relayout(circuit, 1, chunk_bits=1)
+        self.assertEqual(initial, final)
+        self.assertEqual(len(moved), len(circuit))
+
+    def test_conditions(self):
+        "Conditioned gates keep their meaning in every window"
+        circuit = circuit_of("qreg q[4]; creg c[4]; x q[0]; measure q[0] -> c[0];"
+                             "if(c==1) x q[1]; if(c==1) x q[3]; if(c==1) cx q[3],q[2];"
+                             "h q[0]; h q[0]; measure q[1] -> c[1]; measure q[2] -> c[2];"
+                             "measure q[3] -> c[3];")
+        engine = get_engine("local_sharedmem_simulator", processes=1, seed=7)
+        for window in (None, 1, 2, 3):
+            moved = relayout(circuit, window, chunk_bits=1)[0]
+            conditions = [instruction.condition for instruction in moved if instruction.condition]
+            self.assertEqual(conditions, [("c", 1)] * 3)
+            self.assertEqual(engine.run(moved, shots=4).get_counts(), {"1111": 4})
+
+    def test_counts(self):
+        "Measurements keep their classical bits"
+        path = os.path.join(BENCHMARKS, "bv", "bv_n10.qasm")
+        circuit = unroll_file(path, DEFAULT_BASIS)
+        engine = get_engine("local_sharedmem_simulator", processes=1, seed=7)
+        for window in (None, 2):
+            moved = relayout(circuit, window)[0]
+            counts = engine.run(moved, shots=8).get_counts()
+            self.assertEqual(sorted(counts), read_outcomes(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
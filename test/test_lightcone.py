@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for the measurement light-cone pruning pass"
+
+import os
+import unittest
+
+from openqasm.lightcone import prune, remap_labels
+from openqasm.unroller import unroll_file
+from .harness import BENCHMARKS, circuit_of
+
+
+class TestLightCone(unittest.TestCase):
+    "Backward causal-cone analysis"
+
+    def test_unmeasured_qubits_removed(self):
+        "Gates and qubits outside the cone go away and the rest is renumbered"
+        circuit = circuit_of("qreg a[2]; qreg b[3]; creg c[2];"
+                             "h a[0]; h a[1]; cx a[1],b[0]; h b[1]; cx b[1],b[2];"
+                             "cx a[0],b[2]; x b[0]; measure b[2] -> c[0];", None)
+        pruned, remap = prune(circuit)
+        self.assertEqual(list(pruned.qregs.items()), [("a", 1), ("b", 2)])
+        self.assertEqual(remap, [0, -1, -1, 1, 2])
+        self.assertEqual([instruction.name for instruction in pruned],
+                         ["h", "h", "cx", "cx", "measure"])
+        self.assertEqual(remap_labels(circuit, pruned, remap),
+                         {"a[0]": "a[0]", "b[1]": "b[0]", "b[2]": "b[1]"})
+        self.assertIn("qreg b[2];", pruned.qasm())
+
+    def test_reset_cuts_the_cone(self):
+        "Gates before a reset of a qubit no longer matter"
+        circuit = circuit_of("qreg q[2]; creg c[1]; h q[0]; x q[1]; reset q[0];"
+                             "cx q[0],q[1]; measure q[1] -> c[0];", None)
+        pruned, _ = prune(circuit)
+        self.assertEqual([instruction.name for instruction in pruned],
+                         ["x", "reset", "cx", "measure"])
+
+    def test_barriers_and_conditions(self):
+        "Barriers shrink to live qubits and conditions keep their measurements"
+        circuit = circuit_of("qreg q[3]; creg c[1]; creg d[1]; h q[0]; h q[2];"
+                             "barrier q; measure q[0] -> c[0]; if(c==1) x q[1];"
+                             "measure q[1] -> d[0];", None)
+        pruned, _ = prune(circuit)
+        self.assertEqual(pruned.num_qubits, 2)
+        self.assertEqual(pruned.instructions[1].qubits, (0, 1))
+        self.assertEqual(pruned.instructions[-2].condition, ("c", 1))
+
+    def test_bernstein_vazirani(self):
+        "The oracle qubit of BV stays in the cone through the CX targets"
+        circuit = unroll_file(os.path.join(BENCHMARKS, "bv", "bv_n10.qasm"))
+        pruned, _ = prune(circuit)
+        self.assertEqual(pruned.num_qubits, 10)
+        self.assertEqual(len(pruned), len(circuit))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for the matrix-product-state engine"
+
+import os
+import unittest
+
+import numpy as np
+
+from openqasm import QasmError, parse
+from openqasm.columnar import DEFAULT_BASIS
+from openqasm.engines import counts_key, get_engine
+from openqasm.engines.mps import MPS, MPSEngine
+from openqasm.gates import single_qubit_matrix
+from openqasm.outcomes import read_outcomes
+from openqasm.unroller import unroll_file
+from .harness import BENCHMARKS, circuit_of
+
+
+def dense(circuit):
+    "Statevector of the gates of a circuit applied to |0...0>"
+    num_qubits = circuit.num_qubits
+    state = np.zeros((2,) * num_qubits, dtype=complex)
+    state[(0,) * num_qubits] = 1
+    for instruction in circuit:
+        axes = [num_qubits - 1 - qubit for qubit in instruction.qubits]
+        if instruction.name in ("cx", "CX"):
+            index = [slice(None)] * num_qubits
+            index[axes[0]] = 1
+            target = axes[1] - (axes[1] > axes[0])
+            state[tuple(index)] = np.flip(state[tuple(index)], axis=target)
+        elif instruction.name not in ("barrier", "measure"):
+            matrix = single_qubit_matrix(instruction.name, instruction.params)
+            state = np.moveaxis(np.tensordot(matrix, state, axes=([1], axes)), 0, axes[0])
+    return state.ravel()
+
+
+def simulate(circuit, max_bond=64):
+    "MPS of the gates of a circuit"
+    state = MPS(circuit.num_qubits, max_bond)
+    for instruction in circuit:
+        if instruction.name == "cx":
+            state.apply_cx(*instruction.qubits)
+        elif instruction.name not in ("barrier", "measure"):
+            state.apply_single(single_qubit_matrix(instruction.name, instruction.params),
+                               instruction.qubits[0])
+    return state
+
+
+class TestMPS(unittest.TestCase):
+    "Matrix product states against dense statevectors"
+
+    def test_random_circuit(self):
+        "Long-range CX and arbitrary rotations match the dense simulation"
+        rng = np.random.RandomState(3)
+        source = "qreg q[6];"
+        for _ in range(40):
+            first, second = rng.choice(6, 2, replace=False)
+            source += "u3(%f,%f,%f) q[%d];" % (tuple(rng.uniform(0, 6, 3)) + (first,))
+            source += "cx q[%d],q[%d];" % (first, second)
+        circuit = circuit_of(source)
+        state = simulate(circuit)
+        self.assertEqual(state.discarded, [])
+        overlap = abs(np.vdot(state.statevector(), dense(circuit)))
+        self.assertAlmostEqual(overlap, 1.0)
+
+    def test_qft(self):
+        "A QFT benchmark runs exactly within a small bond dimension"
+        circuit = unroll_file(os.path.join(BENCHMARKS, "qft", "qft_n10.qasm"), DEFAULT_BASIS)
+        state = simulate(circuit)
+        overlap = abs(np.vdot(state.statevector(), dense(circuit)))
+        self.assertAlmostEqual(overlap, 1.0)
+        self.assertEqual(state.fidelity_lower_bound(), 1.0)
+
+    def test_truncation_bounds(self):
+        "A capped bond drops weight and lowers the fidelity bounds"
+        circuit = circuit_of("qreg q[2]; h q[0]; cx q[0],q[1];")
+        state = simulate(circuit, max_bond=1)
+        self.assertEqual(len(state.discarded), 1)
+        self.assertAlmostEqual(state.discarded[0], 0.5)
+        self.assertAlmostEqual(state.fidelity_estimate(), 0.5)
+        self.assertAlmostEqual(state.fidelity_lower_bound(), 0.5)
+        fidelity = abs(np.vdot(state.statevector(), dense(circuit))) ** 2
+        self.assertGreaterEqual(fidelity + 1e-9, state.fidelity_lower_bound())
+
+
+class TestMPSEngine(unittest.TestCase):
+    "Sampling with the MPS engine"
+
+    def test_bv_reference(self):
+        "Bernstein-Vazirani gives the reference outcome for every shot"
+        path = os.path.join(BENCHMARKS, "bv", "bv_n14.qasm")
+        expected = dict((key, 1) for key in read_outcomes(path))
+        result = get_engine("local_mps_simulator", seed=1).run(
+            unroll_file(path, DEFAULT_BASIS), shots=1)
+        self.assertEqual(result.get_counts(), expected)
+        self.assertEqual(result.metadata["truncations"], 0)
+        self.assertEqual(result.metadata["tvd_bound"], 0.0)
+
+    def test_sampling(self):
+        "Sampled frequencies follow the Born rule"
+        circuit = circuit_of("qreg q[3]; creg c[3]; ry(pi/3) q[0]; cx q[0],q[2];"
+                             "measure q -> c;")
+        counts = MPSEngine(seed=5).run(circuit, shots=4000).counts
+        self.assertEqual(set(counts), {"000", "101"})
+        self.assertAlmostEqual(counts["101"] / 4000.0, 0.25, delta=0.03)
+
+    def test_classical_control(self):
+        "Mid-circuit measurements, resets and conditions take effect"
+        circuit = circuit_of("qreg q[2]; creg a[1]; creg b[1]; x q[0];"
+                             "measure q[0] -> a[0]; reset q[0]; if(a==1) x q[1];"
+                             "measure q[0] -> b[0]; measure q[1] -> a[0];")
+        counts = MPSEngine(seed=2).run(circuit, shots=10).counts
+        self.assertEqual(counts, {"0 1": 10})
+
+    def test_unknown_names(self):
+        "Unknown engines, gates and registers are reported by name"
+        with self.assertRaises(ValueError) as context:
+            get_engine("local_nope_simulator")
+        self.assertIn("local_nope_simulator", str(context.exception))
+        circuit = circuit_of("gate foo a { x a; } qreg q[1]; creg c[1]; foo q[0];"
+                             "measure q -> c;", ["foo"])
+        with self.assertRaises(QasmError) as context:
+            MPSEngine(seed=1).run(circuit, shots=1)
+        self.assertIn("'foo'", str(context.exception))
+        circuit = circuit_of("qreg q[1]; creg c[1]; if(c==0) x q[0]; measure q -> c;")
+        circuit.instructions[0] = circuit.instructions[0]._replace(condition=("d", 0))
+        with self.assertRaises(QasmError) as context:
+            MPSEngine(seed=1).run(circuit, shots=1)
+        self.assertIn("'d'", str(context.exception))
+
+    def test_counts_key(self):
+        "Registers are printed last first, each from its highest bit"
+        cregs = parse("qreg q[1]; creg a[2]; creg b[1];").cregs
+        self.assertEqual(counts_key([1, 0, 1], cregs), "1 01")
+
+
+if __name__ == '__main__':
+    unittest.main()
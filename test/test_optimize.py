@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for the peephole optimization pass"
+
+import os
+import unittest
+
+import numpy as np
+
+from openqasm.columnar import DEFAULT_BASIS
+from openqasm.gates import SINGLE_QUBIT_GATES, single_qubit_matrix
+from openqasm.optimize import count_diff, optimize
+from openqasm.unroller import unroll_file
+from .harness import BENCHMARKS, circuit_of
+
+
+def apply(circuit, state):
+    "Apply the gates of a circuit to a statevector"
+    num_qubits = circuit.num_qubits
+    state = state.reshape((2,) * num_qubits)
+    for instruction in circuit:
+        axes = [num_qubits - 1 - qubit for qubit in instruction.qubits]
+        if instruction.name in SINGLE_QUBIT_GATES:
+            matrix = single_qubit_matrix(instruction.name, instruction.params)
+            state = np.moveaxis(np.tensordot(matrix, state, axes=([1], axes)), 0, axes[0])
+        else:
+            index = [slice(None)] * num_qubits
+            index[axes[0]] = 1
+            state = state.copy()
+            target = axes[1] - (axes[1] > axes[0])
+            state[tuple(index)] = np.flip(state[tuple(index)], axis=target)
+    return state.ravel()
+
+
+class TestOptimize(unittest.TestCase):
+    "Fusion and cancellation"
+
+    def assertEquivalent(self, first, second):  # pylint: disable=invalid-name
+        "Both circuits map a random state to the same state up to phase"
+        rng = np.random.RandomState(7)
+        size = 2 ** first.num_qubits
+        state = rng.randn(size) + 1j * rng.randn(size)
+        state /= np.linalg.norm(state)
+        overlap = np.vdot(apply(first, state), apply(second, state))
+        self.assertAlmostEqual(abs(overlap), 1.0)
+
+    def test_fusion(self):
+        "Runs of single-qubit gates become one gate"
+        circuit = circuit_of("qreg q[1]; h q[0]; t q[0]; h q[0]; s q[0];")
+        optimized = optimize(circuit)
+        self.assertEqual(len(optimized), 1)
+        self.assertEqual(optimized.instructions[0].name, "u3")
+        self.assertEquivalent(circuit, optimized)
+        optimized = optimize(circuit_of("qreg q[1]; t q[0]; s q[0];"))
+        self.assertEqual([instruction.name for instruction in optimized], ["u1"])
+
+    def test_identities_dropped(self):
+        "id, zero rotations and inverse pairs disappear"
+        optimized = optimize(circuit_of("qreg q[2]; id q[0]; u1(0) q[1]; rz(0) q[0];"
+                                        "h q[1]; h q[1]; u3(0,0.5,-0.5) q[0];"))
+        self.assertEqual(len(optimized), 0)
+
+    def test_cx_cancellation(self):
+        "Adjacent equal CX cancel and the gates around them fuse"
+        circuit = circuit_of("qreg q[2]; t q[0]; h q[1]; cx q[0],q[1]; cx q[0],q[1];"
+                             "tdg q[0]; h q[1];")
+        self.assertEqual(len(optimize(circuit)), 0)
+        circuit = circuit_of("qreg q[2]; cx q[0],q[1]; cx q[1],q[0];")
+        self.assertEqual(len(optimize(circuit)), 2)
+
+    def test_barriers_and_conditions_block(self):
+        "Gates are not fused across barriers, measurements or conditions"
+        circuit = circuit_of("qreg q[1]; creg c[1]; h q[0]; barrier q; h q[0];"
+                             "measure q[0] -> c[0]; if(c==1) x q[0]; x q[0];")
+        self.assertEqual(optimize(circuit).count_ops(), circuit.count_ops())
+
+    def test_benchmarks(self):
+        "Optimized benchmarks are smaller and equivalent"
+        for name in ("qft/qft_n10.qasm", "quantum_volume/quantum_volume_n5_d3.qasm"):
+            circuit = unroll_file(os.path.join(BENCHMARKS, name), DEFAULT_BASIS)
+            circuit = circuit.copy([instruction for instruction in circuit
+                                    if instruction.name not in ("measure", "barrier")])
+            optimized = optimize(circuit)
+            self.assertLess(len(optimized), len(circuit))
+            self.assertEquivalent(circuit, optimized)
+            total = count_diff(circuit, optimized)[-1]
+            self.assertEqual(total, ("total", len(circuit), len(optimized)))
+
+
+if __name__ == "__main__":
+    unittest.main()
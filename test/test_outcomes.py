@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for the expected outcomes and the packed counts comparison"
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from openqasm.columnar import DEFAULT_BASIS
+from openqasm.engines import get_engine
+from openqasm.generators import counterfeit_coin_outcomes, outcomes_comment
+from openqasm.outcomes import (count_mismatches, load_reference, pack_counts, pack_keys,
+                               read_outcomes, save_reference, unexpected, verify_counts)
+from openqasm.unroller import unroll_file
+from .harness import BENCHMARKS
+
+
+class TestPacking(unittest.TestCase):
+    "Bit-packed keys and their linear merge"
+
+    def test_pack_keys(self):
+        "Keys read as binary, register separators ignored"
+        self.assertEqual(pack_keys(["101", "0 11"]).tolist(), [5, 3])
+        self.assertEqual(pack_keys(["1" * 40]).tolist(), [2 ** 40 - 1])
+        with self.assertRaises(ValueError):
+            pack_keys(["01", "011"])
+        with self.assertRaises(ValueError):
+            pack_keys(["0" * 65])
+
+    def test_pack_counts(self):
+        "Keys come sorted with their counts"
+        keys, counts = pack_counts({"11": 4, "00": 1, "10": 7})
+        self.assertEqual(keys.tolist(), [0, 2, 3])
+        self.assertEqual(counts.tolist(), [1, 7, 4])
+
+    def test_merge(self):
+        "Outcomes are matched against sorted references"
+        expected = np.array([1, 4, 9, 16], dtype=np.uint64)
+        keys = np.array([0, 4, 10, 16, 20], dtype=np.uint64)
+        self.assertEqual(unexpected(keys, expected).tolist(), [0, 10, 20])
+        self.assertEqual(unexpected(keys[:0], expected).tolist(), [])
+        self.assertEqual(count_mismatches(keys, np.array([1, 2, 1, 5, 1]),
+                                          expected, np.array([3, 2, 1, 6])),
+                         [(0, 1, 0), (10, 1, 0), (16, 5, 6), (20, 1, 0)])
+
+    def test_large(self):
+        "Wide outcomes of many shots"
+        rng = np.random.RandomState(5)
+        values = np.unique(rng.randint(0, 2 ** 40, size=20000, dtype=np.int64))
+        counts = dict((format(value, "040b"), 1 + value % 3) for value in values.tolist())
+        reference = pack_counts(counts) + (40,)
+        self.assertIsNone(verify_counts(counts, reference=reference))
+        counts[format(int(values[7]), "040b")] += 1
+        self.assertIn("1 counts differ", verify_counts(counts, reference=reference))
+
+
+class TestOutcomes(unittest.TestCase):
+    "Outcomes recorded by the generators"
+
+    def test_read_outcomes(self):
+        "The header of the benchmarks carries their outcomes"
+        self.assertEqual(read_outcomes(os.path.join(BENCHMARKS, "bv", "bv_n10.qasm")),
+                         ["1" * 9])
+        self.assertEqual(read_outcomes(os.path.join(BENCHMARKS, "cc", "cc_n10.qasm")),
+                         sorted(counterfeit_coin_outcomes(9, 6)))
+        self.assertIsNone(read_outcomes(os.path.join(BENCHMARKS, "qft", "qft_n10.qasm")))
+
+    def test_simulated(self):
+        "Simulated counts only hit the recorded outcomes"
+        engine = get_engine("local_mps_simulator", seed=11)
+        for name in ("bv/bv_n12.qasm", "cc/cc_n10.qasm", "cc/cc_n15.qasm"):
+            path = os.path.join(BENCHMARKS, name)
+            counts = engine.run(unroll_file(path, DEFAULT_BASIS), shots=200).get_counts()
+            outcomes = read_outcomes(path)
+            self.assertIsNone(verify_counts(counts, outcomes), name)
+            if name.startswith("cc"):
+                self.assertEqual(sorted(counts), sorted(outcomes))
+        self.assertIn("1 unexpected outcomes", verify_counts({"0" * 11: 1}, ["1" * 11]))
+
+    def test_comment(self):
+        "Register separators are dropped from the comment"
+        self.assertEqual(outcomes_comment(["1 01", "0 11"]), "@outcomes 011 101")
+
+
+class TestReference(unittest.TestCase):
+    "Saved reference runs"
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        "Packed and JSON references load alike"
+        counts = {"0 10": 3, "1 11": 5}
+        packed = os.path.join(self.directory, "a.qasm.ref.npz")
+        save_reference(packed, counts)
+        legacy = os.path.join(self.directory, "a.qasm.ref")
+        with open(legacy, "w") as out:
+            json.dump(counts, out)
+        for path in (packed, legacy):
+            keys, values, width = load_reference(path)
+            self.assertEqual(keys.tolist(), [2, 7])
+            self.assertEqual(values.tolist(), [3, 5])
+            self.assertEqual(width, 3)
+            self.assertIsNone(verify_counts({"1 11": 5}, reference=(keys, values, width)))
+
+
+if __name__ == '__main__':
+    unittest.main()
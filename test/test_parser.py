@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for the OpenQASM parser"
+
+import math
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from openqasm import QasmError, parse, parse_file
+from openqasm.nodes import Real
+from openqasm.parser import LIBS_PATH, _INCLUDE_CACHE
+from .harness import get_file_path
+
+
+class TestParser(unittest.TestCase):
+    "Parser and semantic checks"
+
+    def test_registers_and_gates(self):
+        "Registers and gate declarations end up in the tables"
+        program = parse(open(get_file_path("generic", "qec")).read(),
+                        get_file_path("generic", "qec"))
+        self.assertEqual(list(program.qregs.items()), [("q", 3), ("a", 2)])
+        self.assertEqual(list(program.cregs.items()), [("c", 3), ("syn", 2)])
+        self.assertIn("syndrome", program.gates)
+        self.assertIn("ccx", program.gates)
+        self.assertEqual(program.version, "2.0")
+
+    def test_expressions(self):
+        "Operator precedence and functions"
+        program = parse('include "qelib1.inc"; qreg q[1];'
+                        'u3(-pi/2^2, 2*3+1, ln(exp(2))-sqrt(4)) q[0];')
+        params = [param.evaluate() for param in program.statements[-1].params]
+        self.assertAlmostEqual(params[0], -math.pi / 4)
+        self.assertAlmostEqual(params[1], 7)
+        self.assertAlmostEqual(params[2], 0)
+
+    def test_print_round_trip(self):
+        "Printed expressions parse back to the same value"
+        source = "qreg q[1]; U(-(1-2)*3, 2^-(1+1), -pi/4) q[0];"
+        statement = parse(source).statements[-1]
+        again = parse("qreg q[1]; " + statement.qasm()).statements[-1]
+        for first, second in zip(statement.params, again.params):
+            self.assertAlmostEqual(first.evaluate(), second.evaluate())
+
+    def test_errors(self):
+        "Invalid programs raise QasmError with the line number"
+        cases = [
+            "qreg q[1];\nfoo q[0];",
+            "qreg q[1];\nU(0,0) q[0];",
+            "qreg q[1];\nCX q[0],q[0];",
+            "qreg q[2];\nU(0,0,0) q[2];",
+            "qreg q[2];\nqreg q[1];",
+            "qreg q[2]; creg c[1];\nmeasure q -> c;",
+            "qreg q[2];\ngate g a { U(x,0,0) a; }",
+            "qreg q[2];\nif(c==1) U(0,0,0) q[0];",
+            "qreg q[2]\nU(0,0,0) q[0];",
+        ]
+        for source in cases:
+            with self.assertRaises(QasmError) as context:
+                parse(source)
+            self.assertEqual(context.exception.line, 2, source)
+
+    def test_include_chain(self):
+        "Nested includes are spliced once, and edits deep in the chain are seen"
+        directory = tempfile.mkdtemp()
+        try:
+            for index in range(200):
+                text = "gate g%d a { U(0,0,%d) a; }\n" % (index, index)
+                if index < 199:
+                    text = 'include "f%d.inc";\n' % (index + 1) + text
+                with open(os.path.join(directory, "f%d.inc" % index), "w") as out:
+                    out.write(text)
+            main = os.path.join(directory, "main.qasm")
+            program = parse('include "f0.inc"; qreg q[1]; g199 q[0];', main)
+            self.assertEqual(len(program.gates), 200)
+            self.assertEqual(len(program.includes), 200)
+            last = os.path.join(directory, "f199.inc")
+            with open(last, "w") as out:
+                out.write("gate g199 a { U(0,0,0) a; } gate g0 a { U(0,0,0) a; }\n")
+            os.utime(last, (1, 1))
+            with self.assertRaises(QasmError) as context:
+                parse('include "f0.inc";', main)
+            self.assertIn("'g0' is already declared", str(context.exception))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_long_expression(self):
+        "Parameters longer than the recursion limit are evaluated and printed"
+        terms = ["1", "2*a", "-a", "a^2", "1/a"] * 2000
+        program = parse("gate g(a) q { U(%s,0,0) q; }\nqreg q[1];\nU(%s,0,0) q[0];"
+                        % ("+".join(terms), "-".join(["1"] * 10000)))
+        self.assertEqual(program.statements[-1].params[0].value, -9998)
+        param = program.gates["g"].body[0].params[0]
+        self.assertEqual(param.qasm(), "+".join(terms))
+        self.assertEqual(param.substitute({"a": Real(2.0)}).fold().value, 2000 * 7.5)
+
+
+class TestIncludes(unittest.TestCase):
+    "Include files are parsed in the context of their includer"
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, text):
+        "Write a file of the test directory and return its path"
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as out:
+            out.write(text)
+        return path
+
+    def test_textual(self):
+        "An include may use the registers and gates declared before it"
+        self.write("ops.inc", "h q[1];\ngate twice a { flip a; flip a; }\ntwice q;\n")
+        main = self.write("main.qasm", 'include "qelib1.inc";\nqreg q[2];\n'
+                                       "gate flip a { x a; }\n"
+                                       'include "ops.inc";\nflip q[0];\n')
+        program = parse_file(main)
+        self.assertIn("twice", program.gates)
+        self.assertEqual([statement.name for statement in program.statements[-4:]],
+                         ["h", "twice", "twice", "flip"])
+        self.assertNotIn((os.path.join(self.directory, "ops.inc"), ()), _INCLUDE_CACHE)
+        self.assertIn((os.path.join(LIBS_PATH, "qelib1.inc"), ()), _INCLUDE_CACHE)
+
+        small = self.write("small.qasm", 'include "qelib1.inc";\nqreg q[1];\n'
+                                         "gate flip a { x a; }\n"
+                                         'include "ops.inc";\n')
+        with self.assertRaises(QasmError) as context:
+            parse_file(small)
+        self.assertEqual(context.exception.filename, os.path.join(self.directory, "ops.inc"))
+        self.assertEqual(context.exception.line, 1)
+
+    def test_cycles(self):
+        "A file including itself, directly or not, is an error"
+        self.write("self.inc", 'include "self.inc";\n')
+        self.write("a.inc", 'gate ga q { U(0,0,0) q; }\ninclude "b.inc";\n')
+        self.write("b.inc", '\ninclude "a.inc";\n')
+        for name, line, message in [("self.inc", 1, "self.inc -> self.inc"),
+                                    ("a.inc", 2, "a.inc -> b.inc -> a.inc")]:
+            main = self.write("main.qasm", 'qreg q[1];\ninclude "%s";\n' % name)
+            with self.assertRaises(QasmError) as context:
+                parse_file(main)
+            self.assertIn("include cycle: " + message, str(context.exception))
+            self.assertEqual(context.exception.line, line)
+        main = self.write("main.qasm", 'include "main.qasm";\n')
+        with self.assertRaises(QasmError) as context:
+            parse_file(main)
+        self.assertIn("main.qasm -> main.qasm", str(context.exception))
+
+    def test_deep_chain(self):
+        "Include chains deeper than the recursion limit parse"
+        depth = sys.getrecursionlimit() + 500
+        for index in range(depth):
+            text = "gate g%d a { U(0,0,0) a; }\n" % index
+            if index + 1 < depth:
+                text += 'include "f%d.inc";\n' % (index + 1)
+            self.write("f%d.inc" % index, text)
+        main = self.write("main.qasm", 'include "f0.inc";\nqreg q[1];\ng%d q[0];\n' % (depth - 1))
+        self.assertEqual(len(parse_file(main).includes), depth)
+
+    def test_nested_cache(self):
+        "The files of a chain are cached one by one and reused alone"
+        self.write("a.inc", 'gate ga q { U(0,0,0) q; }\ninclude "b.inc";\n')
+        self.write("b.inc", 'gate gb q { U(0,0,0) q; }\ninclude "c.inc";\n')
+        self.write("c.inc", "gate gc q { U(0,0,0) q; }\n")
+        program = parse_file(self.write("main.qasm", 'include "a.inc";\nqreg q[1];\n'))
+        program.statements.reverse()
+        cached = _INCLUDE_CACHE[os.path.join(self.directory, "b.inc"), ()]
+        self.assertEqual(cached.files(), [os.path.join(self.directory, name)
+                                          for name in ("b.inc", "c.inc")])
+        program = parse_file(self.write("other.qasm", 'include "b.inc";\nqreg q[1];\n'))
+        self.assertEqual([statement.name for statement in program.statements], ["gb", "gc", "q"])
+        self.assertEqual(program.includes, cached.files())
+
+    def test_cache_search_path(self):
+        "A cached file is only reused with the search path it was parsed with"
+        self.write("a.inc", 'include "lib.inc";\n')
+        for name in ("one", "two"):
+            os.mkdir(os.path.join(self.directory, name))
+            self.write(os.path.join(name, "lib.inc"), "gate %s q { U(0,0,0) q; }\n" % name)
+        main = self.write("main.qasm", 'include "a.inc";\n')
+        for name in ("one", "two"):
+            program = parse_file(main, [os.path.join(self.directory, name)])
+            self.assertEqual(list(program.gates), [name])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for the ASAP layering pass"
+
+import os
+import unittest
+
+import numpy as np
+
+from openqasm import parse, parse_file
+from openqasm.columnar import DEFAULT_BASIS, from_circuit, from_program, load
+from openqasm.corpus import asap_levels, depth, statistics
+from openqasm.schedule import asap_layers
+from openqasm.unroller import unroll
+from .harness import BENCHMARKS, circuit_of
+
+
+def layers_of(source):
+    "ASAP layers of an OpenQASM program"
+    return asap_layers(from_program(parse('include "qelib1.inc";' + source)))
+
+
+class TestSchedule(unittest.TestCase):
+    "ASAP layering"
+
+    def test_layers_are_parallel(self):
+        "Each layer acts on distinct qubits and follows program order per qubit"
+        circuit = load(os.path.join(BENCHMARKS, "quantum_volume", "quantum_volume_n5_d3.qasm"))
+        layers = asap_layers(circuit)
+        self.assertEqual(layers.widths().sum(), len(circuit) - 1)
+        for index in range(layers.depth):
+            rows = layers.rows(index)
+            qubits = np.concatenate((circuit.qubit0[rows],
+                                     circuit.qubit1[rows][circuit.qubit1[rows] >= 0]))
+            self.assertEqual(len(qubits), len(set(qubits.tolist())))
+        for qubit in range(circuit.num_qubits):
+            rows = np.flatnonzero((circuit.qubit0 == qubit) | (circuit.qubit1 == qubit))
+            self.assertTrue(np.all(np.diff(layers.layer[rows]) > 0))
+
+    def test_barrier(self):
+        "Nothing after a barrier starts before the latest of its qubits"
+        layers = layers_of("qreg q[2]; h q[0]; h q[0]; barrier q; h q[1];")
+        np.testing.assert_array_equal(layers.layer, [0, 1, 2, 2])
+        np.testing.assert_array_equal(layers.widths(), [1, 1, 1])
+
+    def test_classical_dependencies(self):
+        "Conditions wait for measurements and measurements for conditions"
+        layers = layers_of("qreg q[3]; creg c[2]; h q[0]; measure q[0] -> c[0];"
+                           "if(c==1) x q[1]; measure q[2] -> c[1]; measure q[2] -> c[1];")
+        np.testing.assert_array_equal(layers.layer, [0, 1, 2, 3, 4])
+        layers = layers_of("qreg q[3]; creg c[2]; measure q[0] -> c[0];"
+                           "measure q[1] -> c[1]; x q[2];")
+        np.testing.assert_array_equal(layers.layer, [0, 0, 0])
+
+    def test_conditions_in_parallel(self):
+        "Conditions on the same register do not wait for each other"
+        layers = layers_of("qreg q[3]; creg c[1]; measure q[0] -> c[0];"
+                           "if(c==1) x q[1]; if(c==1) x q[2]; measure q[1] -> c[0];")
+        np.testing.assert_array_equal(layers.layer, [0, 1, 1, 2])
+
+    def test_matches_corpus(self):
+        "The corpus tools put every instruction in the same layer"
+        circuits = [circuit_of(source) for source in [
+            "qreg q[3]; creg c[1]; measure q[0] -> c[0]; if(c==1) x q[1]; if(c==1) x q[2];",
+            "qreg q[3]; creg c[2]; creg d[1]; h q; measure q[0] -> c[1]; if(c==2) cx q[1],q[2];"
+            "barrier q; if(d==0) measure q[2] -> c[0]; if(c==1) reset q[0]; measure q[1] -> d[0];",
+        ]]
+        circuits.append(unroll(parse_file(os.path.join(BENCHMARKS, "cc", "cc_n10.qasm")),
+                               DEFAULT_BASIS))
+        for circuit in circuits:
+            layers = asap_layers(from_circuit(circuit))
+            self.assertEqual(depth(circuit), layers.depth)
+            self.assertEqual(statistics(circuit)["depth"], layers.depth)
+            for instruction, level, layer in zip(circuit, asap_levels(circuit),
+                                                 layers.layer.tolist()):
+                self.assertEqual(level, layer if instruction.name == "barrier" else layer + 1)
+
+    def test_split(self):
+        "Layers split into batched single-qubit gates and the rest"
+        layers = layers_of("qreg q[3]; creg c[1]; h q[0]; x q[1]; cx q[1],q[2];"
+                           "measure q[0] -> c[0];")
+        single, rest = layers.split(0)
+        np.testing.assert_array_equal(single, [0, 1])
+        self.assertEqual(len(rest), 0)
+        single, rest = layers.split(1)
+        self.assertEqual(len(single), 0)
+        np.testing.assert_array_equal(rest, [2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for the shared memory statevector engine"
+
+import os
+import unittest
+
+import numpy as np
+
+from openqasm import QasmError
+from openqasm.columnar import DEFAULT_BASIS
+from openqasm.engines import get_engine
+from openqasm.engines.sharedmem import SharedMemoryEngine
+from openqasm.gates import single_qubit_matrix
+from openqasm.outcomes import read_outcomes
+from openqasm.unroller import unroll_file
+from .harness import BENCHMARKS, circuit_of
+
+
+def dense(circuit):
+    "Statevector of the gates of a circuit applied to |0...0>"
+    num_qubits = circuit.num_qubits
+    state = np.zeros((2,) * num_qubits, dtype=complex)
+    state[(0,) * num_qubits] = 1
+    for instruction in circuit:
+        axes = [num_qubits - 1 - qubit for qubit in instruction.qubits]
+        if instruction.name in ("cx", "CX"):
+            index = [slice(None)] * num_qubits
+            index[axes[0]] = 1
+            target = axes[1] - (axes[1] > axes[0])
+            state[tuple(index)] = np.flip(state[tuple(index)], axis=target)
+        elif instruction.name not in ("barrier", "measure"):
+            matrix = single_qubit_matrix(instruction.name, instruction.params)
+            state = np.moveaxis(np.tensordot(matrix, state, axes=([1], axes)), 0, axes[0])
+    return state.ravel()
+
+
+class ChunkedEngine(SharedMemoryEngine):
+    "Engine splitting even tiny states into four chunks"
+
+    def num_chunks(self, num_qubits):
+        return 4
+
+
+class TestSharedMemoryEngine(unittest.TestCase):
+    "Chunked statevector simulation"
+
+    def test_random_circuit(self):
+        "Gates on local and high qubits sample the dense distribution"
+        rng = np.random.RandomState(4)
+        source = "qreg q[5]; creg c[5];"
+        for _ in range(30):
+            first, second = rng.choice(5, 2, replace=False)
+            source += "u3(%f,%f,%f) q[%d];" % (tuple(rng.uniform(0, 6, 3)) + (first,))
+            source += "cx q[%d],q[%d];" % (first, second)
+        circuit = circuit_of(source)
+        probabilities = abs(dense(circuit)) ** 2
+        circuit = circuit_of(source + "measure q -> c;")
+        shots = 20000
+        for engine in (ChunkedEngine(processes=2, seed=3), SharedMemoryEngine(1, seed=3)):
+            result = engine.run(circuit, shots)
+            self.assertEqual(result.metadata["chunks"], engine.num_chunks(5))
+            sampled = np.zeros(32)
+            for key, count in result.counts.items():
+                sampled[int(key, 2)] = count / float(shots)
+            self.assertLess(abs(sampled - probabilities).sum() / 2, 0.03)
+
+    def test_bv_reference(self):
+        "Bernstein-Vazirani gives the reference outcome"
+        path = os.path.join(BENCHMARKS, "bv", "bv_n14.qasm")
+        expected = dict((key, 1) for key in read_outcomes(path))
+        result = get_engine("local_sharedmem_simulator", seed=1).run(
+            unroll_file(path, DEFAULT_BASIS), shots=1)
+        self.assertEqual(result.get_counts(), expected)
+
+    def test_classical_control(self):
+        "Measurements, resets and conditions on high qubits take effect"
+        circuit = circuit_of("qreg q[4]; creg a[1]; creg b[1]; x q[3];"
+                             "measure q[3] -> a[0]; reset q[3]; if(a==1) x q[0];"
+                             "cx q[0],q[2]; measure q[3] -> b[0]; measure q[2] -> a[0];")
+        counts = ChunkedEngine(processes=2, seed=2).run(circuit, shots=3).counts
+        self.assertEqual(counts, {"0 1": 3})
+
+    def test_unknown_gate(self):
+        "A gate the engine cannot apply is reported by name"
+        circuit = circuit_of("gate foo a { x a; } qreg q[1]; creg c[1]; foo q[0];"
+                             "measure q -> c;", ["foo"])
+        with self.assertRaises(QasmError) as context:
+            SharedMemoryEngine(1, seed=1).run(circuit, shots=1)
+        self.assertIn("'foo'", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for the benchmark telemetry"
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from openqasm.telemetry import (OTLPExporter, PrometheusTextfile, Telemetry,
+                                otlp_payload, prometheus_text)
+
+
+class Collector(BaseHTTPRequestHandler):
+    "Keep the bodies posted to it"
+
+    bodies = []
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        "Store the request body"
+        length = int(self.headers["Content-Length"])
+        Collector.bodies.append(json.loads(self.rfile.read(length).decode()))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class TestTelemetry(unittest.TestCase):
+    "Metric samples and their export formats"
+
+    def setUp(self):
+        self.telemetry = Telemetry()
+        labels = {"suite": "qft", "backend": "local_mps_simulator", "n": 10, "depth": 0}
+        self.telemetry.inc("runs_total", help_text="Runs.", status="done", **labels)
+        self.telemetry.inc("runs_total", 2, status="done", **labels)
+        self.telemetry.set("qubits", 10, "Width.", **labels)
+        self.telemetry.observe("phase_duration_seconds", 0.5, "Durations.", phase="simulate")
+        self.telemetry.observe("phase_duration_seconds", 20.0, phase="simulate")
+
+    def test_prometheus_text(self):
+        "Counters, gauges and cumulative histogram buckets"
+        text = prometheus_text(self.telemetry.metrics.values())
+        self.assertIn("# TYPE qasmbench_runs_total counter\n", text)
+        self.assertIn('qasmbench_runs_total{backend="local_mps_simulator",depth="0",n="10",'
+                      'status="done",suite="qft"} 3\n', text)
+        self.assertIn('qasmbench_qubits{backend="local_mps_simulator",depth="0",n="10",'
+                      'suite="qft"} 10\n', text)
+        self.assertIn('qasmbench_phase_duration_seconds_bucket{phase="simulate",le="0.1"} 0\n',
+                      text)
+        self.assertIn('qasmbench_phase_duration_seconds_bucket{phase="simulate",le="1.0"} 1\n',
+                      text)
+        self.assertIn('qasmbench_phase_duration_seconds_bucket{phase="simulate",le="+Inf"} 2\n',
+                      text)
+        self.assertIn('qasmbench_phase_duration_seconds_sum{phase="simulate"} 20.5\n', text)
+        self.assertIn('qasmbench_phase_duration_seconds_count{phase="simulate"} 2\n', text)
+
+    def test_otlp_payload(self):
+        "Cumulative sums, gauges and histograms with their attributes"
+        payload = otlp_payload(self.telemetry.metrics.values(), self.telemetry.start_time)
+        metrics = dict((metric["name"], metric) for metric in
+                       payload["resourceMetrics"][0]["scopeMetrics"][0]["metrics"])
+        runs = metrics["qasmbench_runs_total"]["sum"]
+        self.assertTrue(runs["isMonotonic"])
+        self.assertEqual(runs["dataPoints"][0]["asDouble"], 3.0)
+        self.assertIn({"key": "suite", "value": {"stringValue": "qft"}},
+                      runs["dataPoints"][0]["attributes"])
+        self.assertEqual(metrics["qasmbench_qubits"]["gauge"]["dataPoints"][0]["asDouble"], 10)
+        point = metrics["qasmbench_phase_duration_seconds"]["histogram"]["dataPoints"][0]
+        self.assertEqual(point["count"], "2")
+        self.assertEqual(len(point["bucketCounts"]), len(point["explicitBounds"]) + 1)
+
+    def test_phase(self):
+        "A phase records its duration and memory, and counts errors"
+        with self.telemetry.phase("parse", suite="bv"):
+            pass
+        with self.assertRaises(ValueError):
+            with self.telemetry.phase("parse", suite="bv"):
+                raise ValueError("bad")
+        durations = self.telemetry.metrics["qasmbench_phase_duration_seconds"]
+        self.assertEqual(durations.samples[(("phase", "parse"), ("suite", "bv"))][2], 2)
+        errors = self.telemetry.metrics["qasmbench_phase_errors_total"]
+        self.assertEqual(errors.samples[(("phase", "parse"), ("suite", "bv"))], 1)
+        rss = self.telemetry.metrics["qasmbench_rss_bytes"]
+        self.assertGreater(rss.samples[(("phase", "parse"), ("suite", "bv"))], 0)
+
+
+class TestExporters(unittest.TestCase):
+    "Textfile and collector exports"
+
+    def test_textfile(self):
+        "Every flush rewrites the textfile"
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "bench.prom")
+            telemetry = Telemetry([PrometheusTextfile(path)])
+            with telemetry.phase("simulate", suite="qft"):
+                pass
+            with open(path) as prom:
+                text = prom.read()
+            self.assertIn('qasmbench_phase_duration_seconds_count{phase="simulate",'
+                          'suite="qft"} 1\n', text)
+            self.assertIn("qasmbench_last_flush_timestamp_seconds ", text)
+            self.assertEqual(os.listdir(directory), ["bench.prom"])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_collector(self):
+        "Metrics are posted to the collector, and an absent collector is not fatal"
+        server = HTTPServer(("127.0.0.1", 0), Collector)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            Collector.bodies = []
+            endpoint = "http://127.0.0.1:%d/v1/metrics" % server.server_address[1]
+            telemetry = Telemetry([OTLPExporter(endpoint)])
+            telemetry.inc("runs_total", status="done")
+            telemetry.flush()
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.assertEqual(len(Collector.bodies), 1)
+        names = [metric["name"] for metric in
+                 Collector.bodies[0]["resourceMetrics"][0]["scopeMetrics"][0]["metrics"]]
+        self.assertIn("qasmbench_runs_total", names)
+
+        exporter = OTLPExporter(endpoint, timeout=0.5)
+        telemetry = Telemetry([exporter])
+        telemetry.flush()
+        telemetry.flush()
+        self.assertEqual(exporter.failures, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
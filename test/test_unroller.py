@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for the gate unroller"
+
+import math
+import unittest
+
+from openqasm import QasmError, parse, parse_file
+from openqasm.unroller import Unroller, unroll
+from .harness import get_file_path
+
+
+class TestUnroller(unittest.TestCase):
+    "Expansion down to U and CX with memoized templates"
+
+    def test_nested_definitions(self):
+        "Templates of nested gates flatten to U and CX"
+        program = parse_file(get_file_path("generic", "bigadder"))
+        circuit = unroll(program)
+        self.assertEqual(set(circuit.count_ops()), {"U", "CX", "measure"})
+        # ccx expands to 15 primitives, majority and unmaj to 17 each
+        self.assertEqual(len(Unroller(program.gates).template("add4").ops),
+                         8 * 17 + 1)
+
+    def test_templates_are_memoized(self):
+        "Each gate definition is expanded once"
+        program = parse_file(get_file_path("generic", "bigadder"))
+        unroller = Unroller(program.gates)
+        unroller.unroll(program)
+        misses = unroller.misses
+        unroller.unroll(program)
+        self.assertEqual(unroller.misses, misses)
+        self.assertGreater(unroller.hits, 0)
+
+    def test_parameters_and_broadcast(self):
+        "Parameters are bound per call and registers are broadcast"
+        circuit = unroll(parse('include "qelib1.inc"; qreg a[2]; qreg b[2]; creg c[2];'
+                               'crz(pi) a,b; if(c==1) u2(0,pi) b[1];'))
+        self.assertEqual([instruction.qubits for instruction in circuit][:4],
+                         [(2,), (0, 2), (2,), (0, 2)])
+        self.assertAlmostEqual(circuit.instructions[2].params[2], -math.pi / 2)
+        last = circuit.instructions[-1]
+        self.assertEqual(last.condition, ("c", 1))
+        self.assertEqual(last.qubits, (3,))
+
+    def test_invalid_parameters(self):
+        "Parameters a gate cannot be applied with are a QasmError at their line"
+        program = parse("qreg q[1];\ngate g(a) r { U(1/a,0,0) r; }\ng(1) q[0];\ng(0) q[0];",
+                        "div.qasm")
+        with self.assertRaises(QasmError) as context:
+            unroll(program)
+        self.assertEqual((context.exception.filename, context.exception.line), ("div.qasm", 4))
+        self.assertIn("'g'", str(context.exception))
+
+    def test_qasm_round_trip(self):
+        "The flattened program is valid and expands to itself"
+        program = parse_file(get_file_path("generic", "qec"))
+        circuit = unroll(program, basis=["syndrome"])
+        self.assertIn("gate syndrome", circuit.qasm())
+        again = unroll(parse(circuit.qasm(17)), basis=["syndrome"])
+        self.assertEqual(again.instructions, circuit.instructions)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 IBM RESEARCH. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+"Tests for the incremental watch mode"
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from openqasm.watch import Watcher
+from .harness import HEADER
+
+
+class TestWatcher(unittest.TestCase):
+    "Re-validation of changed files and their includers"
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.mtime = 1000000000
+        self.write("lib.inc", "gate flip a { U(pi,0,pi) a; }\n")
+        self.write("uses.qasm", HEADER + 'include "lib.inc";\nqreg q[1];\nflip q[0];\n')
+        self.write("other.qasm", HEADER + "qreg q[1];\nh q[0];\n")
+        self.watcher = Watcher([self.directory])
+        self.first = self.watcher.poll()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, text):
+        "Write a file with a new modification time"
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as out:
+            out.write(text)
+        self.mtime += 10
+        os.utime(path, (self.mtime, self.mtime))
+
+    def validated(self, results):
+        "Names and errors of the validated files"
+        return dict((os.path.basename(path), error) for path, error, _ in results)
+
+    def test_initial_scan(self):
+        "Every file is validated once"
+        self.assertEqual(self.validated(self.first),
+                         {"lib.inc": None, "uses.qasm": None, "other.qasm": None})
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_include_change(self):
+        "Editing an include re-validates the files that include it"
+        self.write("lib.inc", "gate flip a { nope a; }\n")
+        results = self.validated(self.watcher.poll())
+        self.assertEqual(sorted(results), ["lib.inc", "uses.qasm"])
+        self.assertIn("not defined", str(results["uses.qasm"]))
+        self.write("lib.inc", "gate flip a { U(0,0,pi) a; }\n")
+        results = self.validated(self.watcher.poll())
+        self.assertEqual(results, {"lib.inc": None, "uses.qasm": None})
+
+    def test_same_text_skipped(self):
+        "A file saved with the same text keeps its result"
+        self.write("other.qasm", HEADER + "qreg q[1];\nh q[0];\n")
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_missing_include_created(self):
+        "A file in error is checked again when a new file appears"
+        self.write("late.qasm", HEADER + 'include "later.inc";\nqreg q[1];\nswap2 q[0];\n')
+        self.assertIn("not found", str(self.validated(self.watcher.poll())["late.qasm"]))
+        self.write("later.inc", "gate swap2 a { U(pi,0,pi) a; }\n")
+        results = self.validated(self.watcher.poll())
+        self.assertEqual(results, {"later.inc": None, "late.qasm": None})
+        self.assertEqual(self.watcher.errors(), {})
+
+    def test_include_cycle(self):
+        "A file including itself is reported and the watcher keeps going"
+        self.write("loop.qasm", HEADER + 'include "loop.qasm";\n')
+        results = self.validated(self.watcher.poll())
+        self.assertIn("include cycle", str(results["loop.qasm"]))
+        self.write("loop.qasm", HEADER + "qreg q[1];\n")
+        self.assertEqual(self.validated(self.watcher.poll()), {"loop.qasm": None})
+
+
+if __name__ == '__main__':
+    unittest.main()